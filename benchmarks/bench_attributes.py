@@ -0,0 +1,106 @@
+"""Compare per-update attribute extraction of the schema registry against the old if/elif chains.
+
+Run with ``python benchmarks/bench_attributes.py``.  Each content type is
+timed on an update that changes only the title, so every type-specific
+attribute is carried forward from the previous revision.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_example_contents, seed_users
+from cms.schema import extract_attributes
+from cms.types import ContentType
+
+
+def legacy_extract(item):
+    """Reproduce the attribute handling of the former ``_add_revision``."""
+    attrs = {}
+    if "title" in item:
+        attrs["title"] = item["title"]
+    if "file_uuid" in item:
+        attrs["file_uuid"] = item.pop("file_uuid")
+    elif item.get("type") == ContentType.PDF.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "file_uuid" in last:
+            attrs["file_uuid"] = last["file_uuid"]
+    if "html_content" in item:
+        attrs["html_content"] = item.pop("html_content")
+    elif item.get("type") == ContentType.HTML.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "html_content" in last:
+            attrs["html_content"] = last["html_content"]
+    if "postal_code" in item:
+        attrs["postal_code"] = item.pop("postal_code")
+    elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "postal_code" in last:
+            attrs["postal_code"] = last["postal_code"]
+    if "address" in item:
+        attrs["address"] = item.pop("address")
+    elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "address" in last:
+            attrs["address"] = last["address"]
+    if "phone" in item:
+        attrs["phone"] = item.pop("phone")
+    elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "phone" in last:
+            attrs["phone"] = last["phone"]
+    if "fax" in item:
+        attrs["fax"] = item.pop("fax")
+    elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "fax" in last:
+            attrs["fax"] = last["fax"]
+    if "email" in item:
+        attrs["email"] = item.pop("email")
+    elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "email" in last:
+            attrs["email"] = last["email"]
+    if "start" in item:
+        attrs["start"] = item.pop("start")
+    elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "start" in last:
+            attrs["start"] = last["start"]
+    if "end" in item:
+        attrs["end"] = item.pop("end")
+    elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "end" in last:
+            attrs["end"] = last["end"]
+    if "all_day" in item:
+        attrs["all_day"] = item.pop("all_day")
+    elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
+        last = item["revisions"][-1].get("attributes", {})
+        if "all_day" in last:
+            attrs["all_day"] = last["all_day"]
+    return attrs
+
+
+def schema_extract(item):
+    return extract_attributes(item, item["revisions"][-1]["attributes"])
+
+
+def main():
+    items = {item.type: item.to_dict() for item in seed_example_contents(seed_users())}
+    number = 100000
+    print(f"{'type':<16}{'legacy':>10}{'schema':>10}  (us per update)")
+    for ct in ContentType:
+        item = items[ct]
+        item["title"] = "Renamed"
+        timings = []
+        for extract in (legacy_extract, schema_extract):
+            assert extract(dict(item)) == legacy_extract(dict(item))
+            seconds = timeit.timeit(lambda: extract(dict(item)), number=number)
+            timings.append(seconds / number * 1e6)
+        print(f"{ct.value:<16}{timings[0]:>10.2f}{timings[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time listing one category against scanning every item's ``categories``.
+
+Run with ``python benchmarks/bench_category.py``.  The store holds items
+spread over many categories of very different sizes.  For each category
+the table shows how long the first page (100 items) and the whole
+membership take through ``DbContext.category_index``, and how long the
+scan of every stored item that a category listing needed before takes.
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users
+from cms.db_context import DbContext
+from cms.services import CategoryService, ContentService
+
+CATEGORIES = [f"cat-{i:03d}" for i in range(200)]
+
+
+def populate(count):
+    users = seed_users()
+    ctx = DbContext()
+    for category in CATEGORIES:
+        CategoryService(ctx).create_category({"uuid": category, "name": category})
+    service = ContentService(ctx)
+    rng = random.Random(13)
+    weights = [1 / (rank + 1) for rank in range(len(CATEGORIES))]
+    for i in range(count):
+        service.create({
+            "uuid": f"item-{i:08d}",
+            "type": "html",
+            "title": f"Item {i}",
+            "categories": sorted(set(rng.choices(CATEGORIES, weights=weights, k=2))),
+            "created_by": users["editor"]["uuid"],
+            "created_at": f"2025-06-08T12:00:{i % 60:02d}",
+            "timestamps": "2025-06-08T12:00:00",
+        })
+    return ctx
+
+
+def scan(ctx, category):
+    return [item for item in ctx.contents.values() if category in (item.get("categories") or ())]
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    count = 100000
+    ctx = populate(count)
+    print(f"{count} items")
+    print(f"{'category':<10}{'members':>9}{'page ms':>9}{'all ms':>9}{'scan ms':>9}")
+    for category in ("cat-000", "cat-010", "cat-199"):
+        members = ctx.category_index.count(category)
+        assert len(ctx.page_category(category, count)[0]) == len(scan(ctx, category)) == members
+        page = best(lambda: ctx.page_category(category, 100), 100)
+        whole = best(lambda: ctx.page_category(category, count), 5)
+        scanned = best(lambda: scan(ctx, category), 1)
+        print(f"{category:<10}{members:>9}{page:>9.3f}{whole:>9.2f}{scanned:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Time event range queries against filtering the whole event listing.
+
+Run with ``python benchmarks/bench_events.py``.  The store holds published
+events spread over a year, most an hour or two long and some lasting
+days.  For windows of increasing width the table shows how long one
+query takes through ``DbContext.event_index`` and through reading every
+published event's revision and testing its span, as a client had to do
+with ``GET /content-types/event schedule``.  Moving one event and querying
+again is timed separately; the tree is updated in place, not rebuilt.
+"""
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users
+from cms.db_context import DbContext
+from cms.events import event_span
+from cms.revisions import attributes_at
+from cms.services import ContentService
+from cms.types import ContentType
+
+BASE = datetime(2025, 1, 1)
+
+
+def populate(count):
+    users = seed_users()
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    ctx = DbContext()
+    service = ContentService(ctx)
+    rng = random.Random(5)
+    for i in range(count):
+        start = BASE + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        hours = rng.choice([1, 1, 2, 2, 3, 48, 120])
+        service.create({
+            "uuid": f"event-{i:08d}",
+            "type": ContentType.EVENT_SCHEDULE.value,
+            "title": f"Event {i}",
+            "start": start.isoformat(),
+            "end": (start + timedelta(hours=hours)).isoformat(),
+            "all_day": False,
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.update(f"event-{i:08d}", {"title": f"Event {i}"})
+        service.approve(f"event-{i:08d}", admin)
+    return ctx
+
+
+def scan(ctx, low, high):
+    found = []
+    for item in ctx.iter_contents(ContentType.EVENT_SCHEDULE, True):
+        position = ctx.revision_position(item, item.get("published_revision"))
+        span = event_span(attributes_at(item["revisions"], position))
+        if span and span[0] <= high and span[1] >= low:
+            found.append(item["uuid"])
+    return found
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    count = 50000
+    ctx = populate(count)
+    index = ctx.event_index
+    service = ContentService(ctx)
+    admin = {"user_uuid": seed_users()["admin"]["uuid"], "timestamp": "2025-06-09T12:00:00"}
+    moves = iter(range(10**6))
+
+    def move():
+        hour = next(moves) % 24
+        service.update("event-00000000", {"start": f"2025-07-01T{hour:02d}:00:00",
+                                          "end": f"2025-07-01T{hour:02d}:30:00"})
+        service.approve("event-00000000", admin)
+        index.overlapping(BASE, BASE + timedelta(hours=1))
+
+    print(f"{count} events, move one and query again in {best(move, 20):.2f} ms")
+    print(f"{'window':<10}{'matches':>9}{'index ms':>10}{'scan ms':>10}")
+    low = BASE + timedelta(days=180)
+    for name, width in (("1 hour", timedelta(hours=1)), ("1 day", timedelta(days=1)),
+                        ("1 week", timedelta(days=7)), ("1 month", timedelta(days=30))):
+        high = low + width
+        matches = index.overlapping(low, high)
+        assert set(matches) == set(scan(ctx, low, high))
+        indexed = best(lambda: index.overlapping(low, high), 50)
+        scanned = best(lambda: scan(ctx, low, high), 1)
+        print(f"{name:<10}{len(matches):>9}{indexed:>10.3f}{scanned:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
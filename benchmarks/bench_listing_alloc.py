@@ -0,0 +1,89 @@
+"""Measure what a full content listing allocates, with and without pre-rendered items.
+
+Run with ``python benchmarks/bench_listing_alloc.py``.  The store holds
+published and draft items of every type, each edited once.  For each way of
+producing the encoded items of ``GET /content`` the table shows the peak
+memory traced by ``tracemalloc`` and, from a separate untraced run, the
+wall time.  The response body itself, the same size for every row, is not
+counted.
+
+``dicts``
+    ``ContentService.page`` and encoding each item: one flagged copy per
+    item, with its revisions decoded, as every listing did before items
+    were pre-rendered.
+``encoded (cold)``
+    ``ContentService.page_encoded`` right after every item changed; each
+    item is encoded and kept.
+``encoded (warm)``
+    ``page_encoded`` again; every item comes from ``ctx.rendered_items``.
+
+A cold listing does the same work as the dict path, so it takes about as
+long; what it adds is the memory ``rendered_items`` holds afterwards.
+Timing under ``tracemalloc`` would make the cold row look several times
+slower, since tracing charges every kept encoding.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_example_contents, seed_users
+from cms.db_context import DbContext
+from cms.models import json_default
+from cms.services import ContentService
+
+encode = json.JSONEncoder(default=json_default).encode
+
+
+def populate(count):
+    users = seed_users()
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    ctx = DbContext()
+    service = ContentService(ctx)
+    templates = seed_example_contents(users)
+    for i in range(count):
+        body = templates[i % len(templates)].to_dict()
+        body["uuid"] = f"item-{i:08d}"
+        service.create(body)
+        service.update(body["uuid"], {"title": f"Item {i}"})
+        if i % 2:
+            service.approve(body["uuid"], admin)
+    return ctx, service
+
+
+def measure(prepare, produce):
+    prepare()
+    start = time.perf_counter()
+    produce()
+    elapsed = time.perf_counter() - start
+    prepare()
+    tracemalloc.start()
+    result = produce()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, elapsed
+
+
+def main():
+    count = 20000
+    ctx, service = populate(count)
+    nothing = lambda: None
+    rows = [
+        ("dicts", nothing, lambda: [encode(item).encode() for item in service.page(None, True, count)[0]]),
+        ("encoded (cold)", ctx.rendered_items.clear, lambda: service.page_encoded(None, True, count)),
+        ("encoded (warm)", nothing, lambda: service.page_encoded(None, True, count)),
+    ]
+    print(f"{count} items")
+    print(f"{'':<16}{'peak KiB':>10}{'B/item':>8}{'ms':>8}")
+    for name, prepare, produce in rows:
+        peak, elapsed = measure(prepare, produce)
+        print(f"{name:<16}{peak / 1024:>10.0f}{peak / count:>8.1f}{elapsed * 1e3:>8.1f}")
+    print(f"rendered_items holds {ctx.rendered_items.size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
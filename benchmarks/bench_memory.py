@@ -0,0 +1,63 @@
+"""Compare the memory held per stored item by slotted records and plain dicts.
+
+Run with ``python benchmarks/bench_memory.py``.  Items arrive the way the
+API receives them: each create and update is a separately decoded JSON
+body, so plain dicts carry their own copies of every key string.  The
+legacy store is a ``DbContext`` that keeps items as given, which is how it
+behaved before records were introduced.  Each item gets a few title edits,
+so the store also holds a short revision history per item.
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_example_contents, seed_users
+from cms.db_context import DbContext
+from cms.services import ContentService
+
+
+class LegacyDbContext(DbContext):
+    content_record = None
+    category_record = None
+
+
+def populate(ctx, templates, count, edits):
+    service = ContentService(ctx)
+    for i in range(count):
+        body = json.loads(templates[i % len(templates)])
+        body["uuid"] = f"item-{i:08d}"
+        body["created_at"] = f"2025-06-{1 + i % 28:02d}T12:00:00"
+        service.create(body)
+        for edit in range(edits):
+            service.update(body["uuid"], json.loads(json.dumps({"title": f"Title {i} edit {edit}"})))
+
+
+def measure(context_class, templates, count, edits):
+    gc.collect()
+    tracemalloc.start()
+    ctx = context_class()
+    # Indexes are the same for both stores; leave them out of the figure.
+    ctx.content_indexes = []
+    populate(ctx, templates, count, edits)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / count
+
+
+def main():
+    templates = [json.dumps(item.to_dict()) for item in seed_example_contents(seed_users())]
+    count = 5000
+    print(f"{'edits':>6}{'dicts':>12}{'records':>12}{'ratio':>8}  (bytes per item)")
+    for edits in (0, 3, 10):
+        legacy = measure(LegacyDbContext, templates, count, edits)
+        compact = measure(DbContext, templates, count, edits)
+        print(f"{edits:>6}{legacy:>12.0f}{compact:>12.0f}{legacy / compact:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
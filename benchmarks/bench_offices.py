@@ -0,0 +1,85 @@
+"""Time office address lookups against filtering the whole address listing.
+
+Run with ``python benchmarks/bench_offices.py``.  The store holds published
+office addresses with seven-digit postal codes.  For each lookup the table
+shows how long it takes through ``DbContext.office_index`` and through
+reading every published address's revision, as the "nearest office"
+widget did by downloading ``GET /content-types/office address``.
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users
+from cms.db_context import DbContext
+from cms.offices import normalize_phone, normalize_postal_code
+from cms.revisions import attributes_at
+from cms.services import ContentService
+from cms.types import ContentType
+
+
+def populate(count):
+    users = seed_users()
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    ctx = DbContext()
+    service = ContentService(ctx)
+    rng = random.Random(11)
+    for i in range(count):
+        code = f"{rng.randrange(10_000_000):07d}"
+        service.create({
+            "uuid": f"office-{i:08d}",
+            "type": ContentType.OFFICE_ADDRESS.value,
+            "title": f"Office {i}",
+            "postal_code": f"{code[:3]}-{code[3:]}",
+            "address": f"{i} Example Rd.",
+            "phone": f"03-{i // 10000:04d}-{i % 10000:04d}",
+            "email": f"office{i}@example.com",
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.update(f"office-{i:08d}", {"title": f"Office {i}"})
+        service.approve(f"office-{i:08d}", admin)
+    return ctx
+
+
+def scan(ctx, postal_code=None, phone=None):
+    found = []
+    for item in ctx.iter_contents(ContentType.OFFICE_ADDRESS, True):
+        position = ctx.revision_position(item, item.get("published_revision"))
+        attrs = attributes_at(item["revisions"], position)
+        if postal_code is not None and not normalize_postal_code(attrs.get("postal_code")).startswith(postal_code):
+            continue
+        if phone is not None and normalize_phone(attrs.get("phone")) != phone:
+            continue
+        found.append(item["uuid"])
+    return found
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    count = 50000
+    ctx = populate(count)
+    index = ctx.office_index
+    print(f"{count} offices")
+    print(f"{'lookup':<22}{'matches':>9}{'index ms':>10}{'scan ms':>10}")
+    for name, criteria in (
+        ("postal_code=1", {"postal_code": "1"}),
+        ("postal_code=123", {"postal_code": "123"}),
+        ("postal_code=12345", {"postal_code": "12345"}),
+        ("phone=03-0002-0345", {"phone": "0300020345"}),
+    ):
+        matches, _ = index.lookup(limit=count, **criteria)
+        assert set(matches) == set(scan(ctx, **criteria))
+        indexed = best(lambda: index.lookup(limit=100, **criteria), 100)
+        scanned = best(lambda: scan(ctx, **criteria), 1)
+        print(f"{name:<22}{len(matches):>9}{indexed:>10.3f}{scanned:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
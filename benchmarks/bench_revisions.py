@@ -0,0 +1,61 @@
+"""Compare revision storage size and read cost of delta encoding against full copies.
+
+Run with ``python benchmarks/bench_revisions.py``.  One HTML page of about
+20 KB is edited 500 times through ``ContentService.update``; each edit
+replaces a few characters somewhere in the body, as an editor would.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import sample_content, seed_users
+from cms.db_context import DbContext
+from cms.models import json_default
+from cms.revisions import KEYFRAME_INTERVAL, attributes_at
+from cms.services import ContentService
+
+EDITS = 500
+
+
+def main():
+    rng = random.Random(0)
+    users = seed_users()
+    service = ContentService(DbContext())
+    item = sample_content(users).to_dict()
+    del item["revisions"]
+    item["html_content"] = "".join(f"<p>Paragraph {i} of a long page body.</p>" for i in range(500))
+    item = service.create(item)
+    html = item["revisions"][0]["attributes"]["html_content"]
+
+    start = time.perf_counter()
+    for _ in range(EDITS):
+        pos = rng.randrange(len(html))
+        html = html[:pos] + f"<em>{rng.randrange(1000)}</em>" + html[pos + rng.randrange(30):]
+        service.update(item["uuid"], {"html_content": html})
+    write = time.perf_counter() - start
+
+    stored = service.ctx.contents[item["uuid"]]["revisions"]
+    start = time.perf_counter()
+    full = service.get(item["uuid"])["revisions"]
+    decode = time.perf_counter() - start
+    start = time.perf_counter()
+    for index in range(len(stored)):
+        attributes_at(stored, index)
+    random_read = (time.perf_counter() - start) / len(stored)
+
+    full_size = len(json.dumps(full))
+    stored_size = len(json.dumps(stored, default=json_default))
+    print(f"revisions: {len(stored)}, keyframe every {KEYFRAME_INTERVAL}")
+    print(f"full copies:   {full_size / 1024:9.1f} KiB")
+    print(f"delta encoded: {stored_size / 1024:9.1f} KiB  ({full_size / stored_size:.1f}x smaller)")
+    print(f"update:        {write / EDITS * 1e6:9.1f} us per edit (returned item decoded in full)")
+    print(f"decode all:    {decode * 1e3:9.1f} ms")
+    print(f"read one:      {random_read * 1e6:9.1f} us per revision")
+
+
+if __name__ == "__main__":
+    main()
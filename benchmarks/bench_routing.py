@@ -0,0 +1,112 @@
+"""Compare route dispatch cost of the route table against the old if/elif chains.
+
+Run with ``python benchmarks/bench_routing.py``.  Only path matching is timed;
+no requests are served.
+"""
+import os
+import sys
+import timeit
+from urllib.parse import unquote, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import SimpleCRUDHandler
+from cms.routing import split_target
+
+PATHS = [
+    ("GET", "/categories"),
+    ("GET", "/categories/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11"),
+    ("GET", "/content-types/event%20schedule"),
+    ("GET", "/pending-approvals"),
+    ("GET", "/content"),
+    ("GET", "/content/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11"),
+    ("POST", "/content/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11/approve"),
+    ("POST", "/content/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11/start-draft"),
+    ("POST", "/content"),
+    ("PUT", "/content/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11"),
+    ("DELETE", "/content/5b8f3b9e-0c4e-4c39-9a4e-2f1d6b1e0a11"),
+]
+
+
+def legacy_dispatch(method, path):
+    """Reproduce the matching logic of the former do_* methods."""
+    if method == "GET":
+        parsed = urlparse(path)
+        if parsed.path == "/categories":
+            return "categories.list", {}
+        if parsed.path.startswith("/categories/"):
+            return "categories.get", {"uuid": parsed.path.split("/")[-1]}
+        if parsed.path == "/content-types":
+            return "content_types.list", {}
+        if parsed.path.startswith("/content-types/"):
+            return "content_types.items", {"type": unquote(parsed.path.split("/")[-1])}
+        if parsed.path == "/pending-approvals":
+            return "content.pending", {}
+        if parsed.path == "/content":
+            return "content.list", {}
+        if parsed.path.startswith("/content/"):
+            return "content.get", {"uuid": parsed.path.split("/")[-1]}
+        return None
+    if method == "POST":
+        if path == "/test-token":
+            return "test_token", {}
+        parsed = urlparse(path)
+        if parsed.path == "/check-metadata":
+            return "check_metadata", {}
+        if parsed.path == "/categories":
+            return "categories.create", {}
+        if parsed.path.startswith("/content/") and parsed.path.endswith("/request-approval"):
+            return "content.request_approval", {"uuid": parsed.path.split("/")[2]}
+        if parsed.path.startswith("/content/") and parsed.path.endswith("/approve"):
+            return "content.approve", {"uuid": parsed.path.split("/")[2]}
+        if parsed.path.startswith("/content/") and parsed.path.endswith("/start-draft"):
+            return "content.start_draft", {"uuid": parsed.path.split("/")[2]}
+        if parsed.path != "/content":
+            return None
+        return "content.create", {}
+    if method == "PUT":
+        parsed = urlparse(path)
+        if parsed.path.startswith("/categories/"):
+            return "categories.update", {"uuid": parsed.path.split("/")[-1]}
+        if parsed.path.startswith("/content/"):
+            return "content.update", {"uuid": parsed.path.split("/")[-1]}
+        return None
+    if method == "DELETE":
+        parsed = urlparse(path)
+        if parsed.path.startswith("/categories/"):
+            return "categories.archive", {"uuid": parsed.path.split("/")[-1]}
+        if parsed.path.startswith("/content/"):
+            return "content.archive", {"uuid": parsed.path.split("/")[-1]}
+        return None
+    return None
+
+
+def table_dispatch(method, path, routes=SimpleCRUDHandler.routes):
+    """Match the way ``SimpleCRUDHandler._dispatch`` does."""
+    match = routes.match(method, split_target(path)[0])
+    if match is None:
+        return None
+    route, params = match
+    return route.name, params
+
+
+def main(number=20000):
+    for method, path in PATHS:
+        assert legacy_dispatch(method, path) == table_dispatch(method, path), path
+
+    print(f"{'route':<28}{'if/elif (us)':>14}{'table (us)':>14}")
+    totals = [0.0, 0.0]
+    for method, path in PATHS:
+        name = table_dispatch(method, path)[0]
+        costs = []
+        for fn in (legacy_dispatch, table_dispatch):
+            seconds = min(timeit.repeat(lambda: fn(method, path), number=number, repeat=3))
+            costs.append(seconds / number * 1e6)
+        totals[0] += costs[0]
+        totals[1] += costs[1]
+        print(f"{name:<28}{costs[0]:>14.2f}{costs[1]:>14.2f}")
+    print(f"{'total':<28}{totals[0]:>14.2f}{totals[1]:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time full-text search against scanning every item.
+
+Run with ``python benchmarks/bench_search.py``.  The store holds published
+HTML items whose bodies draw words from a shared vocabulary, so common
+words match many items and rare ones few.  The table shows how long one
+query takes through ``ContentService.search``, the first time ("cold") and
+once its ranking is kept ("warm", as for the following pages), and
+through a scan that strips and tokenizes each published revision, as a
+search had to do without ``DbContext.search_index``.
+"""
+import itertools
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users
+from cms.db_context import DbContext
+from cms.revisions import attributes_at
+from cms.search import strip_tags, tokenize
+from cms.services import ContentService
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+# Zipf-like, so low-numbered words are common
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def populate(count):
+    users = seed_users()
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    ctx = DbContext()
+    service = ContentService(ctx)
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for i in range(count):
+        words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=60)
+        service.create({
+            "uuid": f"item-{i:08d}",
+            "type": "html",
+            "title": " ".join(words[:4]),
+            "html_content": "<p>" + " ".join(words[4:]) + "</p>",
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.approve(f"item-{i:08d}", admin)
+    return ctx, service, time.perf_counter() - start
+
+
+def scan(ctx, query, limit):
+    """Match by re-reading every published revision."""
+    terms = set(tokenize(query))
+    found = []
+    for item in ctx.contents.values():
+        position = ctx.revision_position(item, item.get("published_revision"))
+        if position is None:
+            continue
+        attrs = attributes_at(item["revisions"], position)
+        words = set(tokenize(attrs.get("title", "") + " " + strip_tags(attrs.get("html_content", ""))))
+        if terms <= words:
+            found.append(item["uuid"])
+    return found[:limit]
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    count = 100000
+    ctx, service, elapsed = populate(count)
+    print(f"{count} items stored and indexed in {elapsed:.1f}s")
+    print(f"{'query':<16}{'matches':>9}{'cold ms':>10}{'warm ms':>10}{'scan ms':>10}")
+    postings = ctx.search_index._public
+    for query in ("word1", "word2 word3", "word40", "word1 word4000"):
+        matches = len(postings.scores(tokenize(query)))
+
+        def cold():
+            postings._ranked.clear()
+            service.search(query, False, 20)
+
+        unranked = best(cold, 5)
+        ranked = best(lambda: service.search(query, False, 20), 20)
+        scanned = best(lambda: scan(ctx, query, 20), 1)
+        print(f"{query:<16}{matches:>9}{unranked:>10.2f}{ranked:>10.2f}{scanned:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare ``Content.to_dict`` against the former ``dataclasses.asdict`` version.
+
+Run with ``python benchmarks/bench_serialize.py``.  Items carry revision
+histories of increasing length; for each, the table shows the time to build
+the dict and the time to produce JSON: via ``asdict`` and ``json.dumps``,
+via ``to_dict`` and ``json.dumps``, and by handing the model straight to the
+encoder with ``json_default``.
+"""
+import json
+import os
+import sys
+import timeit
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import sample_content, seed_users
+from cms.models import Revision, json_default
+
+
+def legacy_to_dict(item):
+    """Reproduce the former ``Content.to_dict``."""
+    data = asdict(item)
+    data["type"] = item.type.value
+    data["review_requested"] = item.review_requested
+    return data
+
+
+def make_item(revisions):
+    item = sample_content(seed_users())
+    html = "<p>" + "Paragraph of the page body. " * 40 + "</p>"
+    item.revisions = [
+        Revision(
+            uuid=f"rev-{i:06d}",
+            last_updated="2025-06-08T12:00:00",
+            attributes={"title": f"Revision {i}", "html_content": html},
+        )
+        for i in range(revisions)
+    ]
+    return item
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e3
+
+
+def main():
+    print(f"{'revisions':>10}{'asdict':>10}{'to_dict':>10}{'speedup':>9}"
+          f"{'asdict+json':>13}{'to_dict+json':>14}{'encoder':>10}  (ms)")
+    for revisions in (1, 100, 1000, 10000):
+        item = make_item(revisions)
+        assert item.to_dict() == legacy_to_dict(item)
+        assert json.loads(json.dumps(item, default=json_default)) == legacy_to_dict(item)
+        number = max(1, 2000 // revisions)
+        legacy = best(lambda: legacy_to_dict(item), number)
+        fast = best(item.to_dict, number)
+        legacy_json = best(lambda: json.dumps(legacy_to_dict(item)), number)
+        fast_json = best(lambda: json.dumps(item.to_dict()), number)
+        direct = best(lambda: json.dumps(item, default=json_default), number)
+        print(f"{revisions:>10}{legacy:>10.3f}{fast:>10.3f}{legacy / fast:>8.1f}x"
+              f"{legacy_json:>13.3f}{fast_json:>14.3f}{direct:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,137 @@
+import itertools
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
-from urllib.parse import urlparse, unquote
+import os
+import selectors
+import socket
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from queue import SimpleQueue
+from threading import BoundedSemaphore, Thread
+from urllib.parse import parse_qs
 
 from .types import ContentType
 from .workflow import check_required_metadata
 from .db_context import DbContext
+from .events import parse_bound
+from .models import json_default
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, page_params
+from .projection import view_params
+from .routing import Router, split_target
+from .schema import check_required_attributes
 from .services import CategoryService, ContentService, TokenService
 
 
+# Seconds an idle persistent connection is kept open between requests.
+DEFAULT_IDLE_TIMEOUT = 15.0
+# Bytes of encoded JSON gathered before a chunk of a streamed listing is sent.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Stored records (see cms.models) become plain JSON objects here, at the
+# HTTP boundary.
+_json_encoder = json.JSONEncoder(default=json_default)
+
+
+class _BadRequest(Exception):
+    """A request body the handlers cannot use; answered with ``400``."""
+
+
+def _json_array(elements):
+    """Join encoded JSON ``elements`` the way ``json.dumps`` joins a list."""
+    return b"[" + b", ".join(elements) + b"]"
+
+
+def _page_body(elements, next_cursor):
+    """Encode one page as ``{"items": [...], "next_cursor": ...}``."""
+    return b'{"items": %s, "next_cursor": %s}' % (_json_array(elements), _json_encoder.encode(next_cursor).encode())
+
+
+# Content codings the server can produce, in order of preference, with the
+# zlib window bits selecting the container format.
+COMPRESSION_WBITS = {"gzip": 31, "deflate": 15}
+
+
+def _negotiate_encoding(header):
+    """Pick a content coding from an ``Accept-Encoding`` header, or ``None``."""
+    if not header:
+        return None
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in COMPRESSION_WBITS:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def _compress(body, encoding, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, COMPRESSION_WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def _array_chunks(elements):
+    """Yield the JSON array of encoded ``elements`` in pieces.
+
+    Every piece but the last holds at least ``STREAM_CHUNK_SIZE`` bytes.
+    """
+    buffer = bytearray(b"[")
+    separator = b""
+    for element in elements:
+        buffer += separator
+        buffer += element
+        separator = b", "
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def _compressed_chunks(chunks, encoding, level):
+    """Compress ``chunks`` as one stream in content coding ``encoding``.
+
+    The compressor is flushed after every chunk so each one can be
+    decompressed as soon as it arrives.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, COMPRESSION_WBITS[encoding])
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _collect(chunks, into):
+    """Yield ``chunks``, appending each to the list ``into`` on the way."""
+    for chunk in chunks:
+        into.append(chunk)
+        yield chunk
+
+
+def _variant_etag(etag, encoding):
+    """Return the tag of ``etag``'s representation in ``encoding``."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def _etag_matches(header, etag):
+    """Return True if an ``If-None-Match`` header value matches ``etag``."""
+    if not header:
+        return False
+    # Any encoding of the current version is still a valid cached copy.
+    variants = {_variant_etag(etag, encoding) for encoding in (None, *COMPRESSION_WBITS)}
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") in variants:
+            return True
+    return False
+
+
 class SimpleCRUDHandler(BaseHTTPRequestHandler):
     """Serve a very small CRUD API for content items.
 
@@ -28,6 +151,23 @@ class SimpleCRUDHandler(BaseHTTPRequestHandler):
 
     valid_types = {ct.value for ct in ContentType}
 
+    # Keep connections open between requests (HTTP/1.1) and drop them after
+    # ``timeout`` idle seconds so parked clients do not pin a worker forever.
+    protocol_version = "HTTP/1.1"
+    timeout = DEFAULT_IDLE_TIMEOUT
+    # Headers and body are written separately; without TCP_NODELAY the body
+    # waits for the client's delayed ACK on every reused connection.
+    disable_nagle_algorithm = True
+    _body = None
+    # ETag sent with the current request's successful response, if any.
+    _etag = None
+
+    # Responses of at least ``compress_min_size`` bytes are compressed with
+    # ``compress_level`` when the client accepts gzip or deflate; a size of
+    # ``None`` turns compression off.
+    compress_min_size = 1024
+    compress_level = 6
+
     def _sorted_categories(self):
         return self.category_service.list_categories()
 
@@ -48,153 +188,462 @@ class SimpleCRUDHandler(BaseHTTPRequestHandler):
         token = auth.split(" ", 1)[1]
         return self.token_service.validate_token(token)
 
+    def parse_request(self):
+        self._body = None
+        self._etag = None
+        return super().parse_request()
+
+    def _not_modified(self, version):
+        """Answer ``304`` if the client already holds ``version``.
+
+        Otherwise the version is sent as the ``ETag`` of the ``200`` response
+        and ``False`` is returned, so callers check this before building any
+        body.
+        """
+        etag = f'"{version}"'
+        if not _etag_matches(self.headers.get("If-None-Match"), etag):
+            self._etag = etag
+            return False
+        self._read_body()
+        self.send_response(304)
+        self.send_header("ETag", _variant_etag(etag, self._response_encoding()))
+        self.end_headers()
+        return True
+
+    def _send_etag(self, status, encoding=None):
+        if self._etag is not None and status == 200:
+            self.send_header("ETag", _variant_etag(self._etag, encoding))
+
+    def _response_encoding(self):
+        """Return the content coding to use for this response, if any."""
+        if self.compress_min_size is None:
+            return None
+        return _negotiate_encoding(self.headers.get("Accept-Encoding"))
+
+    def _compressed(self, body):
+        """Return ``(body, encoding)``, compressed when worthwhile."""
+        encoding = self._response_encoding()
+        if encoding is None or len(body) < self.compress_min_size:
+            return body, None
+        return _compress(body, encoding, self.compress_level), encoding
+
+    def _read_body(self):
+        """Return the raw request body, reading it from the socket only once."""
+        if self._body is None:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                # Where the body ends is unknown, so the error response is
+                # the last one on this connection.
+                self._body = b""
+                self.close_connection = True
+                raise _BadRequest("invalid Content-Length")
+            self._body = self.rfile.read(length) if length > 0 else b""
+        return self._body
+
+    def _read_json(self):
+        """Return the request body as a JSON object, or raise ``_BadRequest``."""
+        try:
+            data = json.loads(self._read_body())
+        except ValueError:
+            raise _BadRequest("invalid JSON body")
+        if not isinstance(data, dict):
+            raise _BadRequest("JSON body must be an object")
+        return data
+
     def _send_json(self, data, status=200):
-        response = json.dumps(data).encode()
+        self._send_body(_json_encoder.encode(data).encode(), status)
+
+    def _send_body(self, body, status=200):
+        """Send the JSON ``body``, compressed when the client allows it."""
+        body, encoding = self._compressed(body)
+        self._send_encoded(body, status, encoding)
+
+    def _send_encoded(self, body, status=200, encoding=None):
+        """Send an already encoded JSON ``body`` in content coding ``encoding``."""
+        # Consume any body the route did not read (e.g. on auth failures) so
+        # the next request on a persistent connection starts at a clean offset.
+        self._read_body()
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(response)))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_etag(status, encoding)
         self.end_headers()
-        self.wfile.write(response)
-
-    def do_GET(self):
-        parsed = urlparse(self.path)
-        if parsed.path == "/categories":
-            cats = self._sorted_categories()
-            self._send_json(cats)
-            return
-        if parsed.path.startswith("/categories/"):
-            cat_uuid = parsed.path.split("/")[-1]
-            cat = self.category_service.get_category(cat_uuid)
-            if cat is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(cat)
+        self.wfile.write(body)
+
+    # Route handlers --------------------------------------------------
+    def _list_categories(self):
+        if self._not_modified(self.category_service.version()):
             return
-        if parsed.path == "/content-types":
-            self._send_json(sorted(self.valid_types))
+        cats = self._sorted_categories()
+        self._send_json(cats)
+
+    def _get_category(self, uuid):
+        cat = self.category_service.get_category(uuid)
+        if cat is None:
+            self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(cat)
+
+    def _list_category_content(self, uuid):
+        """Send one page of the items filed under category ``uuid``."""
+        authenticated = self._authenticate()
+        try:
+            limit, after = page_params(self.query) or (DEFAULT_PAGE_SIZE, None)
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
             return
-        if parsed.path.startswith("/content-types/"):
-            # decode any percent-encoding to allow client requests that
-            # properly escape spaces in content type values
-            item_type = unquote(parsed.path.split("/")[-1])
-            if item_type not in self.valid_types:
-                self._send_json({"error": "invalid type"}, status=400)
-                return
-            authenticated = self._authenticate()
-            items = self.content_service.list_by_type(item_type, authenticated)
-            self._send_json(items)
+        # The version is shared by every category, so a missing category is
+        # answered before the ETag is compared.
+        category = self.category_service.get_category(uuid)
+        if category is None or category.get("archived"):
+            self._send_json({"error": "not found"}, status=404)
             return
-        if parsed.path == "/pending-approvals":
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            pending = self.content_service.pending_approvals()
-            self._send_json(pending)
+        audience = "a" if authenticated else "p"
+        version = f"{self.content_service.version()}-{self.category_service.version()}-{audience}"
+        if self._not_modified(version):
             return
-        if parsed.path == "/content":
-            authenticated = self._authenticate()
-            items = self.content_service.list_all(authenticated)
-            self._send_json(items)
+        page = self.content_service.page_category_encoded(uuid, authenticated, limit, after, view)
+        if page is None:
+            self._send_json({"error": "not found"}, status=404)
             return
-        if parsed.path.startswith("/content/"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            uuid_str = parsed.path.split("/")[-1]
-            item = self.content_service.get(uuid_str)
-            if item is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(item)
+        items, next_key = page
+        next_cursor = encode_cursor(next_key) if next_key is not None else None
+        self._send_body(_page_body(items, next_cursor))
+
+    def _create_category(self):
+        data = self._read_json()
+        category = self.category_service.create_category(data)
+        self._send_json(category, status=201)
+
+    def _update_category(self, uuid):
+        incoming = self._read_json()
+        updated = self.category_service.update_category(uuid, incoming)
+        if updated is None:
+            self._send_json({"error": "not found"}, status=404)
         else:
+            self._send_json(updated)
+
+    def _archive_category(self, uuid):
+        cat = self.category_service.archive_category(uuid)
+        if cat is None:
             self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(cat)
 
-    def do_POST(self):
-        if self.path == "/test-token":
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            data = json.loads(body)
-            username = data.get("username")
-            if not username:
-                self._send_json({"error": "username required"}, status=400)
-                return
-            token = self.token_service.create_token(username)
-            self._send_json({"token": token})
-            return
-        parsed = urlparse(self.path)
-        if parsed.path == "/check-metadata":
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            item = json.loads(body)
-            try:
-                check_required_metadata(item)
-            except KeyError as exc:
-                self._send_json({"error": str(exc)}, status=400)
-            else:
-                self._send_json({"ok": True})
-            return
-        if parsed.path == "/categories":
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            data = json.loads(body)
-            category = self.category_service.create_category(data)
-            self._send_json(category, status=201)
-            return
-        if parsed.path.startswith("/content/") and parsed.path.endswith("/request-approval"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            uuid_part = parsed.path.split("/")[2]
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            data = json.loads(body)
-            item = self.content_service.request_approval(uuid_part, data)
-            if item is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(item)
+    def _list_content_types(self):
+        self._send_json(sorted(self.valid_types))
+
+    def _send_chunked(self, chunks, status=200, encoding=None):
+        """Send the body ``chunks``, already in content coding ``encoding``."""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Transfer-Encoding", "chunked")
+        self._send_etag(status, encoding)
+        self.end_headers()
+        for data in chunks:
+            if data:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_array_stream(self, elements, status=200, keep_compressed=False):
+        """Send the encoded JSON ``elements`` as one array.
+
+        The body uses chunked transfer encoding, so the headers and the first
+        elements go out before the rest of the listing has been produced and
+        only about ``STREAM_CHUNK_SIZE`` bytes are buffered at once.  Arrays
+        shorter than one chunk, and any array for a client speaking HTTP/1.0,
+        are sent as an ordinary response, compressed only from
+        ``compress_min_size`` bytes like other bodies.
+
+        With ``keep_compressed`` a compressed body is returned so callers can
+        send it again: the bytes of an ordinary response or the tuple of
+        chunks of a streamed one.  Otherwise, or when the body was not
+        compressed, ``None`` is returned.
+        """
+        self._read_body()
+        chunks = _array_chunks(elements)
+        first = next(chunks)
+        if len(first) < STREAM_CHUNK_SIZE or self.request_version != "HTTP/1.1":
+            body, encoding = self._compressed(first + b"".join(chunks))
+            self._send_encoded(body, status, encoding)
+            return body if keep_compressed and encoding is not None else None
+        chunks = itertools.chain((first,), chunks)
+        encoding = self._response_encoding()
+        if encoding is None:
+            self._send_chunked(chunks, status)
+            return None
+        chunks = _compressed_chunks(chunks, encoding, self.compress_level)
+        if not keep_compressed:
+            self._send_chunked(chunks, status, encoding)
+            return None
+        sent = []
+        self._send_chunked(_collect(chunks, sent), status, encoding)
+        return tuple(sent)
+
+    def _send_listing(self, item_type, authenticated):
+        """Send a content listing, paginated when ``limit``/``cursor`` is given.
+
+        ``fields`` and ``revisions`` narrow each listed item.
+        """
+        try:
+            paging = page_params(self.query)
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
             return
-        if parsed.path.startswith("/content/") and parsed.path.endswith("/approve"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            uuid_part = parsed.path.split("/")[2]
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            data = json.loads(body)
-            item = self.content_service.approve(uuid_part, data)
-            if item is None:
-                self._send_json({"error": "not found"}, status=404)
+        # Drafts are only listed for authenticated clients, so the two
+        # audiences get different tags for the same URL.
+        audience = "a" if authenticated else "p"
+        if self._not_modified(f"{self.content_service.version(item_type=item_type)}-{audience}"):
+            return
+        cache = None if authenticated else self.context.published_cache
+        if cache is None:
+            if paging is None:
+                self._send_array_stream(self.content_service.stream_encoded(item_type, authenticated, view=view))
             else:
-                self._send_json(item)
+                self._send_body(self._listing_page(item_type, authenticated, paging, view))
             return
-        if parsed.path.startswith("/content/") and parsed.path.endswith("/start-draft"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
+        # Anonymous listings only show published items, so what is sent is
+        # shared until a published item of this type changes.
+        generation = cache.generation(item_type)
+        if paging is None:
+            # Whole listings keep the encoded items, the same bytes
+            # rendered_items holds, and stream them rather than joining a
+            # copy of the listing into one body.  Its compressed form, a
+            # body or the chunks of a streamed one, is kept per coding too.
+            encoding = self._response_encoding() if self.request_version == "HTTP/1.1" else None
+            if encoding is not None:
+                compressed = cache.get(item_type, (None, view, encoding))
+                if isinstance(compressed, bytes):
+                    self._send_encoded(compressed, encoding=encoding)
+                    return
+                if compressed is not None:
+                    self._read_body()
+                    self._send_chunked(compressed, encoding=encoding)
+                    return
+            elements = cache.get(item_type, (None, view))
+            if elements is None:
+                elements = tuple(self.content_service.stream_encoded(item_type, authenticated, view=view))
+                cache.put(item_type, (None, view), generation, elements)
+            compressed = self._send_array_stream(elements, keep_compressed=encoding is not None)
+            if compressed is not None:
+                cache.put(item_type, (None, view, encoding), generation, compressed)
+            return
+        # Pages are bounded, so their body and its compressed form are kept.
+        encoding = self._response_encoding()
+        if encoding is not None:
+            body = cache.get(item_type, (paging, view, encoding))
+            if body is not None:
+                self._send_encoded(body, encoding=encoding)
                 return
-            uuid_part = parsed.path.split("/")[2]
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            data = json.loads(body)
-            try:
-                item = self.content_service.start_draft(uuid_part, data)
-            except PermissionError as exc:
-                self._send_json({"error": str(exc)}, status=403)
+        body = cache.get(item_type, (paging, view, None))
+        if body is None:
+            body = self._listing_page(item_type, authenticated, paging, view)
+            cache.put(item_type, (paging, view, None), generation, body)
+        body, encoding = self._compressed(body)
+        if encoding is not None:
+            cache.put(item_type, (paging, view, encoding), generation, body)
+        self._send_encoded(body, encoding=encoding)
+
+    def _listing_page(self, item_type, authenticated, paging, view):
+        """Return the encoded ``{"items": [...], "next_cursor": ...}`` page."""
+        limit, after = paging
+        items, next_key = self.content_service.page_encoded(item_type, authenticated, limit, after, view)
+        next_cursor = encode_cursor(next_key) if next_key is not None else None
+        return _page_body(items, next_cursor)
+
+    def _list_content_by_type(self, type):
+        if type not in self.valid_types:
+            self._send_json({"error": "invalid type"}, status=400)
+            return
+        authenticated = self._authenticate()
+        self._send_listing(type, authenticated)
+
+    def _list_pending_approvals(self):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        try:
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        self._send_body(_json_array(self.content_service.pending_approvals_encoded(view)))
+
+    def _list_content(self):
+        authenticated = self._authenticate()
+        self._send_listing(None, authenticated)
+
+    def _list_events(self):
+        """Send the published events overlapping ``from``..``to``, earliest first."""
+        bounds = []
+        for name in ("from", "to"):
+            value = self.query.get(name, [""])[0]
+            bound = parse_bound(value, upper=name == "to") if value else None
+            if value and bound is None:
+                self._send_json({"error": f"{name} must be an ISO 8601 date or time"}, status=400)
                 return
-            if item is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(item)
+            bounds.append(bound)
+        start, end = bounds
+        if start is not None and end is not None and start > end:
+            self._send_json({"error": "from must not be after to"}, status=400)
+            return
+        try:
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        if self._not_modified(self.content_service.version(item_type=ContentType.EVENT_SCHEDULE.value)):
+            return
+        self._send_body(_json_array(self.content_service.events_encoded(start, end, view)))
+
+    def _lookup_offices(self):
+        """Send published office addresses by postal code prefix, phone or email."""
+        criteria = {
+            name: self.query[name][0]
+            for name in ("postal_code", "phone", "email")
+            if self.query.get(name, [""])[0]
+        }
+        if not criteria:
+            self._send_json({"error": "postal_code, phone or email is required"}, status=400)
+            return
+        try:
+            limit, after = page_params(self.query) or (DEFAULT_PAGE_SIZE, None)
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        if self._not_modified(self.content_service.version(item_type=ContentType.OFFICE_ADDRESS.value)):
+            return
+        items, next_key = self.content_service.lookup_offices_encoded(criteria, limit, after, view)
+        next_cursor = encode_cursor(next_key) if next_key is not None else None
+        self._send_body(_page_body(items, next_cursor))
+
+    def _search(self):
+        """Send the items matching ``q``, best first, one page at a time."""
+        authenticated = self._authenticate()
+        query = self.query.get("q", [""])[0]
+        if not query.strip():
+            self._send_json({"error": "q is required"}, status=400)
+            return
+        try:
+            limit, after = page_params(self.query) or (DEFAULT_PAGE_SIZE, None)
+            view = view_params(self.query)
+            if after is not None:
+                # cursors carry the score as a string
+                try:
+                    after = (-float(after[0]), after[1])
+                except ValueError:
+                    raise ValueError("invalid cursor")
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
             return
-        if parsed.path != "/content":
+        audience = "a" if authenticated else "p"
+        if self._not_modified(f"{self.content_service.version()}-{audience}"):
+            return
+        items, next_key = self.content_service.search_encoded(query, authenticated, limit, after, view)
+        next_cursor = None
+        if next_key is not None:
+            next_cursor = encode_cursor((repr(-next_key[0]), next_key[1]))
+        self._send_body(_page_body(items, next_cursor))
+
+    def _get_content(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        try:
+            view = view_params(self.query)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        if uuid in self.store and self._not_modified(self.content_service.version(uuid)):
+            return
+        item = self.content_service.get(uuid, view)
+        if item is None:
+            self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(item)
+
+    def _get_revision(self, uuid, revision_uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        revision = self.content_service.get_revision(uuid, revision_uuid)
+        if revision is None:
+            self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(revision)
+
+    def _create_token(self):
+        data = self._read_json()
+        username = data.get("username")
+        if not username:
+            self._send_json({"error": "username required"}, status=400)
+            return
+        token = self.token_service.create_token(username)
+        self._send_json({"token": token})
+
+    def _check_metadata(self):
+        item = self._read_json()
+        try:
+            check_required_metadata(item)
+        except KeyError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+        else:
+            self._send_json({"ok": True})
+
+    def _request_approval(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        data = self._read_json()
+        item = self.content_service.request_approval(uuid, data)
+        if item is None:
             self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(item)
+
+    def _approve(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
             return
+        data = self._read_json()
+        item = self.content_service.approve(uuid, data)
+        if item is None:
+            self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(item)
+
+    def _start_draft(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
+            return
+        data = self._read_json()
+        try:
+            item = self.content_service.start_draft(uuid, data)
+        except PermissionError as exc:
+            self._send_json({"error": str(exc)}, status=403)
+            return
+        if item is None:
+            self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(item)
+
+    def _create_content(self):
         if not self._authenticate():
             self._send_json({"error": "unauthorized"}, status=401)
             return
-        length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(length)
-        item = json.loads(body)
+        item = self._read_json()
         item_type = item.get("type")
         if item_type not in self.valid_types:
             self._send_json({"error": "invalid type"}, status=400)
@@ -209,93 +658,316 @@ class SimpleCRUDHandler(BaseHTTPRequestHandler):
         # validate required metadata on creation
         try:
             check_required_metadata(item)
+            check_required_attributes(item)
         except KeyError as exc:
             self._send_json({"error": str(exc)}, status=400)
             return
 
-        created = self.content_service.create(item)
+        try:
+            created = self.content_service.create(item)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
         self._send_json(created, status=201)
 
-    def do_PUT(self):
-        parsed = urlparse(self.path)
-        if parsed.path.startswith("/categories/"):
-            cat_uuid = parsed.path.split("/")[-1]
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            incoming = json.loads(body)
-            updated = self.category_service.update_category(cat_uuid, incoming)
-            if updated is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(updated)
+    def _update_content(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
             return
-        if parsed.path.startswith("/content/"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            uuid = parsed.path.split("/")[-1]
-            if uuid not in self.store:
-                self._send_json({"error": "not found"}, status=404)
-                return
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length)
-            incoming = json.loads(body)
-
-            if not self._valid_flat_category_list(incoming.get("categories")):
-                self._send_json(
-                    {"error": "categories must be a flat list of strings"}, status=400
-                )
-                return
+        if uuid not in self.store:
+            self._send_json({"error": "not found"}, status=404)
+            return
+        incoming = self._read_json()
 
-            try:
-                updated = self.content_service.update(uuid, incoming)
-            except ValueError as exc:
-                self._send_json({"error": str(exc)}, status=400)
-                return
+        if not self._valid_flat_category_list(incoming.get("categories")):
+            self._send_json(
+                {"error": "categories must be a flat list of strings"}, status=400
+            )
+            return
 
-            if updated is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(updated)
-        else:
+        try:
+            updated = self.content_service.update(uuid, incoming)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+
+        if updated is None:
             self._send_json({"error": "not found"}, status=404)
+        else:
+            self._send_json(updated)
 
-    def do_DELETE(self):
-        parsed = urlparse(self.path)
-        if parsed.path.startswith("/categories/"):
-            cat_uuid = parsed.path.split("/")[-1]
-            cat = self.category_service.archive_category(cat_uuid)
-            if cat is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(cat)
+    def _archive_content(self, uuid):
+        if not self._authenticate():
+            self._send_json({"error": "unauthorized"}, status=401)
             return
-        if parsed.path.startswith("/content/"):
-            if not self._authenticate():
-                self._send_json({"error": "unauthorized"}, status=401)
-                return
-            uuid = parsed.path.split("/")[-1]
-            item = self.content_service.archive(uuid)
-            if item is None:
-                self._send_json({"error": "not found"}, status=404)
-            else:
-                self._send_json(item)
+        item = self.content_service.archive(uuid)
+        if item is None:
+            self._send_json({"error": "not found"}, status=404)
         else:
+            self._send_json(item)
+
+    # Dispatch ---------------------------------------------------------
+    # (method, pattern, route name, handler method)
+    routes = Router([
+        ("GET", "/categories", "categories.list", "_list_categories"),
+        ("POST", "/categories", "categories.create", "_create_category"),
+        ("GET", "/categories/<uuid>", "categories.get", "_get_category"),
+        ("GET", "/categories/<uuid>/content", "categories.content", "_list_category_content"),
+        ("PUT", "/categories/<uuid>", "categories.update", "_update_category"),
+        ("DELETE", "/categories/<uuid>", "categories.archive", "_archive_category"),
+        ("GET", "/content-types", "content_types.list", "_list_content_types"),
+        ("GET", "/content-types/<type>", "content_types.items", "_list_content_by_type"),
+        ("GET", "/pending-approvals", "content.pending", "_list_pending_approvals"),
+        ("GET", "/content", "content.list", "_list_content"),
+        ("GET", "/search", "content.search", "_search"),
+        ("GET", "/events", "content.events", "_list_events"),
+        ("GET", "/offices", "content.offices", "_lookup_offices"),
+        ("POST", "/content", "content.create", "_create_content"),
+        ("GET", "/content/<uuid>", "content.get", "_get_content"),
+        ("PUT", "/content/<uuid>", "content.update", "_update_content"),
+        ("DELETE", "/content/<uuid>", "content.archive", "_archive_content"),
+        ("GET", "/content/<uuid>/revisions/<uuid:revision_uuid>", "content.revision", "_get_revision"),
+        ("POST", "/content/<uuid>/request-approval", "content.request_approval", "_request_approval"),
+        ("POST", "/content/<uuid>/approve", "content.approve", "_approve"),
+        ("POST", "/content/<uuid>/start-draft", "content.start_draft", "_start_draft"),
+        ("POST", "/check-metadata", "check_metadata", "_check_metadata"),
+        ("POST", "/test-token", "test_token", "_create_token"),
+    ])
+
+    # Name of the route that served the current request, for logs and metrics.
+    route_name = None
+    # Parsed query string of the current request.
+    query = {}
+
+    def _dispatch(self):
+        path, query = split_target(self.path)
+        self.query = parse_qs(query)
+        match = self.routes.match(self.command, path)
+        if match is None:
+            self.route_name = "not_found"
             self._send_json({"error": "not found"}, status=404)
+            return
+        route, params = match
+        self.route_name = route.name
+        try:
+            getattr(self, route.handler)(**params)
+        except _BadRequest as exc:
+            # Raised while reading the request, before any response is sent.
+            self._send_json({"error": str(exc)}, status=400)
 
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
 
-def start_test_server(port=0):
-    """Start the CRUD HTTP server on a background thread."""
-    context = DbContext()
-    SimpleCRUDHandler.context = context
-    SimpleCRUDHandler.content_service = ContentService(context)
-    SimpleCRUDHandler.category_service = CategoryService(context)
-    SimpleCRUDHandler.token_service = TokenService(context)
+
+def configure_handler(handler_class, context):
+    """Attach ``context`` and the services built on it to ``handler_class``."""
+    handler_class.context = context
+    handler_class.content_service = ContentService(context)
+    handler_class.category_service = CategoryService(context)
+    handler_class.token_service = TokenService(context)
     # expose raw stores for backward compatibility
-    SimpleCRUDHandler.store = context.contents
-    SimpleCRUDHandler.categories = context.categories
-    SimpleCRUDHandler.tokens = context.tokens
-    server = HTTPServer(("localhost", port), SimpleCRUDHandler)
+    handler_class.store = context.contents
+    handler_class.categories = context.categories
+    handler_class.tokens = context.tokens
+
+
+# Worker pool sizing for the ``"pooled"`` concurrency mode.  The defaults
+# mirror ``concurrent.futures.ThreadPoolExecutor``.
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+DEFAULT_MAX_IN_FLIGHT = DEFAULT_MAX_WORKERS * 4
+
+CONCURRENCY_MODES = ("serial", "threaded", "pooled")
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that hands requests to a fixed pool of worker threads.
+
+    At most ``max_in_flight`` connections are held at once, counting the ones
+    being served, the ones queued for a free worker and the idle persistent
+    ones.  Once the limit is reached the accept loop stops until a slot frees
+    up, so further clients wait in the listen backlog instead of piling up in
+    memory.
+
+    A worker holds a connection only while it handles one request.  Between
+    requests the connection is parked on a selector, which queues it again
+    when the client sends more data and closes it after the handler's
+    ``timeout`` idle seconds, so idle clients never keep a worker busy.
+    """
+
+    # Seconds between checks for shutdown() while waiting for a free slot.
+    slot_poll_interval = 0.5
+
+    def __init__(self, server_address, handler_class, max_workers=None, max_in_flight=None):
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.max_in_flight = max(max_in_flight or DEFAULT_MAX_IN_FLIGHT, self.max_workers)
+        self.request_queue_size = self.max_in_flight
+        self._slots = BoundedSemaphore(self.max_in_flight)
+        self._jobs = SimpleQueue()
+        self._closing = False
+        # Connections handed back by the workers, picked up by the watcher.
+        self._parking = SimpleQueue()
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self._workers = [
+            Thread(target=self._work, daemon=True) for _ in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._watcher = Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def process_request(self, request, client_address):
+        while not self._slots.acquire(timeout=self.slot_poll_interval):
+            if self._closing:
+                self.shutdown_request(request)
+                return
+        # The handler is set up once per connection and kept between
+        # requests, together with any bytes its reader has buffered.
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = request
+        handler.client_address = client_address
+        handler.server = self
+        try:
+            handler.setup()
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            self._slots.release()
+            return
+        self._jobs.put(handler)
+
+    def _work(self):
+        while True:
+            handler = self._jobs.get()
+            if handler is None:
+                return
+            try:
+                handler.close_connection = True
+                handler.handle_one_request()
+                if not (handler.close_connection or self._closing):
+                    if self._buffered(handler):
+                        # A pipelined request already waits in the reader.
+                        self._jobs.put(handler)
+                    else:
+                        self._parking.put(handler)
+                        self._waker.send(b"\0")
+                    continue
+            except Exception:
+                self.handle_error(handler.request, handler.client_address)
+            self._close(handler)
+
+    @staticmethod
+    def _buffered(handler):
+        """Return True if the handler's reader holds unread request bytes."""
+        handler.connection.settimeout(0)
+        try:
+            return bool(handler.rfile.peek(1))
+        finally:
+            handler.connection.settimeout(handler.timeout)
+
+    def _close(self, handler):
+        try:
+            handler.finish()
+        finally:
+            self.shutdown_request(handler.request)
+            self._slots.release()
+
+    def _watch(self):
+        # Parked handlers in the order they went idle, which is also the
+        # order their idle timeouts expire in.
+        parked = {}
+        stopping = False
+        while not stopping:
+            timeout = None
+            if parked:
+                first = parked[next(iter(parked))]
+                timeout = max(0.0, first - time.monotonic())
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup:
+                    try:
+                        while self._wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    while not self._parking.empty():
+                        handler = self._parking.get()
+                        if handler is None:
+                            stopping = True
+                            continue
+                        parked[handler] = time.monotonic() + handler.timeout
+                        self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                    continue
+                handler = key.data
+                self._selector.unregister(handler.connection)
+                del parked[handler]
+                self._jobs.put(handler)
+            now = time.monotonic()
+            for handler, deadline in list(parked.items()):
+                if deadline > now and not stopping:
+                    break
+                self._selector.unregister(handler.connection)
+                del parked[handler]
+                self._close(handler)
+        self._selector.close()
+        self._wakeup.close()
+
+    def shutdown(self):
+        self._closing = True
+        super().shutdown()
+
+    def server_close(self):
+        self._closing = True
+        super().server_close()
+        for _ in self._workers:
+            self._jobs.put(None)
+        self._parking.put(None)
+        self._waker.send(b"\0")
+        self._watcher.join()
+        self._waker.close()
+
+
+class _DaemonThreadingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def _make_server(address, handler_class, concurrency, max_workers, max_in_flight):
+    if concurrency == "serial":
+        return HTTPServer(address, handler_class)
+    if concurrency == "threaded":
+        return _DaemonThreadingHTTPServer(address, handler_class)
+    if concurrency == "pooled":
+        return PooledHTTPServer(address, handler_class, max_workers, max_in_flight)
+    raise ValueError(f"unknown concurrency mode: {concurrency!r}")
+
+
+def start_test_server(
+    port=0,
+    concurrency="pooled",
+    max_workers=None,
+    max_in_flight=None,
+    idle_timeout=DEFAULT_IDLE_TIMEOUT,
+    context=None,
+):
+    """Start the CRUD HTTP server on a background thread.
+
+    ``concurrency`` selects how requests are served: ``"serial"`` handles one
+    connection at a time, ``"threaded"`` spawns a thread per connection and
+    ``"pooled"`` (the default) uses a :class:`PooledHTTPServer` with
+    ``max_workers`` threads and at most ``max_in_flight`` accepted
+    connections.  Connections are persistent (HTTP/1.1) and are closed after
+    ``idle_timeout`` seconds without a request; with a worker pool an idle
+    connection waits on a selector and does not hold a worker.
+
+    ``context`` selects the storage backend; by default a fresh in-memory
+    :class:`~cms.db_context.DbContext` is used.
+    """
+    configure_handler(SimpleCRUDHandler, context if context is not None else DbContext())
+    SimpleCRUDHandler.timeout = idle_timeout
+    server = _make_server(
+        ("localhost", port), SimpleCRUDHandler, concurrency, max_workers, max_in_flight
+    )
     thread = Thread(target=server.serve_forever, daemon=True)
     thread.start()
     return server, thread
@@ -0,0 +1,213 @@
+import asyncio
+import io
+import logging
+from http.client import HTTPException, parse_headers
+from threading import Event, Thread
+
+from .api import SimpleCRUDHandler, configure_handler
+from .db_context import DbContext
+
+logger = logging.getLogger(__name__)
+
+# Seconds an idle keep-alive connection is kept open between requests.
+DEFAULT_IDLE_TIMEOUT = 60.0
+# Largest request head (request line plus headers) accepted, in bytes.
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class _LoopWriter:
+    """``wfile`` that passes a worker thread's writes to the event loop.
+
+    Every write waits until the transport has drained, so a streamed
+    listing goes out as it is produced and a slow client holds back the
+    handler rather than filling memory.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+        # Bytes handed to the transport so far.
+        self.written = 0
+
+    async def _write(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data):
+        if self._writer.is_closing():
+            raise ConnectionResetError("connection closed")
+        asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        self.written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class _BufferedHandler(SimpleCRUDHandler):
+    """Run :class:`SimpleCRUDHandler` routing for a request already read.
+
+    The asyncio server parses requests itself and only borrows the handler's
+    ``do_*`` methods, so the socket-reading setup performed by
+    ``BaseRequestHandler.__init__`` is skipped entirely.  The body is read
+    from a buffer and the response is written to ``wfile``, a
+    :class:`_LoopWriter` for the connection.
+    """
+
+    def __init__(self, command, path, version, headers, body, client_address, wfile):
+        self.command = command
+        self.path = path
+        self.request_version = version
+        self.requestline = f"{command} {path} {version}"
+        self.headers = headers
+        self.client_address = client_address
+        self.rfile = io.BytesIO(body)
+        self.wfile = wfile
+        self.close_connection = False
+
+    def run(self):
+        """Dispatch the request, writing the response to ``wfile``.
+
+        Runs on a worker thread, off the event loop.
+        """
+        method = getattr(self, "do_" + self.command, None)
+        try:
+            if method is None:
+                self.send_error(501, f"Unsupported method ({self.command!r})")
+                return
+            try:
+                method()
+            except ConnectionError:
+                raise
+            except Exception:
+                logger.exception("error handling %s", self.requestline)
+                if self.wfile.written:
+                    # Part of the response is out; the client can only
+                    # tell it is cut short by the connection closing.
+                    self.close_connection = True
+                    return
+                self._headers_buffer = []
+                self.send_error(500)
+        except ConnectionError:
+            self.close_connection = True
+
+
+class AsyncCRUDServer:
+    """Serve the CMS API from a single asyncio event loop.
+
+    Every connection is a coroutine rather than a thread, so thousands of idle
+    keep-alive clients cost little more than their sockets.  Requests are
+    answered by the same :class:`~cms.services.ContentService`,
+    :class:`~cms.services.CategoryService` and
+    :class:`~cms.services.TokenService` calls as the threaded server, run on
+    the loop's default executor so a slow request does not stall the other
+    connections.  Responses are written to the connection as they are
+    produced.
+    """
+
+    def __init__(self, host="localhost", port=0, context=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.context = context if context is not None else DbContext()
+        self.handler_class = type("AsyncCRUDHandler", (_BufferedHandler,), {})
+        configure_handler(self.handler_class, self.context)
+        self.server_port = None
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+
+    async def _read_request(self, reader):
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+        request_line, _, header_block = head.partition(b"\r\n")
+        parts = request_line.decode("iso-8859-1").split()
+        if len(parts) != 3:
+            raise ValueError(f"bad request line {request_line!r}")
+        command, path, version = parts
+        headers = parse_headers(io.BytesIO(header_block))
+        try:
+            length = int(headers.get("Content-Length", 0))
+        except ValueError:
+            # the handler answers an unusable length with a 400
+            length = 0
+        body = b""
+        if length > 0:
+            body = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout)
+        return command, path, version, headers, body
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while True:
+                try:
+                    command, path, version, headers, body = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except (ValueError, HTTPException, asyncio.LimitOverrunError):
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    await writer.drain()
+                    break
+                handler = self.handler_class(
+                    command, path, version, headers, body, peer[:2], _LoopWriter(self._loop, writer)
+                )
+                # Handlers and the services they call block, so they run on
+                # the loop's default executor instead of the loop itself.
+                await self._loop.run_in_executor(None, handler.run)
+                if (
+                    handler.close_connection
+                    or version != "HTTP/1.1"
+                    or headers.get("Connection", "").lower() == "close"
+                ):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(
+                self._handle_connection,
+                self.host,
+                self.port,
+                limit=MAX_HEADER_BYTES,
+                backlog=1024,
+            )
+        )
+        self.server_port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            # Handlers still running write through the loop, so it keeps
+            # running until they are done.
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            self._loop.close()
+
+    def start(self):
+        """Run the event loop on a daemon thread and return the thread."""
+        ready = Event()
+        thread = Thread(target=self._run, args=(ready,), daemon=True)
+        thread.start()
+        ready.wait()
+        return thread
+
+    def shutdown(self):
+        """Stop the event loop and close all open connections."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def start_async_server(port=0, idle_timeout=DEFAULT_IDLE_TIMEOUT, context=None):
+    """Start the asyncio CRUD server on a background thread.
+
+    Returns ``(server, thread)`` just like :func:`cms.api.start_test_server`.
+    """
+    server = AsyncCRUDServer(port=port, context=context, idle_timeout=idle_timeout)
+    thread = server.start()
+    return server, thread
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Hashable, Optional, Tuple, Union
+
+from .indexes import ContentIndex
+
+# Cached responses kept per content type (or for the all-types listing).
+DEFAULT_MAX_ENTRIES = 256
+# Bytes of responses kept by PublishedViewCache and of encoded items kept by
+# RenderedItemCache, and the largest single item the latter keeps.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ITEM_BYTES = 64 * 1024
+
+
+def _entry_size(body: Union[bytes, Tuple[bytes, ...]]) -> int:
+    return len(body) if isinstance(body, bytes) else sum(map(len, body))
+
+
+class PublishedViewCache(ContentIndex):
+    """Pre-encoded responses of the public (anonymous) content listings.
+
+    Entries are grouped by content type, with ``None`` grouping the listings
+    that span every type, and keyed within a group by the request's paging
+    parameters, item view and content coding.  An entry is an encoded body,
+    or for a whole listing the tuple of its encoded items.  As a content
+    index it sees every saved item: saving an item that is published, or
+    was published until this save, drops the groups of its type and of
+    ``None``.  Saves of never-published items leave the cache alone, since
+    anonymous listings cannot contain them.
+
+    Each group keeps at most ``max_entries`` entries and the whole cache at
+    most ``max_bytes`` of them, counted in full even where a listing shares
+    its items with ``rendered_items``; once either limit is reached new
+    responses are sent without being kept.
+
+    Readers take :meth:`generation` before building a response and hand it
+    to :meth:`put`, which discards the response if the group was
+    invalidated in the meantime.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._epoch = 0
+        self._generations = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # uuid -> type of every published item
+            self._published: Dict[str, Optional[str]] = {}
+            # group -> {key: encoded body or items}
+            self._entries: Dict[Optional[str], Dict[Hashable, Union[bytes, Tuple[bytes, ...]]]] = {}
+            self.size = 0
+            self._epoch += 1
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        if item.get("published_revision"):
+            item_type = self._published[uuid] = item.get("type")
+        elif uuid in self._published:
+            item_type = self._published.pop(uuid)
+        else:
+            return
+        self.invalidate(item_type)
+
+    def invalidate(self, item_type: Optional[str]):
+        """Drop the cached listings of ``item_type`` and of all types."""
+        with self._lock:
+            for group in {item_type, None}:
+                for body in self._entries.pop(group, {}).values():
+                    self.size -= _entry_size(body)
+                self._generations[group] += 1
+
+    def generation(self, item_type: Optional[str]) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations[item_type]
+
+    def get(self, item_type: Optional[str], key: Hashable) -> Optional[Union[bytes, Tuple[bytes, ...]]]:
+        with self._lock:
+            body = self._entries.get(item_type, {}).get(key)
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return body
+
+    def put(self, item_type: Optional[str], key: Hashable, generation: Tuple[int, int], body: Union[bytes, Tuple[bytes, ...]]):
+        with self._lock:
+            if generation != (self._epoch, self._generations[item_type]):
+                return
+            entries = self._entries.setdefault(item_type, {})
+            previous = entries.get(key)
+            if previous is None and len(entries) >= self.max_entries:
+                return
+            size = self.size + _entry_size(body) - (_entry_size(previous) if previous is not None else 0)
+            if size > self.max_bytes:
+                return
+            entries[key] = body
+            self.size = size
+
+
+class RenderedItemCache(ContentIndex):
+    """Encoded JSON of each item's full response form, flags included.
+
+    An item is encoded on its first read and the encoding is dropped when
+    the item is next saved, so listing unchanged items neither copies nor
+    encodes them again.  Like the other content indexes it is only touched
+    under ``DbContext.lock``.  Encodings over ``max_item_bytes`` are not
+    kept, nor are new ones once ``max_bytes`` are held.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_item_bytes: int = DEFAULT_MAX_ITEM_BYTES):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        # uuid -> encoded item
+        self._bodies: Dict[str, bytes] = {}
+        self.size = 0
+
+    def update(self, item: Dict):
+        body = self._bodies.pop(item["uuid"], None)
+        if body is not None:
+            self.size -= len(body)
+
+    def get(self, uuid: str) -> Optional[bytes]:
+        body = self._bodies.get(uuid)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def put(self, uuid: str, body: bytes):
+        if len(body) > self.max_item_bytes or self.size + len(body) > self.max_bytes:
+            return
+        previous = self._bodies.get(uuid)
+        if previous is not None:
+            self.size -= len(previous)
+        self._bodies[uuid] = body
+        self.size += len(body)
@@ -1,47 +1,133 @@
+import gzip
+import http.client
+import io
 import json
 import logging
-from typing import Optional
-from urllib import request, parse, error
+import zlib
+from typing import Dict, Iterable, Optional, Tuple, Union
+from urllib import parse, error
+
+from .models import Content, json_default
 
 logger = logging.getLogger(__name__)
 
 
+def _decode_body(raw: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "deflate":
+        return zlib.decompress(raw)
+    return raw
+
+
 class ApiClient:
-    """Simple HTTP client for the CMS test server."""
+    """Simple HTTP client for the CMS test server.
+
+    Requests share one persistent HTTP/1.1 connection, which is reopened
+    transparently when the server has closed it in the meantime.  ``GET``
+    responses carrying an ``ETag`` are remembered (up to
+    ``etag_cache_size`` of them); repeating the request sends the tag and a
+    ``304 Not Modified`` answer is served from the remembered body.
+    Compressed responses (gzip or deflate) are requested and decoded
+    transparently.
+    """
 
-    def __init__(self, base_url: str, token: Optional[str] = None):
+    etag_cache_size = 256
+
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 30.0):
         self.base_url = base_url.rstrip("/")
         self.token: Optional[str] = token
         self.username: Optional[str] = None
+        self.timeout = timeout
+        parts = parse.urlsplit(self.base_url)
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._prefix = parts.path
+        self._conn: Optional[http.client.HTTPConnection] = None
+        # (path, token) -> (etag, raw body)
+        self._etags: Dict[Tuple[str, Optional[str]], Tuple[str, bytes]] = {}
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            conn_class = (
+                http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            )
+            self._conn = conn_class(self._netloc, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        """Close the persistent connection to the server."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _send(self, method: str, path: str, body, headers):
+        while True:
+            reused = self._conn is not None and self._conn.sock is not None
+            conn = self._connection()
+            try:
+                conn.request(method, self._prefix + path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp_body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.close()
+                # A reused connection may have been dropped by the server's
+                # idle timeout before it saw our request; retry once fresh.
+                if reused:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if resp.will_close:
+                self.close()
+            return resp, resp_body
 
     def _make_request(self, method: str, path: str, data=None, token: Optional[str] = None):
         url = self.base_url + path
-        headers = {}
+        headers = {"Accept-Encoding": "gzip, deflate"}
         current_token = token or self.token
         if current_token:
             headers["Authorization"] = f"Bearer {current_token}"
         body = None
         if data is not None:
-            body = json.dumps(data).encode()
+            body = json.dumps(data, default=json_default).encode()
             headers["Content-Type"] = "application/json"
 
+        cache_key = (path, current_token)
+        cached = self._etags.get(cache_key) if method == "GET" else None
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
         logger.debug("HTTP %s %s", method, url)
         if headers:
             logger.debug("Request headers: %s", headers)
         if body is not None:
             logger.debug("Request body: %s", body.decode())
 
-        req = request.Request(url, data=body, headers=headers, method=method)
-        try:
-            with request.urlopen(req) as resp:
-                resp_body = resp.read().decode()
-                logger.debug("Response status: %s", resp.status)
-                logger.debug("Response body: %s", resp_body)
-                return json.loads(resp_body)
-        except error.HTTPError as exc:
-            err_body = exc.read().decode()
-            logger.debug("HTTPError %s: %s", exc.code, err_body)
-            raise
+        resp, raw = self._send(method, path, body, headers)
+        raw = _decode_body(raw, resp.getheader("Content-Encoding"))
+        if resp.status == 304 and cached is not None:
+            logger.debug("Response status: 304, using cached body")
+            raw = cached[1]
+        elif method == "GET":
+            self._remember_etag(cache_key, resp.getheader("ETag"), resp.status, raw)
+        resp_body = raw.decode()
+        if resp.status >= 400:
+            logger.debug("HTTPError %s: %s", resp.status, resp_body)
+            raise error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(raw))
+        logger.debug("Response status: %s", resp.status)
+        logger.debug("Response body: %s", resp_body)
+        return json.loads(resp_body)
+
+    def _remember_etag(self, key, etag, status, raw):
+        self._etags.pop(key, None)
+        if etag is None or status != 200:
+            return
+        if len(self._etags) >= self.etag_cache_size:
+            # forget the least recently stored response
+            del self._etags[next(iter(self._etags))]
+        self._etags[key] = (etag, raw)
 
     def get(self, path: str, token: Optional[str] = None):
         return self._make_request("GET", path, token=token)
@@ -70,17 +156,57 @@ class ApiClient:
     def get_content_types(self):
         return self.get("/content-types")
 
-    def list_content_by_type(self, content_type: str):
+    def list_content_by_type(self, content_type: str, fields: Optional[Iterable[str]] = None):
+        """List the items of ``content_type``.
+
+        With ``fields`` only those fields are returned, without revisions.
+        """
         # Content types may contain spaces (e.g. "event schedule").
         # ``urllib.request`` does not allow spaces in the request path, so we
         # percent-encode the value.  The server will decode it again.
         encoded = parse.quote(content_type, safe="")
-        return self.get(f"/content-types/{encoded}")
+        path = f"/content-types/{encoded}"
+        if fields is not None:
+            path += "?" + parse.urlencode({"fields": ",".join(fields), "revisions": "none"})
+        return self.get(path)
+
+    def lookup_offices(self, postal_code: Optional[str] = None, phone: Optional[str] = None,
+                       email: Optional[str] = None, limit: int = 20):
+        """Return the first ``limit`` published office addresses matching.
+
+        ``postal_code`` matches as a prefix, ``phone`` and ``email`` exactly.
+        """
+        criteria = {"postal_code": postal_code, "phone": phone, "email": email}
+        query = {name: value for name, value in criteria.items() if value is not None}
+        query["limit"] = limit
+        return self.get(f"/offices?{parse.urlencode(query)}")["items"]
+
+    def _iter_pages(self, path: str, page_size: int):
+        cursor = None
+        while True:
+            query = {"limit": page_size}
+            if cursor is not None:
+                query["cursor"] = cursor
+            page = self.get(f"{path}?{parse.urlencode(query)}")
+            yield from page["items"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    def iter_content(self, page_size: int = 100):
+        """Yield every listed content item, fetching one page at a time."""
+        return self._iter_pages("/content", page_size)
+
+    def iter_content_by_type(self, content_type: str, page_size: int = 100):
+        """Yield the items of ``content_type``, fetching one page at a time."""
+        encoded = parse.quote(content_type, safe="")
+        return self._iter_pages(f"/content-types/{encoded}", page_size)
 
     def get_content(self, uuid: str):
         return self.get(f"/content/{uuid}", token=self.token)
 
-    def create_content(self, item: dict, token: Optional[str] = None):
+    def create_content(self, item: Union[dict, Content], token: Optional[str] = None):
+        """Create ``item``, given as a dict or a :class:`~cms.models.Content`."""
         return self.post("/content", item, token=token or self.token)
 
     def request_approval(self, uuid: str, timestamp: str, user_uuid: str, token: Optional[str] = None):
@@ -105,7 +231,7 @@ def seed_server(api: ApiClient):
     contents = seed_example_contents(users)
     token_editor = api.create_token("editor")
     for item in contents:
-        api.create_content(item.to_dict(), token=token_editor)
+        api.create_content(item, token=token_editor)
     api.token = token_editor
     api.username = "editor"
     return users
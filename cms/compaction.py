@@ -0,0 +1,182 @@
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional
+
+from .db_context import DbContext
+from .models import json_default
+from .revisions import decode_revisions, encode_revisions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactionStats:
+    """Outcome of one or more compaction passes.
+
+    Sizes are the JSON-encoded length of the affected revision lists, which is
+    what the journal and SQLite backends store.
+    """
+
+    items_scanned: int = 0
+    items_compacted: int = 0
+    revisions_removed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def add(self, other: "CompactionStats"):
+        self.items_scanned += other.items_scanned
+        self.items_compacted += other.items_compacted
+        self.revisions_removed += other.revisions_removed
+        self.bytes_before += other.bytes_before
+        self.bytes_after += other.bytes_after
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    # Timestamps without an offset are taken to be UTC.
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class RetentionPolicy:
+    """Decide which revisions of an item to keep.
+
+    A revision is kept when it is one of the last ``keep_last`` revisions or
+    was updated within ``max_age``; with both set either condition suffices.
+    The newest revision and the item's ``published_revision`` and
+    ``review_revision`` are always kept, as are revisions whose
+    ``last_updated`` cannot be parsed when ``max_age`` is the only rule.
+    """
+
+    def __init__(self, keep_last: Optional[int] = None, max_age: Optional[timedelta] = None, now: Callable[[], datetime] = None):
+        if keep_last is None and max_age is None:
+            raise ValueError("keep_last or max_age is required")
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.keep_last = keep_last
+        self.max_age = max_age
+        self.now = now or (lambda: datetime.now(timezone.utc))
+
+    def _is_recent(self, rev: Dict, now: datetime) -> bool:
+        updated = _parse_timestamp(rev.get("last_updated"))
+        if updated is None:
+            return self.keep_last is None
+        return now - updated <= self.max_age
+
+    def select(self, item: Dict) -> List[int]:
+        """Return the positions in ``item["revisions"]`` to keep, in order."""
+        revisions = item.get("revisions") or []
+        pinned = {item.get("published_revision"), item.get("review_revision")}
+        first_recent = len(revisions) - self.keep_last if self.keep_last is not None else len(revisions) - 1
+        now = None
+        if self.max_age is not None:
+            now = self.now()
+            if now.tzinfo is None:
+                now = now.replace(tzinfo=timezone.utc)
+        return [
+            i
+            for i, rev in enumerate(revisions)
+            if i >= first_recent
+            or rev.get("uuid") in pinned
+            or (now is not None and self._is_recent(rev, now))
+        ]
+
+
+def _size(revisions: List[Dict]) -> int:
+    return len(json.dumps(revisions, separators=(",", ":"), default=json_default).encode())
+
+
+def compact_item(item: Dict, policy: RetentionPolicy) -> Optional[CompactionStats]:
+    """Drop the revisions ``policy`` does not keep, in place.
+
+    Returns ``None`` when nothing was dropped.  The remaining history is
+    re-encoded so it starts with a keyframe.
+    """
+    revisions = item.get("revisions") or []
+    keep = policy.select(item)
+    if len(keep) == len(revisions):
+        return None
+    decoded = decode_revisions(revisions)
+    item["revisions"] = encode_revisions([decoded[i] for i in keep])
+    return CompactionStats(
+        items_compacted=1,
+        revisions_removed=len(revisions) - len(keep),
+        bytes_before=_size(revisions),
+        bytes_after=_size(item["revisions"]),
+    )
+
+
+def compact_revisions(ctx: DbContext, policy: RetentionPolicy) -> CompactionStats:
+    """Apply ``policy`` to every stored item and return what it reclaimed.
+
+    Each item is compacted under ``ctx.lock`` and written back with
+    ``save_content``, so requests are only ever held up for one item.
+    """
+    stats = CompactionStats()
+    with ctx.lock:
+        uuids = list(ctx.contents)
+    for uuid in uuids:
+        with ctx.lock:
+            item = ctx.contents.get(uuid)
+            if item is None:
+                continue
+            stats.items_scanned += 1
+            result = compact_item(item, policy)
+            if result is not None:
+                ctx.save_content(item)
+                stats.add(result)
+    ctx.commit()
+    return stats
+
+
+class RevisionCompactor:
+    """Run :func:`compact_revisions` every ``interval`` seconds on a daemon thread.
+
+    ``last_stats`` holds the outcome of the latest pass and ``total_stats``
+    the running sum of every pass so far.  A pass that raises is logged and
+    counted in ``failed_passes``, and the next one runs on schedule.
+    """
+
+    def __init__(self, ctx: DbContext, policy: RetentionPolicy, interval: float = 300.0):
+        self.ctx = ctx
+        self.policy = policy
+        self.interval = interval
+        self.last_stats: Optional[CompactionStats] = None
+        self.total_stats = CompactionStats()
+        self.failed_passes = 0
+        self._stopped = Event()
+        self._thread = None
+
+    def run_once(self) -> CompactionStats:
+        stats = compact_revisions(self.ctx, self.policy)
+        self.last_stats = stats
+        self.total_stats.add(stats)
+        return stats
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                self.failed_passes += 1
+                logger.exception("revision compaction pass failed")
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,7 +1,122 @@
+from itertools import islice
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .cache import PublishedViewCache, RenderedItemCache
+from .events import EventIndex
+from .indexes import CategoryIndex, PendingApprovalIndex, RevisionIndex, TypeIndex, VersionIndex, _scan_revisions
+from .models import CategoryRecord, ContentRecord
+from .offices import OfficeIndex
+from .search import SearchIndex
+from .types import ContentType
+
+
 class DbContext:
-    """Mimic an Entity Framework style DbContext using in-memory stores."""
+    """Mimic an Entity Framework style DbContext using in-memory stores.
+
+    ``lock`` guards the stores when the API is served from several threads;
+    the services hold it for the duration of each operation.  Content must be
+    written through :meth:`save_content` so the secondary indexes stay in
+    step with ``contents``; categories go through :meth:`save_category`.
+    Both are stored as the slotted records named by ``content_record`` and
+    ``category_record``, which read like dicts at a fraction of the memory.
+    """
+
+    content_record = ContentRecord
+    category_record = CategoryRecord
 
     def __init__(self):
         self.contents = {}
         self.categories = {}
         self.tokens = {}
+        self.lock = RLock()
+        self.type_index = TypeIndex()
+        self.pending_index = PendingApprovalIndex()
+        self.revision_index = RevisionIndex()
+        self.category_index = CategoryIndex()
+        self.published_cache = PublishedViewCache()
+        self.rendered_items = RenderedItemCache()
+        # These find revisions through revision_index, so they are updated
+        # after it.
+        self.search_index = SearchIndex(self.revision_position)
+        self.event_index = EventIndex(self.revision_position, ContentType.EVENT_SCHEDULE)
+        self.office_index = OfficeIndex(self.revision_position, ContentType.OFFICE_ADDRESS)
+        self.versions = VersionIndex()
+        self.content_indexes = [
+            self.type_index,
+            self.pending_index,
+            self.revision_index,
+            self.category_index,
+            self.published_cache,
+            self.rendered_items,
+            self.search_index,
+            self.event_index,
+            self.office_index,
+            self.versions,
+        ]
+        # Bumped by every category write; see :meth:`save_category`.
+        self.category_version = 0
+
+    def save_content(self, item: Dict):
+        """Store ``item`` and bring every content index up to date."""
+        if self.content_record is not None:
+            item = self.content_record.from_dict(item)
+        self.contents[item["uuid"]] = item
+        for index in self.content_indexes:
+            index.update(item)
+
+    def save_category(self, category: Dict):
+        """Store ``category`` and bump :attr:`category_version`."""
+        if self.category_record is not None:
+            category = self.category_record.from_dict(category)
+        self.categories[category["uuid"]] = category
+        self.category_version += 1
+
+    def commit(self):
+        """Make the calling thread's writes durable; a no-op in memory.
+
+        Called by the services after they release ``lock``.
+        """
+
+    def reindex(self):
+        """Rebuild every content index from ``contents``."""
+        for index in self.content_indexes:
+            index.clear()
+            for item in self.contents.values():
+                index.update(item)
+
+    def iter_contents(self, item_type: Optional[str] = None, published: Optional[bool] = None, after=None) -> Iterator[Dict]:
+        """Yield stored items ordered by ``(created_at, uuid)``.
+
+        ``item_type`` and ``published`` optionally filter the items and
+        ``after`` resumes just past a ``(created_at, uuid)`` key.  The cost is
+        proportional to the number of items yielded rather than to the size
+        of the store.
+        """
+        contents = self.contents
+        return (contents[uuid] for uuid in self.type_index.uuids(item_type, published, after))
+
+    def page_contents(self, limit: int, item_type: Optional[str] = None, published: Optional[bool] = None, after=None) -> Tuple[List[Dict], Optional[tuple]]:
+        """Return up to ``limit`` items and the key to resume after, if any."""
+        keys = list(islice(self.type_index.keys(item_type, published, after), limit + 1))
+        next_key = keys[limit - 1] if len(keys) > limit else None
+        return [self.contents[uuid] for _, uuid in keys[:limit]], next_key
+
+    def page_category(self, category: str, limit: int, published: Optional[bool] = None, after=None) -> Tuple[List[Dict], Optional[tuple]]:
+        """Like :meth:`page_contents`, over the items listing ``category``."""
+        keys = list(islice(self.category_index.keys(category, published, after), limit + 1))
+        next_key = keys[limit - 1] if len(keys) > limit else None
+        return [self.contents[uuid] for _, uuid in keys[:limit]], next_key
+
+    def iter_pending(self) -> Iterator[Dict]:
+        """Yield items awaiting approval, oldest request first."""
+        contents = self.contents
+        return (contents[uuid] for uuid in self.pending_index.uuids())
+
+    def revision_position(self, item: Dict, rev_uuid: Optional[str]) -> Optional[int]:
+        """Return where revision ``rev_uuid`` sits in ``item["revisions"]``."""
+        if not rev_uuid:
+            return None
+        if self.revision_index is None:
+            return _scan_revisions(item.get("revisions") or [], rev_uuid)
+        return self.revision_index.position(item, rev_uuid)
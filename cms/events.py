@@ -0,0 +1,195 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .indexes import ContentIndex, _remove_key
+from .revisions import attributes_at
+
+
+def parse_time(value) -> Optional[datetime]:
+    """Parse an ISO 8601 date or datetime, or return ``None``.
+
+    Times with an offset are converted to UTC and made naive so that every
+    indexed time compares with every other.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_bound(value: str, upper: bool = False) -> Optional[datetime]:
+    """Parse a query bound; an upper bound given as a bare date covers that day."""
+    parsed = parse_time(value)
+    if parsed is not None and upper and len(value) == len("YYYY-MM-DD"):
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+
+def event_span(attrs: Dict) -> Optional[Tuple[datetime, datetime]]:
+    """Return the ``(start, end)`` an event occupies, both inclusive.
+
+    All-day events cover their first and last dates entirely.  A missing or
+    earlier ``end`` makes the event an instant at ``start``.
+    """
+    start = parse_time(attrs.get("start"))
+    if start is None:
+        return None
+    end = parse_time(attrs.get("end"))
+    if end is None or end < start:
+        end = start
+    if attrs.get("all_day"):
+        start = datetime.combine(start.date(), time.min)
+        end = datetime.combine(end.date(), time.max)
+    return start, end
+
+
+# Spans are placed on an integer timeline of microseconds; the tree's split
+# points are fixed dyadic points of it, so nothing is ever rebalanced.
+_EPOCH = datetime.min
+_MICROSECOND = timedelta(microseconds=1)
+# Level of the root split point; the timeline is (0, 2 ** (_LEVELS + 1)).
+_LEVELS = 58
+_ROOT = 1 << _LEVELS
+_LAST = (datetime.max - _EPOCH) // _MICROSECOND + 1
+
+
+def _coordinate(value: datetime) -> int:
+    # + 1 keeps datetime.min off the excluded point 0
+    return (value - _EPOCH) // _MICROSECOND + 1
+
+
+def _split_point(start: int, end: int) -> int:
+    """Return the point of ``[start, end]`` with the most trailing zero bits.
+
+    It is the first split point a search from the root meets inside the
+    span, so the span is stored there.
+    """
+    if start == end:
+        return start
+    level = (start ^ end).bit_length() - 1
+    prefix = end >> (level + 1) << (level + 1)
+    return prefix if prefix >= start else prefix | (1 << level)
+
+
+class EventIndex(ContentIndex):
+    """Interval tree over the spans of published events.
+
+    Each span sits at a fixed split point it contains (see
+    ``_split_point``) in two sorted lists, ``(start, end, uuid)`` and
+    ``(end, start, uuid)``, and every split point counts the spans below
+    it.  A change therefore costs one walk down the tree and a list insert
+    or delete, like the other indexes; a query walks the tree, skipping
+    empty branches, and bisects the lists of the points it visits.  Spans
+    are read from each item's published revision, found through
+    ``revision_position`` (``DbContext.revision_position``).
+    """
+
+    def __init__(self, revision_position: Callable[[Dict, Optional[str]], Optional[int]], item_type: str):
+        self._position = revision_position
+        self._type = item_type
+        self.clear()
+
+    def clear(self):
+        # uuid -> (start, end, uuid) in timeline coordinates
+        self._spans: Dict[str, tuple] = {}
+        # split point -> (by_start, by_end)
+        self._nodes: Dict[int, Tuple[List[tuple], List[tuple]]] = {}
+        # split point -> spans stored at it or below it
+        self._counts: Dict[int, int] = {}
+
+    def _span(self, item: Dict) -> Optional[tuple]:
+        if item.get("type") != self._type:
+            return None
+        position = self._position(item, item.get("published_revision"))
+        if position is None:
+            return None
+        span = event_span(attributes_at(item["revisions"], position))
+        if span is None:
+            return None
+        return (_coordinate(span[0]), _coordinate(span[1]), item["uuid"])
+
+    def _count(self, point: int, delta: int):
+        counts = self._counts
+        node, half = _ROOT, _ROOT >> 1
+        while True:
+            count = counts.get(node, 0) + delta
+            if count:
+                counts[node] = count
+            else:
+                del counts[node]
+            if node == point:
+                return
+            node = node - half if point < node else node + half
+            half >>= 1
+
+    def _add(self, span: tuple):
+        point = _split_point(span[0], span[1])
+        by_start, by_end = self._nodes.setdefault(point, ([], []))
+        insort(by_start, span)
+        insort(by_end, (span[1], span[0], span[2]))
+        self._count(point, 1)
+
+    def _remove(self, span: tuple):
+        point = _split_point(span[0], span[1])
+        by_start, by_end = self._nodes[point]
+        _remove_key(by_start, span)
+        _remove_key(by_end, (span[1], span[0], span[2]))
+        if not by_start:
+            del self._nodes[point]
+        self._count(point, -1)
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        span = self._span(item)
+        previous = self._spans.get(uuid)
+        if previous == span:
+            return
+        if previous is not None:
+            self._remove(previous)
+            del self._spans[uuid]
+        if span is not None:
+            self._add(span)
+            self._spans[uuid] = span
+
+    def overlapping(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """Return the uuids of events overlapping ``[start, end]``, earliest first.
+
+        Either bound may be ``None`` for an open end.  Events touching a
+        bound count as overlapping.
+        """
+        low = _coordinate(start) if start is not None else 1
+        high = _coordinate(end) if end is not None else _LAST
+        counts, nodes = self._counts, self._nodes
+        found = []
+        stack = [(_ROOT, _ROOT >> 1)]
+        while stack:
+            point, half = stack.pop()
+            if point not in counts:
+                continue
+            node = nodes.get(point)
+            # Spans stored below a point lie entirely on one side of it.
+            if high < point:
+                if node is not None:
+                    by_start = node[0]
+                    found.extend(by_start[:bisect_right(by_start, (high, _LAST + 1))])
+                if half:
+                    stack.append((point - half, half >> 1))
+            elif low > point:
+                if node is not None:
+                    found.extend((s, e, uuid) for e, s, uuid in node[1][bisect_left(node[1], (low,)):])
+                if half:
+                    stack.append((point + half, half >> 1))
+            else:
+                if node is not None:
+                    found.extend(node[0])
+                if half:
+                    stack.append((point + half, half >> 1))
+                    stack.append((point - half, half >> 1))
+        found.sort()
+        return [uuid for _, _, uuid in found]
@@ -0,0 +1,267 @@
+import uuid
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Iterator, Optional
+
+from .workflow import _get_metadata_value, is_pending_approval
+
+
+class ContentIndex(ABC):
+    """Secondary index kept in step with ``DbContext.contents``.
+
+    ``DbContext.save_content`` calls :meth:`update` after every write so an
+    index never has to rescan the store.
+    """
+
+    @abstractmethod
+    def update(self, item: Dict):
+        """Bring the index up to date with the just saved ``item``."""
+
+    @abstractmethod
+    def clear(self):
+        """Forget every item; ``DbContext.reindex`` then updates it with each one."""
+
+
+def _remove_key(keys, key):
+    del keys[bisect_left(keys, key)]
+
+
+def _scan_revisions(revisions, rev_uuid) -> Optional[int]:
+    for position, rev in enumerate(revisions):
+        if rev.get("uuid") == rev_uuid:
+            return position
+    return None
+
+
+class TypeIndex(ContentIndex):
+    """Map each content type to its items, split by published state.
+
+    Every bucket is a list of ``(created_at, uuid)`` keys kept sorted, which
+    gives listings a stable order and lets a page start anywhere with one
+    bisection.  Besides the per-type ``all``/``published``/``unpublished``
+    buckets, two buckets span every type: all items and published items.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # (type, published) -> sorted keys; type None spans every type and
+        # published None holds both states.
+        self._buckets = defaultdict(list)
+        # uuid -> (type, published, key) as last indexed
+        self._entries = {}
+
+    @staticmethod
+    def _bucket_names(item_type, published):
+        return ((item_type, None), (item_type, published), (None, None), (None, published))
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        item_type = item.get("type")
+        published = bool(item.get("published_revision"))
+        key = (_get_metadata_value(item, "created_at") or "", uuid)
+        entry = (item_type, published, key)
+        previous = self._entries.get(uuid)
+        if previous == entry:
+            return
+        if previous is not None:
+            old_type, old_published, old_key = previous
+            for name in self._bucket_names(old_type, old_published):
+                _remove_key(self._buckets[name], old_key)
+        for name in self._bucket_names(item_type, published):
+            insort(self._buckets[name], key)
+        self._entries[uuid] = entry
+
+    def keys(self, item_type: Optional[str] = None, published: Optional[bool] = None, after=None) -> Iterator[tuple]:
+        """Iterate ``(created_at, uuid)`` keys in order.
+
+        ``item_type`` of ``None`` spans every type.  ``published`` restricts
+        the result to published (``True``) or unpublished (``False``) items;
+        ``None`` returns both.  ``after`` starts the iteration just past the
+        given key, so resuming a listing costs one bisection.
+        """
+        keys = self._buckets.get((item_type, published), ())
+        start = bisect_right(keys, after) if after is not None else 0
+        return (keys[i] for i in range(start, len(keys)))
+
+    def uuids(self, item_type: Optional[str] = None, published: Optional[bool] = None, after=None) -> Iterator[str]:
+        return (uuid for _, uuid in self.keys(item_type, published, after))
+
+    def count(self, item_type: Optional[str] = None, published: Optional[bool] = None) -> int:
+        return len(self._buckets.get((item_type, published), ()))
+
+
+class CategoryIndex(ContentIndex):
+    """Map each category UUID to the items listing it in ``categories``.
+
+    Like :class:`TypeIndex`, every category has sorted ``(created_at, uuid)``
+    buckets of all its items and of its published items, so a category's
+    listing costs one bisection plus the page, whatever the store size.
+    Archived categories keep their buckets; callers decide whether to list
+    them.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # (category, published) -> sorted keys; published None holds both.
+        self._buckets = defaultdict(list)
+        # uuid -> (categories, published, key) as last indexed
+        self._entries = {}
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        categories = frozenset(item.get("categories") or ())
+        published = bool(item.get("published_revision"))
+        key = (_get_metadata_value(item, "created_at") or "", uuid)
+        entry = (categories, published, key)
+        previous = self._entries.get(uuid)
+        if previous == entry:
+            return
+        if previous is not None:
+            old_categories, old_published, old_key = previous
+            for category in old_categories:
+                for name in ((category, None), (category, old_published)):
+                    bucket = self._buckets[name]
+                    _remove_key(bucket, old_key)
+                    if not bucket:
+                        del self._buckets[name]
+        for category in categories:
+            for name in ((category, None), (category, published)):
+                insort(self._buckets[name], key)
+        if categories:
+            self._entries[uuid] = entry
+        else:
+            self._entries.pop(uuid, None)
+
+    def keys(self, category: str, published: Optional[bool] = None, after=None) -> Iterator[tuple]:
+        """Iterate the ``(created_at, uuid)`` keys of ``category`` in order."""
+        keys = self._buckets.get((category, published), ())
+        start = bisect_right(keys, after) if after is not None else 0
+        return (keys[i] for i in range(start, len(keys)))
+
+    def count(self, category: str, published: Optional[bool] = None) -> int:
+        return len(self._buckets.get((category, published), ()))
+
+
+class PendingApprovalIndex(ContentIndex):
+    """Approval queue ordered by ``draft_requested_at``.
+
+    Keys are ``(draft_requested_at, uuid)`` tuples kept sorted in a list, so
+    reading the queue costs O(pending) and a change costs one bisection plus
+    a list insert or delete.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._queue = []
+        self._keys = {}
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        key = None
+        if is_pending_approval(item):
+            key = (_get_metadata_value(item, "draft_requested_at") or "", uuid)
+        previous = self._keys.get(uuid)
+        if previous == key:
+            return
+        if previous is not None:
+            _remove_key(self._queue, previous)
+            del self._keys[uuid]
+        if key is not None:
+            insort(self._queue, key)
+            self._keys[uuid] = key
+
+    def uuids(self) -> Iterator[str]:
+        return (uuid for _, uuid in self._queue)
+
+    def __len__(self):
+        return len(self._queue)
+
+
+class RevisionIndex(ContentIndex):
+    """Map every revision UUID to its item and position in ``revisions``.
+
+    Saves that only append revisions extend the item's entries in O(1);
+    any other change to the history (compaction, a client replacing the
+    list) re-indexes that item.  Lookups check the stored position against
+    the item, so a stale entry degrades to a scan rather than a wrong answer.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # revision uuid -> (item uuid, position)
+        self._positions = {}
+        # item uuid -> revision uuids as last indexed
+        self._items = {}
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        revisions = item.get("revisions") or []
+        known = self._items.get(uuid)
+        if known is None:
+            known = self._items[uuid] = []
+        count = len(known)
+        unchanged_prefix = count <= len(revisions) and (
+            count == 0
+            or (revisions[0].get("uuid") == known[0] and revisions[count - 1].get("uuid") == known[-1])
+        )
+        if not unchanged_prefix:
+            for rev_uuid in known:
+                if self._positions.get(rev_uuid, (None,))[0] == uuid:
+                    del self._positions[rev_uuid]
+            known.clear()
+            count = 0
+        for position in range(count, len(revisions)):
+            rev_uuid = revisions[position].get("uuid")
+            known.append(rev_uuid)
+            self._positions[rev_uuid] = (uuid, position)
+
+    def position(self, item: Dict, rev_uuid: str) -> Optional[int]:
+        """Return the position of ``rev_uuid`` in ``item["revisions"]``."""
+        entry = self._positions.get(rev_uuid)
+        revisions = item.get("revisions") or []
+        if entry is None and item["uuid"] in self._items:
+            return None
+        if entry is not None and entry[0] == item["uuid"]:
+            position = entry[1]
+            if position < len(revisions) and revisions[position].get("uuid") == rev_uuid:
+                return position
+        return _scan_revisions(revisions, rev_uuid)
+
+
+class VersionIndex(ContentIndex):
+    """Change counters for items and content listings.
+
+    Every save bumps the item's counter, its type's listing counter and the
+    all-types listing counter (type ``None``).  ``epoch`` is random per
+    index, so counters from an earlier process never compare equal to
+    current ones.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self._items = defaultdict(int)
+        self._collections = defaultdict(int)
+
+    def clear(self):
+        # Counters only ever grow; rebuilding bumps them again.
+        pass
+
+    def update(self, item: Dict):
+        self._items[item["uuid"]] += 1
+        self._collections[item.get("type")] += 1
+        self._collections[None] += 1
+
+    def item(self, uuid: str) -> int:
+        return self._items.get(uuid, 0)
+
+    def collection(self, item_type: Optional[str] = None) -> int:
+        return self._collections.get(item_type, 0)
@@ -0,0 +1,359 @@
+import json
+import os
+import time
+from threading import Condition, Thread, local
+from typing import Dict, Optional
+
+from .db_context import DbContext
+from .models import json_default
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.log"
+# The journal segment that was active when the last snapshot started.  It
+# is kept until that snapshot is safely on disk.
+PREVIOUS_JOURNAL_FILE = "journal.log.prev"
+
+
+def _detached(item: Dict) -> Dict:
+    """Return a copy of ``item`` that later in-place edits cannot reach.
+
+    Services edit stored items in place, including their ``metadata`` dict,
+    and append to ``revisions``; stored revisions themselves never change.
+    The ``revisions`` list is shared, callers copy it if they need to.
+    """
+    copy = item.copy()
+    for key, value in item.items():
+        if key != "revisions" and type(value) in (dict, list):
+            copy[key] = type(value)(value)
+    return copy
+
+
+class _JournaledDict(dict):
+    """Dict that records every assignment and deletion in the journal."""
+
+    def __init__(self, ctx: "JournaledDbContext", kind: str):
+        super().__init__()
+        self._ctx = ctx
+        self._kind = kind
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._ctx._append(self._kind, key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._ctx._append(self._kind, key, None)
+
+
+class JournaledDbContext(DbContext):
+    """In-memory :class:`~cms.db_context.DbContext` backed by a journal.
+
+    Every content save and every category or token assignment is appended
+    as one JSON line ``[seq, kind, key, value]`` to ``journal.log`` in
+    ``directory``.  A content save that only changed fields and appended
+    revisions since the item was last journaled is logged as a
+    ``content_patch`` holding just those, so edits do not rewrite the
+    history.  A background thread writes the queued lines in groups,
+    so many mutations share one ``write``/``fsync``.  ``fsync`` selects the
+    durability policy:
+
+    ``"always"``
+        service calls return only once their records are fsynced; records
+        from concurrent callers are committed together.
+    ``"interval"``
+        records are written at once and fsynced at most every
+        ``fsync_interval`` seconds; a crash can lose that window.
+    ``"never"``
+        records are written but flushing to disk is left to the OS.
+
+    After ``snapshot_every`` records the whole state is written to
+    ``snapshot.json`` and the journal restarts empty.  On start-up the
+    snapshot is loaded and the journal tail replayed on top of it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync: str = "interval",
+        fsync_interval: float = 0.05,
+        snapshot_every: Optional[int] = 10000,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync!r}")
+        super().__init__()
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._seq = 0
+        # uuid -> (fields, revisions list, length) as last journaled
+        self._journaled_items: Dict[str, tuple] = {}
+        self._recover()
+        self.categories = self._journaled("category", self.categories)
+        self.tokens = self._journaled("token", self.tokens)
+
+        self._pending = []
+        self._written_seq = self._seq
+        self._durable_seq = self._seq
+        self._last_fsync = 0.0
+        self._since_snapshot = 0
+        # snapshot() requests and the last request a finished snapshot covers
+        self._snapshot_requested = 0
+        self._snapshot_completed = 0
+        self._closed = False
+        self._cond = Condition()
+        self._local = local()
+        self._file = open(self._path(JOURNAL_FILE), "ab")
+        self._flusher = Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _journaled(self, kind: str, data: Dict) -> _JournaledDict:
+        journaled = _JournaledDict(self, kind)
+        dict.update(journaled, data)
+        return journaled
+
+    # Recovery ---------------------------------------------------------
+    def _recover(self):
+        snapshot_seq = 0
+        try:
+            with open(self._path(SNAPSHOT_FILE), encoding="utf-8") as fh:
+                snapshot = json.load(fh)
+        except FileNotFoundError:
+            pass
+        else:
+            snapshot_seq = snapshot["seq"]
+            for key, value in snapshot["contents"].items():
+                self.contents[key] = self.content_record.from_dict(value)
+            for key, value in snapshot["categories"].items():
+                self.categories[key] = self.category_record.from_dict(value)
+            self.tokens.update(snapshot["tokens"])
+        self._seq = snapshot_seq
+        self._merge_previous_journal()
+        self._replay(self._path(JOURNAL_FILE), snapshot_seq)
+        self.reindex()
+
+    def _merge_previous_journal(self):
+        # A crash between rotating the journal and finishing the snapshot
+        # leaves two segments.  Fold them back into one so the next rotation
+        # cannot overwrite records that no snapshot holds yet.
+        previous = self._path(PREVIOUS_JOURNAL_FILE)
+        if not os.path.exists(previous):
+            return
+        current = self._path(JOURNAL_FILE)
+        tmp = current + ".tmp"
+        with open(tmp, "wb") as out:
+            for name in (previous, current):
+                if os.path.exists(name):
+                    with open(name, "rb") as fh:
+                        data = fh.read()
+                    if data and not data.endswith(b"\n"):
+                        # drop a torn final record
+                        data = data[: data.rfind(b"\n") + 1]
+                    out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, current)
+        os.remove(previous)
+
+    def _replay(self, path: str, after_seq: int):
+        stores = {"content": self.contents, "category": self.categories, "token": self.tokens}
+        records = {"content": self.content_record.from_dict, "category": self.category_record.from_dict}
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with fh:
+            for line in fh:
+                try:
+                    seq, kind, key, value = json.loads(line)
+                except ValueError:
+                    # a torn final record from a crash mid-write
+                    break
+                self._seq = max(self._seq, seq)
+                if seq <= after_seq:
+                    continue
+                if kind == "content_patch":
+                    self.contents[key] = self._patched(self.contents[key], value)
+                elif value is None:
+                    stores[kind].pop(key, None)
+                else:
+                    stores[kind][key] = records[kind](value) if kind in records else value
+
+    def _patched(self, item: Dict, patch: Dict) -> Dict:
+        for key, value in patch["set"].items():
+            item[key] = value
+        for key in patch["unset"]:
+            item.pop(key, None)
+        revisions = item["revisions"]
+        # Truncating first makes replaying a patch idempotent.
+        del revisions[patch["at"]:]
+        revisions.extend(patch["revisions"])
+        return self.content_record.from_dict(item)
+
+    # Appending --------------------------------------------------------
+    def _append(self, kind: str, key: str, value):
+        # Callers hold ``self.lock``, so sequence numbers follow the order in
+        # which mutations were applied.
+        self._seq += 1
+        record = json.dumps([self._seq, kind, key, value], separators=(",", ":"), default=json_default)
+        with self._cond:
+            self._pending.append((self._seq, record.encode() + b"\n"))
+            self._cond.notify_all()
+        self._local.last_seq = self._seq
+
+    def _content_patch(self, item: Dict, fields: Dict) -> Optional[Dict]:
+        """Return what changed in ``item`` since it was last journaled, if expressible."""
+        previous = self._journaled_items.get(item["uuid"])
+        if previous is None:
+            return None
+        before, revisions, length = previous
+        current = item.get("revisions")
+        # A replaced history (compaction, client-sent revisions) is logged whole.
+        if current is not revisions or (current is not None and len(current) < length):
+            return None
+        return {
+            "set": {
+                key: value for key, value in fields.items()
+                if key != "revisions" and (key not in before or before[key] != value)
+            },
+            "unset": [key for key in before if key != "revisions" and key not in fields],
+            "at": length,
+            "revisions": current[length:] if current is not None else [],
+        }
+
+    def save_content(self, item: Dict):
+        with self.lock:
+            super().save_content(item)
+            stored = self.contents[item["uuid"]]
+            fields = _detached(stored)
+            patch = self._content_patch(stored, fields)
+            if patch is None:
+                self._append("content", stored["uuid"], stored)
+            else:
+                self._append("content_patch", stored["uuid"], patch)
+            revisions = stored.get("revisions")
+            self._journaled_items[stored["uuid"]] = (fields, revisions, len(revisions or ()))
+
+    def commit(self):
+        """Wait until this thread's records are durable under ``"always"``."""
+        if self.fsync != "always":
+            return
+        target = getattr(self._local, "last_seq", 0)
+        with self._cond:
+            while self._durable_seq < target and not self._closed:
+                self._cond.wait()
+
+    # Background writer ------------------------------------------------
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                if not (self._pending or self._closed or self._snapshot_requested > self._snapshot_completed):
+                    self._cond.wait(self.fsync_interval)
+                batch, self._pending = self._pending, []
+                closing = self._closed
+                snapshot = self._snapshot_requested > self._snapshot_completed
+            self._write(batch)
+            self._sync(force=closing)
+            if snapshot or (self.snapshot_every and self._since_snapshot >= self.snapshot_every):
+                self._write_snapshot()
+            if closing:
+                return
+
+    def _write(self, batch):
+        if not batch:
+            return
+        self._file.write(b"".join(record for _, record in batch))
+        self._file.flush()
+        self._since_snapshot += len(batch)
+        self._written_seq = batch[-1][0]
+
+    def _sync(self, force: bool = False):
+        seq = self._written_seq
+        if seq == self._durable_seq:
+            return
+        now = time.monotonic()
+        if force or self.fsync == "always" or (
+            self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval
+        ):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+        elif self.fsync != "never":
+            return
+        with self._cond:
+            self._durable_seq = seq
+            self._cond.notify_all()
+
+    # Snapshots --------------------------------------------------------
+    def _write_snapshot(self):
+        # Only the copy and the journal rotation hold the lock; encoding and
+        # fsyncing happen after it is released.  This thread is the only
+        # writer of ``_file``.
+        with self.lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                # Requests made from here on see a state this snapshot
+                # may not include, so they need a later one.
+                requested = self._snapshot_requested
+            self._write(batch)
+            seq = self._written_seq
+            contents = {}
+            for key, item in self.contents.items():
+                copy = _detached(item)
+                if item.get("revisions") is not None:
+                    copy["revisions"] = list(item["revisions"])
+                contents[key] = copy
+            categories = {key: _detached(value) for key, value in self.categories.items()}
+            tokens = dict(self.tokens)
+            # Start a fresh journal; the old one stays until the snapshot
+            # covering it is on disk.
+            previous = self._file
+            os.replace(self._path(JOURNAL_FILE), self._path(PREVIOUS_JOURNAL_FILE))
+            self._file = open(self._path(JOURNAL_FILE), "ab")
+            self._since_snapshot = 0
+        os.fsync(previous.fileno())
+        previous.close()
+        with self._cond:
+            self._durable_seq = max(self._durable_seq, seq)
+            self._cond.notify_all()
+        state = json.dumps(
+            {"seq": seq, "contents": contents, "categories": categories, "tokens": tokens},
+            separators=(",", ":"),
+            default=json_default,
+        )
+        tmp = self._path(SNAPSHOT_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(state)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._path(SNAPSHOT_FILE))
+        os.remove(self._path(PREVIOUS_JOURNAL_FILE))
+        with self._cond:
+            self._snapshot_completed = requested
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Have the writer thread take a snapshot now and wait for it.
+
+        Must not be called while holding ``lock``.
+        """
+        with self._cond:
+            self._snapshot_requested += 1
+            target = self._snapshot_requested
+            self._cond.notify_all()
+            while self._snapshot_completed < target and not self._closed:
+                self._cond.wait()
+
+    def close(self):
+        """Write out and fsync every queued record, then stop the writer."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self._file.close()
@@ -1,5 +1,8 @@
-from dataclasses import dataclass, field, asdict
-from typing import List, Optional
+import sys
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 from .types import ContentType
 
 @dataclass
@@ -8,6 +11,9 @@ class Revision:
     last_updated: str
     attributes: dict = field(default_factory=dict)
 
+    def to_dict(self):
+        return {"uuid": self.uuid, "last_updated": self.last_updated, "attributes": dict(self.attributes)}
+
 
 @dataclass
 class Category:
@@ -16,6 +22,14 @@ class Category:
     display_priority: int = 0
     archived: bool = False
 
+    def to_dict(self):
+        return {
+            "uuid": self.uuid,
+            "name": self.name,
+            "display_priority": self.display_priority,
+            "archived": self.archived,
+        }
+
 @dataclass
 class Content:
     uuid: str
@@ -40,11 +54,31 @@ class Content:
         """Return True when approval has been requested but not yet granted."""
         return self.draft_requested_by is not None and self.approved_at is None
 
+    def _as_dict(self, revisions: list) -> dict:
+        # Built field by field instead of through ``dataclasses.asdict``,
+        # which deep-copies every revision and attribute value.
+        return {
+            "uuid": self.uuid,
+            "title": self.title,
+            "type": self.type.value,
+            "created_by": self.created_by,
+            "created_at": self.created_at,
+            "edited_by": self.edited_by,
+            "edited_at": self.edited_at,
+            "draft_requested_by": self.draft_requested_by,
+            "draft_requested_at": self.draft_requested_at,
+            "approved_by": self.approved_by,
+            "approved_at": self.approved_at,
+            "timestamps": self.timestamps,
+            "revisions": revisions,
+            "published_revision": self.published_revision,
+            "review_revision": self.review_revision,
+            "categories": list(self.categories),
+            "review_requested": self.review_requested,
+        }
+
     def to_dict(self):
-        data = asdict(self)
-        data["type"] = self.type.value
-        data["review_requested"] = self.review_requested
-        return data
+        return self._as_dict([rev.to_dict() for rev in self.revisions])
 
 @dataclass
 class HTMLContent(Content):
@@ -61,3 +95,299 @@ class OfficeAddressContent(Content):
 @dataclass
 class EventScheduleContent(Content):
     type: ContentType = field(default=ContentType.EVENT_SCHEDULE, init=False)
+
+
+# Value of a record slot whose key is absent.
+_ABSENT = object()
+# Distinct key sequences that get their own AttributeRecord subclass; later
+# ones keep every key in the overflow dict.
+MAX_RECORD_CLASSES = 256
+
+
+class _Record(MutableMapping):
+    """Slotted mapping used for the items of the live store.
+
+    The keys a subclass lists in ``__slots__`` live in slots, so a record
+    carries no per-instance key table; any other key goes to an overflow
+    dict that is only allocated when needed.  Records behave like the plain
+    dicts they replace, except that iteration follows slot order.
+    """
+
+    __slots__ = ("_extra",)
+    _fields: Tuple[str, ...] = ()
+    _field_set: FrozenSet[str] = frozenset()
+    # Reads every slot in one call; set for each subclass.
+    _values: Callable = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__slots__)
+        cls._field_set = frozenset(cls._fields)
+        if len(cls._fields) > 1:
+            cls._values = staticmethod(attrgetter(*cls._fields))
+        elif cls._fields:
+            # attrgetter only returns a tuple for two or more names
+            get = attrgetter(cls._fields[0])
+            cls._values = staticmethod(lambda record: (get(record),))
+        else:
+            cls._values = staticmethod(lambda record: ())
+
+    def __init__(self, data: Optional[Mapping] = None):
+        self._extra = None
+        get = data.get if data else {}.get
+        for name in self._fields:
+            setattr(self, name, get(name, _ABSENT))
+        if data and not self._field_set.issuperset(data):
+            self._extra = {k: v for k, v in data.items() if k not in self._field_set}
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not _ABSENT:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            value = getattr(self, key)
+            return default if value is _ABSENT else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return getattr(self, key) is not _ABSENT
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set:
+            if getattr(self, key) is _ABSENT:
+                raise KeyError(key)
+            setattr(self, key, _ABSENT)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+        else:
+            raise KeyError(key)
+
+    def _pairs(self):
+        values = self._values(self)
+        if not self._extra and _ABSENT not in values:
+            # the common case for attribute records: every slot is set
+            return zip(self._fields, values)
+        return self._present_pairs(values)
+
+    def _present_pairs(self, values):
+        for name, value in zip(self._fields, values):
+            if value is not _ABSENT:
+                yield name, value
+        if self._extra:
+            yield from self._extra.items()
+
+    def __iter__(self):
+        for name, _ in self._pairs():
+            yield name
+
+    def __len__(self):
+        present = sum(1 for value in self._values(self) if value is not _ABSENT)
+        return present + (len(self._extra) if self._extra else 0)
+
+    def items(self):
+        return _RecordItems(self)
+
+    def values(self):
+        return _RecordValues(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def copy(self):
+        """Return a shallow copy, like ``dict.copy``."""
+        record = object.__new__(type(self))
+        for name in self._fields:
+            setattr(record, name, getattr(self, name))
+        record._extra = dict(self._extra) if self._extra else None
+        return record
+
+    def to_dict(self) -> Dict:
+        """Return the record as a plain dict; nested records are kept."""
+        data = {name: value for name, value in zip(self._fields, self._values(self)) if value is not _ABSENT}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+
+class _RecordItems(ItemsView):
+    """``items()`` of a record, read straight from its slots."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        return self._mapping._pairs()
+
+
+class _RecordValues(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self):
+        for _, value in self._mapping._pairs():
+            yield value
+
+
+def _interned(mapping: Dict) -> Dict:
+    return {sys.intern(key) if type(key) is str else key: value for key, value in mapping.items()}
+
+
+class AttributeRecord(_Record):
+    """Stored form of revision attributes and of the parts of a delta.
+
+    Every distinct key sequence gets its own subclass with one slot per
+    key, so a record costs a few words per value instead of a dict's hash
+    table.  Attribute keys come from the type schemas, so there are only a
+    handful of subclasses.  Keys that cannot be slots (not identifiers, or
+    names the class already uses) go to the overflow dict, as do all keys
+    of a sequence first seen after ``MAX_RECORD_CLASSES`` subclasses exist,
+    so clients sending arbitrary keys cannot grow the class cache without
+    bound.
+    """
+
+    __slots__ = ()
+    # key sequence -> subclass
+    _classes: Dict[Tuple[str, ...], type] = {}
+
+    @staticmethod
+    def _slot_name(key) -> bool:
+        return type(key) is str and key.isidentifier() and not key.startswith("_") and not hasattr(AttributeRecord, key)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "AttributeRecord":
+        if isinstance(data, AttributeRecord):
+            return data
+        keys = tuple(key for key in data if AttributeRecord._slot_name(key))
+        record_class = AttributeRecord._classes.get(keys)
+        if record_class is None:
+            if len(AttributeRecord._classes) >= MAX_RECORD_CLASSES:
+                # The base class has no slots, so every key overflows.
+                record_class = AttributeRecord
+            else:
+                record_class = AttributeRecord._classes.setdefault(
+                    keys, type("AttributeRecord", (AttributeRecord,), {"__slots__": keys})
+                )
+        record = record_class(data)
+        if record._extra:
+            record._extra = _interned(record._extra)
+        return record
+
+
+class DeltaRecord(_Record):
+    """Stored form of a revision delta (see ``cms.revisions.diff_attributes``)."""
+
+    __slots__ = ("set", "patch", "unset")
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "DeltaRecord":
+        record = cls(data)
+        for part in ("set", "patch"):
+            value = getattr(record, part)
+            if type(value) is dict:
+                setattr(record, part, AttributeRecord.from_dict(value))
+        return record
+
+
+class RevisionRecord(_Record):
+    """Stored form of a :class:`Revision`, full or delta-encoded."""
+
+    __slots__ = tuple(f.name for f in fields(Revision)) + ("delta",)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "RevisionRecord":
+        """Return ``data`` as a record, its attributes and delta as records too."""
+        record = data if isinstance(data, cls) else cls(data)
+        attributes = record.attributes
+        if type(attributes) is dict:
+            record.attributes = AttributeRecord.from_dict(attributes)
+        delta = record.delta
+        if type(delta) is dict:
+            record.delta = DeltaRecord.from_dict(delta)
+        return record
+
+
+class CategoryRecord(_Record):
+    """Stored form of a :class:`Category`."""
+
+    __slots__ = tuple(f.name for f in fields(Category))
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "CategoryRecord":
+        return data if isinstance(data, cls) else cls(data)
+
+
+# References to users repeat across items; interning shares the strings.
+_USER_FIELDS = ("created_by", "edited_by", "draft_requested_by", "approved_by")
+# Flags the services compute on every read; stored copies would go stale.
+_DERIVED_FIELDS = ("is_published", "review_requested")
+
+
+class ContentRecord(_Record):
+    """Stored form of a :class:`Content` item.
+
+    ``type`` holds the :class:`ContentType` member (a ``str``) and every
+    revision is a :class:`RevisionRecord`.
+    """
+
+    __slots__ = tuple(f.name for f in fields(Content))
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "ContentRecord":
+        """Return ``data`` as a record, converting nested revisions in place.
+
+        A record is returned as is once any revisions appended to it since
+        it was stored have been converted.
+        """
+        record = data if isinstance(data, cls) else cls(data)
+        if record._extra is not None:
+            for name in _DERIVED_FIELDS:
+                record.pop(name, None)
+        item_type = record.type
+        if type(item_type) is str:
+            try:
+                record.type = ContentType(item_type)
+            except ValueError:
+                pass
+        for name in _USER_FIELDS:
+            value = getattr(record, name)
+            if type(value) is str:
+                setattr(record, name, sys.intern(value))
+        revisions = record.revisions
+        if type(revisions) is list:
+            for position, rev in enumerate(revisions):
+                if not isinstance(rev, RevisionRecord) and isinstance(rev, Mapping):
+                    revisions[position] = RevisionRecord.from_dict(rev)
+        return record
+
+
+def json_default(obj):
+    """``default`` hook letting ``json`` encode store records and models.
+
+    Models are handed to the encoder one level at a time, so nested
+    revisions are encoded straight from the :class:`Revision` objects.
+    """
+    if isinstance(obj, Content):
+        return obj._as_dict(obj.revisions)
+    if isinstance(obj, Revision):
+        return {"uuid": obj.uuid, "last_updated": obj.last_updated, "attributes": obj.attributes}
+    if isinstance(obj, (_Record, Category)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,142 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .indexes import ContentIndex, _remove_key
+from .revisions import attributes_at
+
+_POSTAL_NOISE = re.compile(r"[\s\-]")
+_PHONE_NOISE = re.compile(r"[^\d+]")
+
+
+def normalize_postal_code(value) -> str:
+    """Upper-case ``value`` and drop spaces and hyphens (``"123-4567"`` -> ``"1234567"``)."""
+    return _POSTAL_NOISE.sub("", value).upper() if isinstance(value, str) else ""
+
+
+def normalize_phone(value) -> str:
+    """Keep only the digits of ``value`` and a leading ``+``."""
+    if not isinstance(value, str):
+        return ""
+    digits = _PHONE_NOISE.sub("", value)
+    return digits[:1] + digits[1:].replace("+", "")
+
+
+def normalize_email(value) -> str:
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+def _add(table: Dict[str, Set[str]], value: str, uuid: str):
+    if value:
+        table.setdefault(value, set()).add(uuid)
+
+
+def _discard(table: Dict[str, Set[str]], value: str, uuid: str):
+    if value:
+        uuids = table[value]
+        uuids.discard(uuid)
+        if not uuids:
+            del table[value]
+
+
+class OfficeIndex(ContentIndex):
+    """Postal code, phone and email lookups over published office addresses.
+
+    Postal codes are kept as sorted ``(postal_code, uuid)`` keys, so a
+    prefix lookup is one bisection plus the matching keys; phones and emails
+    map straight to their items.  Values are normalised on both sides (see
+    ``normalize_postal_code``, ``normalize_phone``, ``normalize_email``) and
+    read from each item's published revision, found through
+    ``revision_position`` (``DbContext.revision_position``).
+    """
+
+    def __init__(self, revision_position: Callable[[Dict, Optional[str]], Optional[int]], item_type: str):
+        self._position = revision_position
+        self._type = item_type
+        self.clear()
+
+    def clear(self):
+        self._postal_codes: List[Tuple[str, str]] = []
+        self._phones: Dict[str, Set[str]] = {}
+        self._emails: Dict[str, Set[str]] = {}
+        # uuid -> (postal_code, phone, email) as last indexed
+        self._entries: Dict[str, Tuple[str, str, str]] = {}
+
+    def _entry(self, item: Dict) -> Optional[Tuple[str, str, str]]:
+        if item.get("type") != self._type:
+            return None
+        position = self._position(item, item.get("published_revision"))
+        if position is None:
+            return None
+        attrs = attributes_at(item["revisions"], position)
+        return (
+            normalize_postal_code(attrs.get("postal_code")),
+            normalize_phone(attrs.get("phone")),
+            normalize_email(attrs.get("email")),
+        )
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        entry = self._entry(item)
+        previous = self._entries.get(uuid)
+        if previous == entry:
+            return
+        if previous is not None:
+            if previous[0]:
+                _remove_key(self._postal_codes, (previous[0], uuid))
+            _discard(self._phones, previous[1], uuid)
+            _discard(self._emails, previous[2], uuid)
+            del self._entries[uuid]
+        if entry is not None:
+            if entry[0]:
+                insort(self._postal_codes, (entry[0], uuid))
+            _add(self._phones, entry[1], uuid)
+            _add(self._emails, entry[2], uuid)
+            self._entries[uuid] = entry
+
+    def _prefix_keys(self, prefix: str, after) -> Iterable[Tuple[str, str]]:
+        keys = self._postal_codes
+        start = bisect_left(keys, (prefix,))
+        if after is not None:
+            start = max(start, bisect_right(keys, after))
+        for position in range(start, len(keys)):
+            key = keys[position]
+            if not key[0].startswith(prefix):
+                return
+            yield key
+
+    def lookup(
+        self,
+        postal_code: Optional[str] = None,
+        phone: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 100,
+        after=None,
+    ) -> Tuple[List[str], Optional[Tuple[str, str]]]:
+        """Return up to ``limit`` matching uuids and the key to resume after.
+
+        ``postal_code`` matches as a prefix, ``phone`` and ``email``
+        exactly; every given criterion must match.  Results are ordered by
+        ``(postal_code, uuid)`` and ``after`` resumes just past such a key.
+        """
+        prefix = normalize_postal_code(postal_code) if postal_code is not None else None
+        exact = []
+        if phone is not None:
+            exact.append(self._phones.get(normalize_phone(phone), set()))
+        if email is not None:
+            exact.append(self._emails.get(normalize_email(email), set()))
+        if exact:
+            uuids = set.intersection(*exact)
+            keys = sorted((self._entries[uuid][0], uuid) for uuid in uuids)
+            keys = [
+                key for key in keys
+                if (prefix is None or key[0].startswith(prefix)) and (after is None or key > after)
+            ]
+        else:
+            keys = []
+            for key in self._prefix_keys(prefix or "", after):
+                keys.append(key)
+                if len(keys) > limit:
+                    break
+        next_key = keys[limit - 1] if len(keys) > limit else None
+        return [uuid for _, uuid in keys[:limit]], next_key
@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Page size used when a request sends ``cursor`` without ``limit``.
+DEFAULT_PAGE_SIZE = 100
+# Upper bound on ``limit`` so one request cannot ask for the whole store.
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Return an opaque cursor for a ``(created_at, uuid)`` listing key."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Invert :func:`encode_cursor`, raising ``ValueError`` on bad input."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("invalid cursor")
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(k, str) for k in key)):
+        raise ValueError("invalid cursor")
+    return tuple(key)
+
+
+def page_params(query: Dict[str, List[str]]) -> Optional[Tuple[int, Optional[Tuple[str, str]]]]:
+    """Return ``(limit, after_key)`` from parsed query parameters.
+
+    ``None`` means the request did not ask for pagination.  Raises
+    ``ValueError`` for a malformed ``limit`` or ``cursor``.
+    """
+    if "limit" not in query and "cursor" not in query:
+        return None
+    limit = DEFAULT_PAGE_SIZE
+    if "limit" in query:
+        try:
+            limit = int(query["limit"][0])
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, MAX_PAGE_SIZE)
+    after = decode_cursor(query["cursor"][0]) if "cursor" in query else None
+    return limit, after
@@ -0,0 +1,42 @@
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+# Accepted values of the ``revisions`` query parameter.
+REVISION_MODES = ("all", "latest", "published", "none")
+
+
+class ItemView(NamedTuple):
+    """Which parts of a content item a response includes.
+
+    ``fields`` of ``None`` keeps every top-level field, flags included.
+    ``revisions`` selects what the ``revisions`` field holds: every
+    revision, only the newest, only the published one, or nothing (the
+    field is left out).
+    """
+
+    fields: Optional[FrozenSet[str]] = None
+    revisions: str = "all"
+
+    def wants(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+
+FULL_VIEW = ItemView()
+
+
+def view_params(query: Dict[str, List[str]]) -> ItemView:
+    """Return the :class:`ItemView` asked for by parsed query parameters.
+
+    ``fields`` is a comma separated list and may be repeated.  Raises
+    ``ValueError`` for an unknown ``revisions`` value.
+    """
+    fields = None
+    if "fields" in query:
+        fields = frozenset(
+            name.strip() for value in query["fields"] for name in value.split(",") if name.strip()
+        )
+    revisions = query.get("revisions", ["all"])[0]
+    if revisions not in REVISION_MODES:
+        raise ValueError(f"revisions must be one of {', '.join(REVISION_MODES)}")
+    if fields is None and revisions == "all":
+        return FULL_VIEW
+    return ItemView(fields, revisions)
@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional
+
+# Every KEYFRAME_INTERVAL-th revision stores its attributes in full, so
+# reading any revision applies at most KEYFRAME_INTERVAL - 1 deltas.
+KEYFRAME_INTERVAL = 32
+
+# Strings shorter than this are stored whole; a patch would not be smaller.
+MIN_PATCH_LENGTH = 64
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Binary search on slice equality keeps the comparison in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:len(a) - lo] == b[len(b) - mid:len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _diff_text(old: str, new: str) -> Optional[list]:
+    """Return ``[prefix, suffix, middle]`` turning ``old`` into ``new``.
+
+    ``new`` is ``old[:prefix] + middle + old[len(old) - suffix:]``.  Returns
+    ``None`` when storing ``new`` whole is no larger.
+    """
+    if len(new) < MIN_PATCH_LENGTH:
+        return None
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    middle = new[prefix:len(new) - suffix]
+    if len(middle) + 16 >= len(new):
+        return None
+    return [prefix, suffix, middle]
+
+
+def _patch_text(old: str, patch: list) -> str:
+    prefix, suffix, middle = patch
+    return old[:prefix] + middle + old[len(old) - suffix:]
+
+
+def diff_attributes(old: Dict, new: Dict) -> Dict:
+    """Describe how to turn attribute dict ``old`` into ``new``.
+
+    The delta holds up to three parts: ``set`` (values stored whole),
+    ``patch`` (string edits, see :func:`_diff_text`) and ``unset`` (removed
+    keys).  Empty parts are left out.
+    """
+    delta = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        previous = old.get(key)
+        if isinstance(value, str) and isinstance(previous, str):
+            patch = _diff_text(previous, value)
+            if patch is not None:
+                delta.setdefault("patch", {})[key] = patch
+                continue
+        delta.setdefault("set", {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta["unset"] = removed
+    return delta
+
+
+def apply_delta(attrs: Dict, delta: Dict) -> Dict:
+    """Return a new attribute dict with ``delta`` applied to ``attrs``."""
+    result = dict(attrs)
+    for key in delta.get("unset", ()):
+        result.pop(key, None)
+    for key, patch in delta.get("patch", {}).items():
+        result[key] = _patch_text(result.get(key, ""), patch)
+    # items() reads stored records slot by slot instead of key by key
+    result.update(delta.get("set", {}).items())
+    return result
+
+
+def _full_revision(rev: Dict, attrs: Dict) -> Dict:
+    full = {k: v for k, v in rev.items() if k != "delta"}
+    full["attributes"] = attrs
+    return full
+
+
+def attributes_at(revisions: List[Dict], index: int) -> Dict:
+    """Reconstruct the attributes of ``revisions[index]``.
+
+    Walks back to the nearest keyframe and replays the deltas after it.
+    """
+    if index < 0:
+        index += len(revisions)
+    start = index
+    while start > 0 and "delta" in revisions[start]:
+        start -= 1
+    attrs = dict(revisions[start].get("attributes", {}).items())
+    for rev in revisions[start + 1:index + 1]:
+        attrs = apply_delta(attrs, rev["delta"])
+    return attrs
+
+
+def revision_at(revisions: List[Dict], index: int) -> Dict:
+    """Return ``revisions[index]`` with its attributes in full."""
+    return _full_revision(revisions[index], attributes_at(revisions, index))
+
+
+def latest_attributes(revisions: List[Dict]) -> Dict:
+    """Return the attributes of the newest revision, or ``{}``."""
+    return attributes_at(revisions, -1) if revisions else {}
+
+
+def decode_revisions(revisions: List[Dict]) -> List[Dict]:
+    """Return ``revisions`` with every revision's attributes in full.
+
+    Accepts encoded, plain or mixed lists; decoding a plain list copies it.
+    """
+    decoded = []
+    attrs: Dict = {}
+    for rev in revisions:
+        if "delta" in rev:
+            attrs = apply_delta(attrs, rev["delta"])
+        else:
+            attrs = dict(rev.get("attributes", {}).items())
+        decoded.append(_full_revision(rev, attrs))
+    return decoded
+
+
+def append_revision(revisions: List[Dict], rev: Dict, previous: Optional[Dict] = None, interval: int = KEYFRAME_INTERVAL):
+    """Append ``rev`` (with full ``attributes``) to an encoded history.
+
+    The revision is stored as a delta against its predecessor unless its
+    position makes it a keyframe.  ``previous`` may pass the predecessor's
+    attributes when the caller has already rebuilt them.
+    """
+    if len(revisions) % interval == 0:
+        revisions.append(rev)
+        return
+    if previous is None:
+        previous = latest_attributes(revisions)
+    stored = {k: v for k, v in rev.items() if k != "attributes"}
+    stored["delta"] = diff_attributes(previous, rev.get("attributes", {}))
+    revisions.append(stored)
+
+
+def encode_revisions(revisions: List[Dict], interval: int = KEYFRAME_INTERVAL) -> List[Dict]:
+    """Return a delta-encoded copy of ``revisions`` (plain or encoded)."""
+    encoded: List[Dict] = []
+    previous: Dict = {}
+    for rev in decode_revisions(revisions):
+        attrs = rev["attributes"]
+        if len(encoded) % interval == 0:
+            encoded.append(rev)
+        else:
+            stored = {k: v for k, v in rev.items() if k != "attributes"}
+            stored["delta"] = diff_attributes(previous, attrs)
+            encoded.append(stored)
+        previous = attrs
+    return encoded
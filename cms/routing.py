@@ -0,0 +1,147 @@
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+
+def _segment(value: str) -> str:
+    if not value:
+        raise ValueError("empty path segment")
+    return value
+
+
+def _content_type(value: str) -> str:
+    # decode any percent-encoding to allow client requests that properly
+    # escape spaces in content type values
+    return unquote(_segment(value))
+
+
+# Converters for ``<name>`` placeholders.  A converter raises ``ValueError``
+# when a segment cannot fill the placeholder, which makes the route not match.
+CONVERTERS: Dict[str, Callable[[str], object]] = {
+    "uuid": _segment,
+    "type": _content_type,
+    "str": _segment,
+}
+
+
+class Route(NamedTuple):
+    method: str
+    pattern: str
+    name: str
+    handler: str
+
+
+class _Node:
+    __slots__ = ("static", "param", "routes")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        # (parameter name, converter, child node)
+        self.param: Optional[Tuple[str, Callable[[str], object], "_Node"]] = None
+        self.routes: Dict[str, Route] = {}
+
+
+class Router:
+    """Match request paths against a precompiled segment trie.
+
+    Patterns are slash separated; a segment written as ``<kind>`` or
+    ``<kind:name>`` captures that segment through ``CONVERTERS[kind]`` and
+    passes it to the handler as keyword argument ``name`` (``kind`` when no
+    name is given).  Literal segments take precedence over placeholders.
+    Each route carries a ``name`` that identifies it in logs and metrics.
+    """
+
+    def __init__(self, routes: Iterable[Tuple[str, str, str, str]] = ()):
+        self._root = _Node()
+        self._routes = []
+        # Fully literal routes skip the trie walk entirely.
+        self._static: Dict[Tuple[str, str], Route] = {}
+        for method, pattern, name, handler in routes:
+            self.add(method, pattern, name, handler)
+
+    @staticmethod
+    def _split(path: str):
+        return path.split("/")[1:] if path.startswith("/") else None
+
+    def add(self, method: str, pattern: str, name: str, handler: str) -> Route:
+        segments = self._split(pattern)
+        if segments is None:
+            raise ValueError(f"route pattern must start with '/': {pattern!r}")
+        node = self._root
+        for seg in segments:
+            if seg.startswith("<") and seg.endswith(">"):
+                kind, _, param = seg[1:-1].partition(":")
+                param = param or kind
+                if kind not in CONVERTERS:
+                    raise ValueError(f"unknown converter {kind!r} in {pattern!r}")
+                if node.param is None:
+                    node.param = (param, CONVERTERS[kind], _Node())
+                elif node.param[0] != param or node.param[1] is not CONVERTERS[kind]:
+                    raise ValueError(f"conflicting placeholder in {pattern!r}")
+                node = node.param[2]
+            else:
+                node = node.static.setdefault(seg, _Node())
+        if method in node.routes:
+            raise ValueError(f"duplicate route {method} {pattern}")
+        route = Route(method, pattern, name, handler)
+        node.routes[method] = route
+        if "<" not in pattern:
+            self._static[(method, pattern)] = route
+        self._routes.append(route)
+        return route
+
+    @property
+    def names(self):
+        """Return the names of all registered routes."""
+        return [route.name for route in self._routes]
+
+    def match(self, method: str, path: str):
+        """Return ``(route, params)`` for ``path`` or ``None``."""
+        route = self._static.get((method, path))
+        if route is not None:
+            return route, {}
+        segments = self._split(path)
+        if segments is None:
+            return None
+        captured = []
+        route = self._match(self._root, segments, 0, method, captured)
+        if route is None:
+            return None
+        return route, dict(captured)
+
+    def _match(self, node, segments, index, method, captured):
+        # Walk the trie once, preferring literal children.  Only when both a
+        # literal and a placeholder child exist do we recurse, so that a dead
+        # end down the literal branch can fall back to the placeholder.
+        count = len(segments)
+        while index < count:
+            seg = segments[index]
+            child = node.static.get(seg)
+            param = node.param
+            if child is not None and param is not None:
+                mark = len(captured)
+                found = self._match(child, segments, index + 1, method, captured)
+                if found is not None:
+                    return found
+                del captured[mark:]
+                child = None
+            if child is not None:
+                node = child
+            elif param is not None:
+                name, convert, node = param
+                try:
+                    captured.append((name, convert(seg)))
+                except ValueError:
+                    return None
+            else:
+                return None
+            index += 1
+        return node.routes.get(method)
+
+
+def split_target(target: str):
+    """Split a request target into ``(path, query)``."""
+    if not target.startswith("/"):
+        parsed = urlsplit(target)
+        return parsed.path, parsed.query
+    path, _, query = target.partition("?")
+    return path, query.partition("#")[0]
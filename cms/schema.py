@@ -0,0 +1,100 @@
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from .types import ContentType
+
+
+class AttributeField(NamedTuple):
+    """One revision attribute and how it moves from the item into a revision."""
+
+    name: str
+    kind: Union[type, Tuple[type, ...]]
+    # Kept on the item as well as copied into each revision.
+    keep_on_item: bool = False
+    # Must be present when the item is created.
+    required: bool = False
+
+
+# Attributes every content type has.
+COMMON_ATTRIBUTES: Tuple[AttributeField, ...] = (
+    AttributeField("title", str, keep_on_item=True, required=True),
+)
+
+# Type-specific attributes.  When an update omits one of these, the value
+# from the previous revision is carried forward.
+ATTRIBUTE_SCHEMAS: Dict[ContentType, Tuple[AttributeField, ...]] = {
+    ContentType.PDF: (
+        AttributeField("file_uuid", str),
+    ),
+    ContentType.HTML: (
+        AttributeField("html_content", str),
+    ),
+    ContentType.OFFICE_ADDRESS: (
+        AttributeField("postal_code", str),
+        AttributeField("address", str),
+        AttributeField("phone", str),
+        AttributeField("fax", str),
+        AttributeField("email", str),
+    ),
+    ContentType.EVENT_SCHEDULE: (
+        AttributeField("start", str),
+        AttributeField("end", str),
+        AttributeField("all_day", bool),
+    ),
+}
+
+# item type -> ((field, carry_forward), ...), built on first use
+_plans: Dict[Optional[str], Tuple[Tuple[AttributeField, bool], ...]] = {}
+
+
+def register_attribute_schema(content_type: ContentType, fields: Tuple[AttributeField, ...]):
+    """Set the type-specific attributes of ``content_type``."""
+    ATTRIBUTE_SCHEMAS[content_type] = tuple(fields)
+    _plans.clear()
+
+
+def _plan(item_type: Optional[str]) -> Tuple[Tuple[AttributeField, bool], ...]:
+    plan = _plans.get(item_type)
+    if plan is None:
+        # Any known attribute found on an item is moved into the revision,
+        # whatever the item's type; only the item's own type carries
+        # attributes forward.
+        own = {field.name for field in ATTRIBUTE_SCHEMAS.get(item_type, ())}
+        fields = COMMON_ATTRIBUTES + tuple(
+            field for schema in ATTRIBUTE_SCHEMAS.values() for field in schema
+        )
+        plan = _plans[item_type] = tuple((field, field.name in own) for field in fields)
+    return plan
+
+
+def _kind_name(kind) -> str:
+    if isinstance(kind, tuple):
+        return " or ".join(k.__name__ for k in kind)
+    return kind.__name__
+
+
+def extract_attributes(item: Dict, previous: Optional[Dict] = None) -> Dict:
+    """Move ``item``'s revision attributes into a new attribute dict.
+
+    Attributes are popped from ``item`` except those marked
+    ``keep_on_item``.  When ``previous`` is given, attributes of the item's
+    type that ``item`` lacks are copied from it.  Raises ``ValueError`` when
+    a value has the wrong type; ``None`` is always accepted.
+    """
+    attrs = {}
+    for field, carry in _plan(item.get("type")):
+        name = field.name
+        if name in item:
+            value = item[name] if field.keep_on_item else item.pop(name)
+            if value is not None and not isinstance(value, field.kind):
+                raise ValueError(f"{name} must be {_kind_name(field.kind)}")
+            attrs[name] = value
+        elif carry and previous and name in previous:
+            attrs[name] = previous[name]
+    return attrs
+
+
+def check_required_attributes(item: Dict):
+    """Ensure ``item`` carries every required attribute of its type."""
+    for field, _ in _plan(item.get("type")):
+        if field.required and item.get(field.name) is None:
+            raise KeyError(f"Missing required attribute: {field.name}")
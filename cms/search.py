@@ -0,0 +1,193 @@
+import html
+import math
+import re
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .indexes import ContentIndex
+from .revisions import attributes_at
+from .workflow import _get_metadata_value
+
+# A title word counts as much as this many body words.
+TITLE_WEIGHT = 3
+# Queries whose ranked results are kept until the index next changes.
+MAX_RANKED_QUERIES = 64
+
+_SKIPPED = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]*>")
+_WORD = re.compile(r"\w+")
+
+
+def strip_tags(markup: str) -> str:
+    """Return the text of ``markup`` without tags, scripts or styles."""
+    return html.unescape(_TAG.sub(" ", _SKIPPED.sub(" ", markup)))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into lower-case words."""
+    return _WORD.findall(text.lower())
+
+
+def _term_weights(attrs: Dict) -> Dict[str, float]:
+    counts: Dict[str, int] = {}
+    title = attrs.get("title")
+    if isinstance(title, str):
+        for term in tokenize(title):
+            counts[term] = counts.get(term, 0) + TITLE_WEIGHT
+    body = attrs.get("html_content")
+    if isinstance(body, str):
+        for term in tokenize(strip_tags(body)):
+            counts[term] = counts.get(term, 0) + 1
+    # Damped so a word repeated many times does not swamp the others.
+    return {term: 1.0 + math.log(count) for term, count in counts.items()}
+
+
+def searched_revisions(item: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """Return the uuids of the revisions anonymous and authenticated searches add.
+
+    The second is the review revision or, for an item that has never been
+    sent to review or approved, its latest revision, so a new item can be
+    found as soon as it is created.  Archiving clears both pointers, and an
+    approved item that was archived is not searched.
+    """
+    review_uuid = item.get("review_revision")
+    if review_uuid is None and item.get("published_revision") is None:
+        revisions = item.get("revisions")
+        if revisions and _get_metadata_value(item, "approved_at") is None:
+            review_uuid = revisions[-1]["uuid"]
+    return item.get("published_revision"), review_uuid
+
+
+class _Postings:
+    """Inverted index from term to ``{uuid: weight}``.
+
+    The ranked keys of the last ``MAX_RANKED_QUERIES`` queries are kept
+    until a document changes, so paging through the results of a query
+    scores and sorts its matches once.
+    """
+
+    def __init__(self):
+        self.terms: Dict[str, Dict[str, float]] = {}
+        # uuid -> {term: weight} as last indexed
+        self.documents: Dict[str, Dict[str, float]] = {}
+        # sorted query terms -> sorted (-score, uuid) keys
+        self._ranked: Dict[Tuple[str, ...], List[Tuple[float, str]]] = {}
+
+    def set(self, uuid: str, weights: Dict[str, float]):
+        previous = self.documents.get(uuid, {})
+        if previous == weights:
+            return
+        # Any change moves the scores, which depend on the document count.
+        self._ranked.clear()
+        for term in previous.keys() - weights.keys():
+            postings = self.terms[term]
+            del postings[uuid]
+            if not postings:
+                del self.terms[term]
+        for term, weight in weights.items():
+            if previous.get(term) != weight:
+                self.terms.setdefault(term, {})[uuid] = weight
+        if weights:
+            self.documents[uuid] = weights
+        else:
+            self.documents.pop(uuid, None)
+
+    def scores(self, terms: List[str]) -> Dict[str, float]:
+        """Score the documents containing every one of ``terms``."""
+        postings = []
+        for term in set(terms):
+            found = self.terms.get(term)
+            if found is None:
+                return {}
+            postings.append(found)
+        if not postings:
+            return {}
+        postings.sort(key=len)
+        total = len(self.documents)
+        idfs = [math.log(1 + total / len(found)) for found in postings]
+        rarest, others = postings[0], list(zip(postings[1:], idfs[1:]))
+        first_idf = idfs[0]
+        if not others:
+            return {uuid: first_idf * weight for uuid, weight in rarest.items()}
+        scores = {}
+        for uuid, weight in rarest.items():
+            score = first_idf * weight
+            for found, idf in others:
+                other = found.get(uuid)
+                if other is None:
+                    break
+                score += idf * other
+            else:
+                scores[uuid] = score
+        return scores
+
+    def ranked(self, terms: List[str]) -> List[Tuple[float, str]]:
+        """Return the ``(-score, uuid)`` keys of the documents matching ``terms``, sorted."""
+        query = tuple(sorted(set(terms)))
+        keys = self._ranked.get(query)
+        if keys is None:
+            keys = sorted((-score, uuid) for uuid, score in self.scores(terms).items())
+            if len(self._ranked) >= MAX_RANKED_QUERIES:
+                del self._ranked[next(iter(self._ranked))]
+            self._ranked[query] = keys
+        return keys
+
+
+class SearchIndex(ContentIndex):
+    """Full-text index over the ``title`` and ``html_content`` of items.
+
+    Anonymous searches see the text of each item's published revision;
+    authenticated searches also see its review or draft revision (see
+    ``searched_revisions``).  Revisions are
+    found through ``revision_position`` (``DbContext.revision_position``),
+    and an item is only re-tokenized when its published or review revision
+    changes.
+    """
+
+    def __init__(self, revision_position: Callable[[Dict, Optional[str]], Optional[int]]):
+        self._position = revision_position
+        self.clear()
+
+    def clear(self):
+        self._public = _Postings()
+        self._all = _Postings()
+        # uuid -> (published_revision, review_revision) as last indexed
+        self._sources: Dict[str, Tuple] = {}
+
+    def _weights(self, item: Dict, rev_uuid: Optional[str]) -> Dict[str, float]:
+        position = self._position(item, rev_uuid)
+        if position is None:
+            return {}
+        return _term_weights(attributes_at(item["revisions"], position))
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        sources = searched_revisions(item)
+        published_uuid, review_uuid = sources
+        if self._sources.get(uuid) == sources:
+            return
+        published = self._weights(item, published_uuid)
+        combined = published
+        if review_uuid != published_uuid:
+            review = self._weights(item, review_uuid)
+            if review:
+                combined = dict(published)
+                for term, weight in review.items():
+                    if weight > combined.get(term, 0.0):
+                        combined[term] = weight
+        self._public.set(uuid, published)
+        self._all.set(uuid, combined)
+        self._sources[uuid] = sources
+
+    def search(self, query: str, published_only: bool, limit: int, after=None) -> Tuple[List[str], Optional[Tuple[float, str]]]:
+        """Return up to ``limit`` matching uuids, best first, and the key to resume after.
+
+        Every word of ``query`` must match.  Results are ordered by the key
+        ``(-score, uuid)``; ``after`` resumes just past such a key.
+        """
+        postings = self._public if published_only else self._all
+        keys = postings.ranked(tokenize(query))
+        start = bisect_right(keys, after) if after is not None else 0
+        found = keys[start:start + limit + 1]
+        next_key = found[limit - 1] if len(found) > limit else None
+        return [uuid for _, uuid in found[:limit]], next_key
@@ -1,23 +1,52 @@
+import functools
+import json
 import uuid
-from typing import Dict, List
-
-from .types import ContentType
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .db_context import DbContext
+from .models import json_default
+from .projection import FULL_VIEW, ItemView
+from .revisions import append_revision, decode_revisions, encode_revisions, latest_attributes, revision_at
+from .schema import extract_attributes
 from .workflow import (
     check_required_metadata,
     request_approval,
     start_draft,
     archive_content,
     approve_content,
-    pending_approvals,
 )
 
 
+_encode_json = json.JSONEncoder(default=json_default).encode
+
+
+def _synchronized(method):
+    """Run a service method while holding the context lock.
+
+    Once the lock is released the context gets a chance to make the call's
+    writes durable, so waiting on disk never blocks other callers.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.ctx.lock:
+            result = method(self, *args, **kwargs)
+        self.ctx.commit()
+        return result
+
+    return wrapper
+
+
 class CategoryService:
     def __init__(self, ctx: DbContext):
         self.ctx = ctx
 
+    def version(self) -> str:
+        """Return a tag that changes whenever any category changes."""
+        return f"{self.ctx.versions.epoch}-g{self.ctx.category_version}"
+
+    @_synchronized
     def list_categories(self) -> List[Dict]:
         def sort_key(cat):
             prio = cat.get("display_priority", 0)
@@ -29,9 +58,11 @@ class CategoryService:
         categories.sort(key=sort_key)
         return categories
 
+    @_synchronized
     def get_category(self, uuid: str) -> Dict:
         return self.ctx.categories.get(uuid)
 
+    @_synchronized
     def create_category(self, data: Dict) -> Dict:
         cat_uuid = data.get("uuid") or str(uuid.uuid4())
         category = {
@@ -40,9 +71,10 @@ class CategoryService:
             "display_priority": int(data.get("display_priority", 0)),
             "archived": False,
         }
-        self.ctx.categories[cat_uuid] = category
+        self.ctx.save_category(category)
         return category
 
+    @_synchronized
     def update_category(self, uuid: str, data: Dict) -> Dict:
         existing = self.ctx.categories.get(uuid)
         if existing is None:
@@ -52,14 +84,15 @@ class CategoryService:
             "name": data.get("name", existing.get("name")),
             "display_priority": int(data.get("display_priority", existing.get("display_priority", 0))),
         })
-        self.ctx.categories[uuid] = updated
+        self.ctx.save_category(updated)
         return updated
 
+    @_synchronized
     def archive_category(self, uuid: str) -> Dict:
         cat = self.ctx.categories.get(uuid)
         if cat is not None:
             cat["archived"] = True
-            self.ctx.categories[uuid] = cat
+            self.ctx.save_category(cat)
         return cat
 
 
@@ -67,60 +100,217 @@ class ContentService:
     def __init__(self, ctx: DbContext):
         self.ctx = ctx
 
-    def _with_flags(self, item: Dict) -> Dict:
-        result = item.copy()
-        result["is_published"] = bool(result.get("published_revision"))
-        result["review_requested"] = bool(result.get("draft_requested_by")) and not bool(result.get("approved_at"))
+    def _with_flags(self, item: Dict, view: ItemView = FULL_VIEW) -> Dict:
+        """Return the response form of ``item`` restricted to ``view``.
+
+        Only requested fields are copied, and only the requested revisions
+        are decoded.
+        """
+        if view.fields is None:
+            # ``items()`` keeps this a C-level copy for stored records too.
+            result = dict(item.items())
+        else:
+            result = {k: v for k, v in item.items() if k in view.fields}
+        revisions = result.get("revisions")
+        if view.revisions == "none":
+            result.pop("revisions", None)
+        elif revisions:
+            if view.revisions == "all":
+                result["revisions"] = decode_revisions(revisions)
+            elif view.revisions == "latest":
+                result["revisions"] = [revision_at(revisions, -1)]
+            else:
+                published = self._revision(item, item.get("published_revision"))
+                result["revisions"] = [published] if published else []
+        if view.wants("is_published"):
+            result["is_published"] = bool(item.get("published_revision"))
+        if view.wants("review_requested"):
+            result["review_requested"] = bool(item.get("draft_requested_by")) and not bool(item.get("approved_at"))
         return result
 
-    def list_all(self, authenticated: bool) -> List[Dict]:
-        return [
-            self._with_flags(item)
-            for item in self.ctx.contents.values()
-            if authenticated or bool(item.get("published_revision"))
-        ]
+    def _encoded(self, item: Dict, view: ItemView = FULL_VIEW) -> bytes:
+        """Return ``_with_flags(item, view)`` encoded as JSON.
+
+        Full views are kept in ``ctx.rendered_items`` until the item is
+        saved again, so the flags and the response are built once per
+        change rather than on every read.
+        """
+        cache = self.ctx.rendered_items
+        if cache is None or view != FULL_VIEW:
+            return _encode_json(self._with_flags(item, view)).encode()
+        body = cache.get(item["uuid"])
+        if body is None:
+            body = _encode_json(self._with_flags(item)).encode()
+            cache.put(item["uuid"], body)
+        return body
+
+    def version(self, uuid: Optional[str] = None, item_type: Optional[str] = None) -> str:
+        """Return a tag that changes whenever the given data changes.
+
+        With ``uuid`` it covers that item; otherwise the listing of
+        ``item_type`` (every type when ``None``).  Tags from different
+        processes never collide.
+        """
+        versions = self.ctx.versions
+        if uuid is not None:
+            return f"{versions.epoch}-i{versions.item(uuid)}"
+        return f"{versions.epoch}-c{versions.collection(item_type)}"
+
+    @_synchronized
+    def list_all(self, authenticated: bool, view: ItemView = FULL_VIEW) -> List[Dict]:
+        published = None if authenticated else True
+        return [self._with_flags(item, view) for item in self.ctx.iter_contents(published=published)]
 
-    def list_by_type(self, item_type: str, authenticated: bool) -> List[Dict]:
+    @_synchronized
+    def list_by_type(self, item_type: str, authenticated: bool, view: ItemView = FULL_VIEW) -> List[Dict]:
+        published = None if authenticated else True
         return [
-            self._with_flags(i)
-            for i in self.ctx.contents.values()
-            if i.get("type") == item_type
-            and (authenticated or bool(i.get("published_revision")))
+            self._with_flags(item, view)
+            for item in self.ctx.iter_contents(item_type, published=published)
         ]
 
-    def get(self, uuid: str) -> Dict:
+    @_synchronized
+    def page(self, item_type: Optional[str], authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[Dict], Optional[tuple]]:
+        """Return one page of listed items and the key to resume after.
+
+        Items are ordered by ``(created_at, uuid)``; ``item_type`` of ``None``
+        lists every type.
+        """
+        published = None if authenticated else True
+        items, next_key = self.ctx.page_contents(limit, item_type, published, after)
+        return [self._with_flags(item, view) for item in items], next_key
+
+    @_synchronized
+    def page_encoded(self, item_type: Optional[str], authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[bytes], Optional[tuple]]:
+        """Like :meth:`page`, with every item already encoded as JSON."""
+        published = None if authenticated else True
+        items, next_key = self.ctx.page_contents(limit, item_type, published, after)
+        return [self._encoded(item, view) for item in items], next_key
+
+    @_synchronized
+    def page_category(self, category: str, authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Optional[Tuple[List[Dict], Optional[tuple]]]:
+        """Return one page of the items in ``category``, like :meth:`page`.
+
+        Returns ``None`` when the category does not exist or is archived.
+        """
+        cat = self.ctx.categories.get(category)
+        if cat is None or cat.get("archived"):
+            return None
+        published = None if authenticated else True
+        items, next_key = self.ctx.page_category(category, limit, published, after)
+        return [self._with_flags(item, view) for item in items], next_key
+
+    @_synchronized
+    def page_category_encoded(self, category: str, authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Optional[Tuple[List[bytes], Optional[tuple]]]:
+        """Like :meth:`page_category`, with every item already encoded as JSON."""
+        cat = self.ctx.categories.get(category)
+        if cat is None or cat.get("archived"):
+            return None
+        published = None if authenticated else True
+        items, next_key = self.ctx.page_category(category, limit, published, after)
+        return [self._encoded(item, view) for item in items], next_key
+
+    def stream_encoded(self, item_type: Optional[str], authenticated: bool, batch_size: int = 256, view: ItemView = FULL_VIEW) -> Iterator[bytes]:
+        """Like :meth:`stream`, with every item already encoded as JSON."""
+        after = None
+        while True:
+            items, after = self.page_encoded(item_type, authenticated, batch_size, after, view)
+            yield from items
+            if after is None:
+                return
+
+    def stream(self, item_type: Optional[str], authenticated: bool, batch_size: int = 256, view: ItemView = FULL_VIEW) -> Iterator[Dict]:
+        """Yield listed items one at a time, in the same order as :meth:`page`.
+
+        Items are fetched in batches of ``batch_size``, each under the lock,
+        so memory stays bounded and writers are never blocked for the whole
+        listing.
+        """
+        after = None
+        while True:
+            items, after = self.page(item_type, authenticated, batch_size, after, view)
+            yield from items
+            if after is None:
+                return
+
+    @_synchronized
+    def search(self, query: str, authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[Dict], Optional[tuple]]:
+        """Return one page of items matching ``query``, best match first.
+
+        Anonymous callers only match published text.  ``after`` and the
+        returned key are ``(-score, uuid)`` pairs; see
+        :meth:`SearchIndex.search <cms.search.SearchIndex.search>`.
+        """
+        uuids, next_key = self.ctx.search_index.search(query, not authenticated, limit, after)
+        return [self._with_flags(self.ctx.contents[uuid], view) for uuid in uuids], next_key
+
+    @_synchronized
+    def search_encoded(self, query: str, authenticated: bool, limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[bytes], Optional[tuple]]:
+        """Like :meth:`search`, with every item already encoded as JSON."""
+        uuids, next_key = self.ctx.search_index.search(query, not authenticated, limit, after)
+        return [self._encoded(self.ctx.contents[uuid], view) for uuid in uuids], next_key
+
+    @_synchronized
+    def events(self, start: Optional[datetime] = None, end: Optional[datetime] = None, view: ItemView = FULL_VIEW) -> List[Dict]:
+        """Return published events overlapping ``[start, end]``, earliest first.
+
+        See :meth:`EventIndex.overlapping <cms.events.EventIndex.overlapping>`.
+        """
+        uuids = self.ctx.event_index.overlapping(start, end)
+        return [self._with_flags(self.ctx.contents[uuid], view) for uuid in uuids]
+
+    @_synchronized
+    def events_encoded(self, start: Optional[datetime] = None, end: Optional[datetime] = None, view: ItemView = FULL_VIEW) -> List[bytes]:
+        """Like :meth:`events`, with every item already encoded as JSON."""
+        uuids = self.ctx.event_index.overlapping(start, end)
+        return [self._encoded(self.ctx.contents[uuid], view) for uuid in uuids]
+
+    @_synchronized
+    def lookup_offices(self, criteria: Dict[str, str], limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[Dict], Optional[tuple]]:
+        """Return one page of published office addresses matching ``criteria``.
+
+        ``criteria`` holds any of ``postal_code`` (a prefix), ``phone`` and
+        ``email``; see :meth:`OfficeIndex.lookup <cms.offices.OfficeIndex.lookup>`.
+        """
+        uuids, next_key = self.ctx.office_index.lookup(limit=limit, after=after, **criteria)
+        return [self._with_flags(self.ctx.contents[uuid], view) for uuid in uuids], next_key
+
+    @_synchronized
+    def lookup_offices_encoded(self, criteria: Dict[str, str], limit: int, after=None, view: ItemView = FULL_VIEW) -> Tuple[List[bytes], Optional[tuple]]:
+        """Like :meth:`lookup_offices`, with every item already encoded as JSON."""
+        uuids, next_key = self.ctx.office_index.lookup(limit=limit, after=after, **criteria)
+        return [self._encoded(self.ctx.contents[uuid], view) for uuid in uuids], next_key
+
+    @_synchronized
+    def get(self, uuid: str, view: ItemView = FULL_VIEW) -> Dict:
         item = self.ctx.contents.get(uuid)
-        return self._with_flags(item) if item else None
+        return self._with_flags(item, view) if item else None
+
+    @_synchronized
+    def get_revision(self, uuid: str, revision_uuid: str) -> Optional[Dict]:
+        """Return one revision of an item with its attributes in full.
+
+        The revision is found through ``DbContext.revision_position``, so the
+        cost does not grow with the length of the history.
+        """
+        item = self.ctx.contents.get(uuid)
+        if item is None:
+            return None
+        return self._revision(item, revision_uuid)
 
     # Internal helpers -------------------------------------------------
+    def _revision(self, item: Dict, revision_uuid: Optional[str]) -> Optional[Dict]:
+        position = self.ctx.revision_position(item, revision_uuid)
+        if position is None:
+            return None
+        return revision_at(item["revisions"], position)
+
     @staticmethod
     def _ensure_revision_structure(item: Dict):
         if "revisions" not in item or not item["revisions"]:
             rev_uuid = str(uuid.uuid4())
             ts = item.get("timestamps") or item.get("metadata", {}).get("timestamps")
-            attrs = {}
-            if "title" in item:
-                attrs["title"] = item["title"]
-            if "file_uuid" in item:
-                attrs["file_uuid"] = item.pop("file_uuid")
-            if "html_content" in item:
-                attrs["html_content"] = item.pop("html_content")
-            if "postal_code" in item:
-                attrs["postal_code"] = item.pop("postal_code")
-            if "address" in item:
-                attrs["address"] = item.pop("address")
-            if "phone" in item:
-                attrs["phone"] = item.pop("phone")
-            if "fax" in item:
-                attrs["fax"] = item.pop("fax")
-            if "email" in item:
-                attrs["email"] = item.pop("email")
-            if "start" in item:
-                attrs["start"] = item.pop("start")
-            if "end" in item:
-                attrs["end"] = item.pop("end")
-            if "all_day" in item:
-                attrs["all_day"] = item.pop("all_day")
+            attrs = extract_attributes(item)
             item["revisions"] = [{"uuid": rev_uuid, "last_updated": ts, "attributes": attrs}]
         else:
             for rev in item["revisions"]:
@@ -137,81 +327,26 @@ class ContentService:
             or item.get("metadata", {}).get("edited_at")
             or item.get("metadata", {}).get("timestamps")
         )
-        attrs = {}
-        if "title" in item:
-            attrs["title"] = item["title"]
-        if "file_uuid" in item:
-            attrs["file_uuid"] = item.pop("file_uuid")
-        elif item.get("type") == ContentType.PDF.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "file_uuid" in last:
-                attrs["file_uuid"] = last["file_uuid"]
-        if "html_content" in item:
-            attrs["html_content"] = item.pop("html_content")
-        elif item.get("type") == ContentType.HTML.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "html_content" in last:
-                attrs["html_content"] = last["html_content"]
-        if "postal_code" in item:
-            attrs["postal_code"] = item.pop("postal_code")
-        elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "postal_code" in last:
-                attrs["postal_code"] = last["postal_code"]
-        if "address" in item:
-            attrs["address"] = item.pop("address")
-        elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "address" in last:
-                attrs["address"] = last["address"]
-        if "phone" in item:
-            attrs["phone"] = item.pop("phone")
-        elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "phone" in last:
-                attrs["phone"] = last["phone"]
-        if "fax" in item:
-            attrs["fax"] = item.pop("fax")
-        elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "fax" in last:
-                attrs["fax"] = last["fax"]
-        if "email" in item:
-            attrs["email"] = item.pop("email")
-        elif item.get("type") == ContentType.OFFICE_ADDRESS.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "email" in last:
-                attrs["email"] = last["email"]
-        if "start" in item:
-            attrs["start"] = item.pop("start")
-        elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "start" in last:
-                attrs["start"] = last["start"]
-        if "end" in item:
-            attrs["end"] = item.pop("end")
-        elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "end" in last:
-                attrs["end"] = last["end"]
-        if "all_day" in item:
-            attrs["all_day"] = item.pop("all_day")
-        elif item.get("type") == ContentType.EVENT_SCHEDULE.value and item.get("revisions"):
-            last = item["revisions"][-1].get("attributes", {})
-            if "all_day" in last:
-                attrs["all_day"] = last["all_day"]
+        # Rebuilt once from the delta-encoded history; carried-over fields
+        # and the new revision's delta are both taken against it.
+        last = latest_attributes(item.get("revisions") or [])
+        attrs = extract_attributes(item, last)
         item.setdefault("revisions", [])
-        item["revisions"].append({"uuid": rev_uuid, "last_updated": ts, "attributes": attrs})
+        append_revision(item["revisions"], {"uuid": rev_uuid, "last_updated": ts, "attributes": attrs}, last)
         item["review_revision"] = rev_uuid
 
+    @_synchronized
     def create(self, item: Dict) -> Dict:
         item_uuid = item.get("uuid") or str(uuid.uuid4())
         item["uuid"] = item_uuid
         item.pop("state", None)
+        if item.get("revisions"):
+            item["revisions"] = encode_revisions(item["revisions"])
         self._ensure_revision_structure(item)
-        self.ctx.contents[item_uuid] = item
+        self.ctx.save_content(item)
         return self._with_flags(item)
 
+    @_synchronized
     def update(self, uuid: str, incoming: Dict) -> Dict:
         existing = self.ctx.contents.get(uuid)
         if existing is None:
@@ -242,58 +377,72 @@ class ContentService:
         updated = existing.copy()
         excluded = metadata_fields | {"type", "metadata", "uuid", "state"}
         updated.update({k: v for k, v in incoming.items() if k not in excluded})
+        if incoming.get("revisions"):
+            # Clients send back full revisions; store them delta-encoded.
+            updated["revisions"] = encode_revisions(incoming["revisions"])
         self._ensure_revision_structure(updated)
         self._add_revision(updated)
-        self.ctx.contents[uuid] = updated
+        self.ctx.save_content(updated)
         return self._with_flags(updated)
 
+    @_synchronized
     def archive(self, uuid: str) -> Dict:
         item = self.ctx.contents.get(uuid)
         if item is not None:
             archive_content(item)
-            self.ctx.contents[uuid] = item
+            self.ctx.save_content(item)
         return self._with_flags(item) if item else None
 
+    @_synchronized
     def request_approval(self, uuid: str, data: Dict) -> Dict:
         item = self.ctx.contents.get(uuid)
         if item is None:
             return None
         self._ensure_revision_structure(item)
         request_approval(item, {"uuid": data.get("user_uuid")}, data.get("timestamp"))
-        self.ctx.contents[uuid] = item
+        self.ctx.save_content(item)
         return self._with_flags(item)
 
+    @_synchronized
     def approve(self, uuid: str, data: Dict) -> Dict:
         item = self.ctx.contents.get(uuid)
         if item is None:
             return None
         self._ensure_revision_structure(item)
         approve_content(item, {"uuid": data.get("user_uuid")}, data.get("timestamp"))
-        self.ctx.contents[uuid] = item
+        self.ctx.save_content(item)
         return self._with_flags(item)
 
+    @_synchronized
     def start_draft(self, uuid: str, data: Dict) -> Dict:
         item = self.ctx.contents.get(uuid)
         if item is None:
             return None
         self._ensure_revision_structure(item)
         start_draft(item, {"uuid": data.get("user_uuid")}, data.get("timestamp"))
-        self.ctx.contents[uuid] = item
+        self.ctx.save_content(item)
         return self._with_flags(item)
 
-    def pending_approvals(self) -> List[Dict]:
-        pending = pending_approvals(self.ctx.contents.values())
-        return [self._with_flags(item) for item in pending]
+    @_synchronized
+    def pending_approvals(self, view: ItemView = FULL_VIEW) -> List[Dict]:
+        return [self._with_flags(item, view) for item in self.ctx.iter_pending()]
+
+    @_synchronized
+    def pending_approvals_encoded(self, view: ItemView = FULL_VIEW) -> List[bytes]:
+        """Like :meth:`pending_approvals`, with every item encoded as JSON."""
+        return [self._encoded(item, view) for item in self.ctx.iter_pending()]
 
 
 class TokenService:
     def __init__(self, ctx: DbContext):
         self.ctx = ctx
 
+    @_synchronized
     def create_token(self, username: str) -> str:
         token = f"token-{username}"
         self.ctx.tokens[token] = username
         return token
 
+    @_synchronized
     def validate_token(self, token: str) -> bool:
         return token in self.ctx.tokens
@@ -0,0 +1,522 @@
+import functools
+import json
+import sqlite3
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .db_context import DbContext
+from .events import _LAST, EventIndex, _coordinate
+from .indexes import ContentIndex
+from .models import json_default
+from .offices import OfficeIndex, normalize_email, normalize_phone, normalize_postal_code
+from .revisions import attributes_at
+from .search import TITLE_WEIGHT, searched_revisions, strip_tags, tokenize
+from .types import ContentType
+from .workflow import _get_metadata_value, is_pending_approval
+
+# Bumped when a schema change needs the lookup tables filled from stored rows.
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content (
+    uuid TEXT PRIMARY KEY,
+    type TEXT,
+    published INTEGER NOT NULL,
+    pending INTEGER NOT NULL,
+    draft_requested_at TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS content_created ON content (created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_type ON content (type, created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_published ON content (published, created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_type_published ON content (type, published, created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_pending ON content (draft_requested_at, uuid) WHERE pending = 1;
+CREATE TABLE IF NOT EXISTS categories (
+    uuid TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    username TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS content_categories (
+    category TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    published INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (category, uuid)
+);
+CREATE INDEX IF NOT EXISTS content_categories_created ON content_categories (category, created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_categories_published ON content_categories (category, published, created_at, uuid);
+CREATE INDEX IF NOT EXISTS content_categories_uuid ON content_categories (uuid);
+CREATE TABLE IF NOT EXISTS event_spans (
+    uuid TEXT PRIMARY KEY,
+    start_at INTEGER NOT NULL,
+    end_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS event_spans_start ON event_spans (start_at, end_at, uuid);
+CREATE INDEX IF NOT EXISTS event_spans_length ON event_spans (end_at - start_at);
+CREATE TABLE IF NOT EXISTS office_addresses (
+    uuid TEXT PRIMARY KEY,
+    postal_code TEXT NOT NULL,
+    phone TEXT,
+    email TEXT
+);
+CREATE INDEX IF NOT EXISTS office_addresses_postal_code ON office_addresses (postal_code, uuid);
+CREATE INDEX IF NOT EXISTS office_addresses_phone ON office_addresses (phone);
+CREATE INDEX IF NOT EXISTS office_addresses_email ON office_addresses (email);
+CREATE TABLE IF NOT EXISTS search_documents (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL UNIQUE,
+    sources TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_public USING fts5(
+    title, body, tokenize = "unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_all USING fts5(
+    title, body, tokenize = "unicode61 remove_diacritics 0 tokenchars '_'"
+);
+"""
+
+
+def _content_columns(item: Dict) -> Tuple:
+    return (
+        item.get("type"),
+        int(bool(item.get("published_revision"))),
+        int(is_pending_approval(item)),
+        _get_metadata_value(item, "draft_requested_at") or "",
+        _get_metadata_value(item, "created_at") or "",
+    )
+
+
+class _SQLiteMapping(MutableMapping):
+    """Dict-like view of one table, keyed by its primary key.
+
+    Values are decoded on every read, so callers get a private copy and must
+    assign it back (or call ``DbContext.save_content``) to persist changes,
+    which is what the services already do.
+    """
+
+    def __init__(
+        self,
+        ctx: "SQLiteDbContext",
+        table: str,
+        key: str,
+        value: str,
+        encode: Callable = functools.partial(json.dumps, default=json_default),
+        decode: Callable = json.loads,
+        columns: Optional[Callable[[object], Tuple]] = None,
+        column_names: Tuple[str, ...] = (),
+    ):
+        self._ctx = ctx
+        self._decode = decode
+        self._encode = encode
+        self._columns = columns
+        names = (key,) + column_names + (value,)
+        self._select = f"SELECT {value} FROM {table} WHERE {key} = ?"
+        self._insert = (
+            f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))})"
+        )
+        self._delete = f"DELETE FROM {table} WHERE {key} = ?"
+        self._keys = f"SELECT {key} FROM {table}"
+        self._count = f"SELECT COUNT(*) FROM {table}"
+
+    def _execute(self, sql, params=()):
+        with self._ctx.lock:
+            return self._ctx.connection.execute(sql, params).fetchall()
+
+    def __getitem__(self, key):
+        rows = self._execute(self._select, (key,))
+        if not rows:
+            raise KeyError(key)
+        return self._decode(rows[0][0])
+
+    def __setitem__(self, key, value):
+        extra = self._columns(value) if self._columns else ()
+        self._execute(self._insert, (key,) + extra + (self._encode(value),))
+
+    def __delitem__(self, key):
+        with self._ctx.lock:
+            if self._ctx.connection.execute(self._delete, (key,)).rowcount == 0:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        return bool(self._execute(self._select, (key,)))
+
+    def __iter__(self):
+        return iter([row[0] for row in self._execute(self._keys)])
+
+    def __len__(self):
+        return self._execute(self._count)[0][0]
+
+
+class _SQLiteCategoryIndex(ContentIndex):
+    """:class:`~cms.indexes.CategoryIndex` kept in the ``content_categories`` table.
+
+    ``SQLiteDbContext.page_category`` joins it with ``content``.
+    """
+
+    def __init__(self, ctx: "SQLiteDbContext"):
+        self._ctx = ctx
+
+    def clear(self):
+        self._ctx._query("DELETE FROM content_categories")
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        published = int(bool(item.get("published_revision")))
+        created_at = _get_metadata_value(item, "created_at") or ""
+        rows = [(category, uuid, published, created_at) for category in set(item.get("categories") or ())]
+        with self._ctx.lock:
+            connection = self._ctx.connection
+            connection.execute("DELETE FROM content_categories WHERE uuid = ?", (uuid,))
+            connection.executemany(
+                "INSERT INTO content_categories (category, uuid, published, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def count(self, category: str, published: Optional[bool] = None) -> int:
+        if published is None:
+            sql, params = "SELECT COUNT(*) FROM content_categories WHERE category = ?", (category,)
+        else:
+            sql = "SELECT COUNT(*) FROM content_categories WHERE category = ? AND published = ?"
+            params = (category, int(published))
+        return self._ctx._query(sql, params)[0][0]
+
+
+class _SQLiteEventIndex(EventIndex):
+    """:class:`~cms.events.EventIndex` kept in the ``event_spans`` table.
+
+    Spans are stored as timeline coordinates.  A query reads the spans
+    starting between ``start`` less the longest stored span and ``end``
+    from the index on ``start_at``; the longest span comes from the index on
+    its length.
+    """
+
+    def __init__(self, ctx: "SQLiteDbContext", revision_position: Callable[[Dict, Optional[str]], Optional[int]], item_type: str):
+        self._ctx = ctx
+        self._position = revision_position
+        self._type = item_type
+
+    def clear(self):
+        self._ctx._query("DELETE FROM event_spans")
+
+    def update(self, item: Dict):
+        span = self._span(item)
+        if span is None:
+            self._ctx._query("DELETE FROM event_spans WHERE uuid = ?", (item["uuid"],))
+        else:
+            self._ctx._query(
+                "INSERT OR REPLACE INTO event_spans (start_at, end_at, uuid) VALUES (?, ?, ?)", span
+            )
+
+    def overlapping(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        low = _coordinate(start) if start is not None else 1
+        high = _coordinate(end) if end is not None else _LAST
+        rows = self._ctx._query(
+            "SELECT uuid FROM event_spans WHERE start_at BETWEEN "
+            "? - (SELECT IFNULL(MAX(end_at - start_at), 0) FROM event_spans) AND ? "
+            "AND end_at >= ? ORDER BY start_at, end_at, uuid",
+            (low, high, low),
+        )
+        return [row[0] for row in rows]
+
+
+class _SQLiteOfficeIndex(OfficeIndex):
+    """:class:`~cms.offices.OfficeIndex` kept in the ``office_addresses`` table.
+
+    Normalised values are indexed columns, so a postal code prefix is a
+    range scan and phones and emails are exact lookups.
+    """
+
+    def __init__(self, ctx: "SQLiteDbContext", revision_position: Callable[[Dict, Optional[str]], Optional[int]], item_type: str):
+        self._ctx = ctx
+        self._position = revision_position
+        self._type = item_type
+
+    def clear(self):
+        self._ctx._query("DELETE FROM office_addresses")
+
+    def update(self, item: Dict):
+        entry = self._entry(item)
+        if entry is None:
+            self._ctx._query("DELETE FROM office_addresses WHERE uuid = ?", (item["uuid"],))
+        else:
+            self._ctx._query(
+                "INSERT OR REPLACE INTO office_addresses (uuid, postal_code, phone, email) VALUES (?, ?, ?, ?)",
+                (item["uuid"], entry[0], entry[1] or None, entry[2] or None),
+            )
+
+    def lookup(
+        self,
+        postal_code: Optional[str] = None,
+        phone: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 100,
+        after=None,
+    ) -> Tuple[List[str], Optional[Tuple[str, str]]]:
+        conditions = []
+        params = []
+        if phone is not None:
+            conditions.append("phone = ?")
+            params.append(normalize_phone(phone))
+        if email is not None:
+            conditions.append("email = ?")
+            params.append(normalize_email(email))
+        if not conditions:
+            # as in memory, a prefix lookup alone skips offices without a code
+            conditions.append("postal_code != ''")
+        prefix = normalize_postal_code(postal_code) if postal_code is not None else ""
+        if prefix:
+            conditions.append("postal_code >= ? AND postal_code < ?")
+            params.extend((prefix, prefix + "\U0010ffff"))
+        if after is not None:
+            conditions.append("(postal_code, uuid) > (?, ?)")
+            params.extend(after)
+        rows = self._ctx._query(
+            f"SELECT postal_code, uuid FROM office_addresses WHERE {' AND '.join(conditions)} "
+            "ORDER BY postal_code, uuid LIMIT ?",
+            params + [limit + 1],
+        )
+        next_key = tuple(rows[limit - 1]) if len(rows) > limit else None
+        return [row[1] for row in rows[:limit]], next_key
+
+
+class _SQLiteSearchIndex(ContentIndex):
+    """:class:`~cms.search.SearchIndex` kept in FTS5 tables.
+
+    ``search_public`` holds the published text of each item and
+    ``search_all`` adds its review or draft text; rows share their rowid with
+    ``search_documents``, which maps them to uuids and records which
+    revisions were indexed.  Results are ranked by FTS5's bm25 with titles
+    weighted by ``TITLE_WEIGHT``, so scores differ from the in-memory index.
+    """
+
+    def __init__(self, ctx: "SQLiteDbContext", revision_position: Callable[[Dict, Optional[str]], Optional[int]]):
+        self._ctx = ctx
+        self._position = revision_position
+
+    def clear(self):
+        for table in ("search_documents", "search_public", "search_all"):
+            self._ctx._query(f"DELETE FROM {table}")
+
+    def _text(self, item: Dict, rev_uuid: Optional[str]) -> Tuple[str, str]:
+        position = self._position(item, rev_uuid)
+        if position is None:
+            return "", ""
+        attrs = attributes_at(item["revisions"], position)
+        title = attrs.get("title")
+        body = attrs.get("html_content")
+        return (
+            title if isinstance(title, str) else "",
+            strip_tags(body) if isinstance(body, str) else "",
+        )
+
+    def update(self, item: Dict):
+        uuid = item["uuid"]
+        published_uuid, review_uuid = searched_revisions(item)
+        sources = json.dumps([published_uuid, review_uuid])
+        with self._ctx.lock:
+            connection = self._ctx.connection
+            row = connection.execute("SELECT id, sources FROM search_documents WHERE uuid = ?", (uuid,)).fetchone()
+            if row is not None and row[1] == sources:
+                return
+            published = self._text(item, published_uuid)
+            combined = published
+            if review_uuid != published_uuid:
+                review = self._text(item, review_uuid)
+                combined = (f"{published[0]} {review[0]}", f"{published[1]} {review[1]}")
+            if row is None:
+                docid = connection.execute(
+                    "INSERT INTO search_documents (uuid, sources) VALUES (?, ?)", (uuid, sources)
+                ).lastrowid
+            else:
+                docid = row[0]
+                connection.execute("UPDATE search_documents SET sources = ? WHERE id = ?", (sources, docid))
+                connection.execute("DELETE FROM search_public WHERE rowid = ?", (docid,))
+                connection.execute("DELETE FROM search_all WHERE rowid = ?", (docid,))
+            if any(published):
+                connection.execute("INSERT INTO search_public (rowid, title, body) VALUES (?, ?, ?)", (docid,) + published)
+            if any(combined):
+                connection.execute("INSERT INTO search_all (rowid, title, body) VALUES (?, ?, ?)", (docid,) + combined)
+
+    def search(self, query: str, published_only: bool, limit: int, after=None) -> Tuple[List[str], Optional[Tuple[float, str]]]:
+        """Like :meth:`SearchIndex.search <cms.search.SearchIndex.search>`; keys are ``(bm25, uuid)``."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return [], None
+        table = "search_public" if published_only else "search_all"
+        # every term quoted, so FTS5 reads none of them as an operator
+        match = " ".join(f'"{term}"' for term in terms)
+        condition, params = "", [match]
+        if after is not None:
+            condition = "WHERE (score, uuid) > (?, ?) "
+            params.extend(after)
+        rows = self._ctx._query(
+            f"SELECT score, uuid FROM (SELECT bm25({table}, {float(TITLE_WEIGHT)}, 1.0) AS score, "
+            f"search_documents.uuid AS uuid FROM {table} "
+            f"JOIN search_documents ON search_documents.id = {table}.rowid WHERE {table} MATCH ?) "
+            f"{condition}ORDER BY score, uuid LIMIT ?",
+            params + [limit + 1],
+        )
+        next_key = tuple(rows[limit - 1]) if len(rows) > limit else None
+        return [row[1] for row in rows[:limit]], next_key
+
+
+class SQLiteDbContext(DbContext):
+    """Durable :class:`~cms.db_context.DbContext` stored in a SQLite file.
+
+    ``contents``, ``categories`` and ``tokens`` become dict-like views of
+    tables, so :class:`~cms.services.ContentService`,
+    :class:`~cms.services.CategoryService` and
+    :class:`~cms.services.TokenService` run unchanged.  Items are stored as
+    JSON next to the columns the listings filter and sort on (type,
+    published state, approval fields and ``created_at``), each covered by an
+    index, so listings and the approval queue are answered by SQLite rather
+    than by in-memory indexes.  Category, event, office and full-text lookups
+    are side tables written by their indexes on every save, so opening a
+    file reads no items.  The database runs in WAL mode; all queries use
+    fixed SQL text so sqlite3's statement cache keeps them prepared.
+    """
+
+    # Rows are decoded into fresh dicts on every read, so converting items
+    # to records on save would only add work.
+    content_record = None
+    category_record = None
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self.contents = _SQLiteMapping(
+            self,
+            "content",
+            "uuid",
+            "data",
+            columns=_content_columns,
+            column_names=("type", "published", "pending", "draft_requested_at", "created_at"),
+        )
+        self.categories = _SQLiteMapping(self, "categories", "uuid", "data")
+        self.tokens = _SQLiteMapping(
+            self, "tokens", "token", "username", encode=str, decode=str
+        )
+        # SQLite indexes replace the in-memory listing indexes.  Revisions
+        # are found by scanning the item's history, which is decoded on
+        # every read anyway.
+        self.type_index = None
+        self.pending_index = None
+        self.revision_index = None
+        # The lookup indexes keep their state in side tables.
+        self.category_index = _SQLiteCategoryIndex(self)
+        self.search_index = _SQLiteSearchIndex(self, self.revision_position)
+        self.event_index = _SQLiteEventIndex(self, self.revision_position, ContentType.EVENT_SCHEDULE)
+        self.office_index = _SQLiteOfficeIndex(self, self.revision_position, ContentType.OFFICE_ADDRESS)
+        self.content_indexes = [
+            self.category_index,
+            self.search_index,
+            self.event_index,
+            self.office_index,
+            self.versions,
+        ]
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            # Files written before the side tables existed are indexed once.
+            lookups = self.content_indexes[:-1]
+            self.connection.execute("BEGIN")
+            try:
+                for index in lookups:
+                    index.clear()
+                for item in self.contents.values():
+                    for index in lookups:
+                        index.update(item)
+                self.connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        # Without an in-memory index of published items a cached listing
+        # could not be invalidated reliably, so public listings are not
+        # cached.
+        self.published_cache = None
+        # Listed rows are decoded from JSON anyway; keeping their encoding
+        # as well would save little.
+        self.rendered_items = None
+
+    def save_content(self, item: Dict):
+        """Store ``item`` and its side-table rows in one transaction.
+
+        If any index update fails, the row write and the other updates are
+        rolled back so the side tables never disagree with ``content``.
+        """
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                super().save_content(item)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def close(self):
+        self.connection.close()
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def page_contents(self, limit: int, item_type: Optional[str] = None, published: Optional[bool] = None, after=None) -> Tuple[List[Dict], Optional[tuple]]:
+        conditions = []
+        params = []
+        if item_type is not None:
+            conditions.append("type = ?")
+            params.append(item_type)
+        if published is not None:
+            conditions.append("published = ?")
+            params.append(int(published))
+        if after is not None:
+            conditions.append("(created_at, uuid) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._query(
+            f"SELECT created_at, uuid, data FROM content {where}"
+            "ORDER BY created_at, uuid LIMIT ?",
+            params + [limit + 1],
+        )
+        next_key = tuple(rows[limit - 1][:2]) if len(rows) > limit else None
+        return [json.loads(row[2]) for row in rows[:limit]], next_key
+
+    def page_category(self, category: str, limit: int, published: Optional[bool] = None, after=None) -> Tuple[List[Dict], Optional[tuple]]:
+        conditions = ["m.category = ?"]
+        params = [category]
+        if published is not None:
+            conditions.append("m.published = ?")
+            params.append(int(published))
+        if after is not None:
+            conditions.append("(m.created_at, m.uuid) > (?, ?)")
+            params.extend(after)
+        rows = self._query(
+            "SELECT m.created_at, m.uuid, c.data FROM content_categories m "
+            f"JOIN content c ON c.uuid = m.uuid WHERE {' AND '.join(conditions)} "
+            "ORDER BY m.created_at, m.uuid LIMIT ?",
+            params + [limit + 1],
+        )
+        next_key = tuple(rows[limit - 1][:2]) if len(rows) > limit else None
+        return [json.loads(row[2]) for row in rows[:limit]], next_key
+
+    def iter_contents(self, item_type: Optional[str] = None, published: Optional[bool] = None, after=None, batch_size: int = 256) -> Iterator[Dict]:
+        while True:
+            items, after = self.page_contents(batch_size, item_type, published, after)
+            yield from items
+            if after is None:
+                return
+
+    def iter_pending(self) -> Iterator[Dict]:
+        rows = self._query(
+            "SELECT data FROM content WHERE pending = 1 ORDER BY draft_requested_at, uuid"
+        )
+        return (json.loads(row[0]) for row in rows)
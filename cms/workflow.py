@@ -33,19 +33,20 @@ def request_approval(content, user, timestamp):
     return content
 
 
+def is_pending_approval(item):
+    """Return True when approval was requested for ``item`` but not granted."""
+    if isinstance(item, Content):
+        req = item.draft_requested_by is not None
+        approved = item.approved_at is not None
+    else:
+        req = item.get("draft_requested_by") is not None or item.get("metadata", {}).get("draft_requested_by") is not None
+        approved = item.get("approved_at") is not None or item.get("metadata", {}).get("approved_at") is not None
+    return req and not approved
+
+
 def pending_approvals(contents):
     """Return items that are awaiting admin approval."""
-    result = []
-    for item in contents:
-        if isinstance(item, Content):
-            req = item.draft_requested_by is not None
-            approved = item.approved_at is not None
-        else:
-            req = item.get("draft_requested_by") is not None or item.get("metadata", {}).get("draft_requested_by") is not None
-            approved = item.get("approved_at") is not None or item.get("metadata", {}).get("approved_at") is not None
-        if req and not approved:
-            result.append(item)
-    return result
+    return [item for item in contents if is_pending_approval(item)]
 
 
 def start_draft(content, user, timestamp):
@@ -118,7 +118,7 @@ class CmsWindow(QMainWindow):
 
     def _load_items(self, item):
         ct = item.text()
-        items = self.api.list_content_by_type(ct)
+        items = self.api.list_content_by_type(ct, fields=("uuid", "title"))
         self._append_response(f"GET /content-types/{ct}", items)
         self.item_list.clear()
         for obj in items:
@@ -0,0 +1,54 @@
+"""Fixtures shared by the index test modules.
+
+A module using ``ctx`` defines ``_populate(ctx, users)``, which fills a
+fresh context with the module's items; ``ctx`` runs each test once per
+storage backend.
+"""
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.data import seed_users
+from cms.db_context import DbContext
+from cms.sqlite_context import SQLiteDbContext
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture(params=[DbContext, SQLiteDbContext])
+def ctx(request, users):
+    ctx = request.param()
+    request.module._populate(ctx, users)
+    yield ctx
+    if isinstance(ctx, SQLiteDbContext):
+        ctx.close()
+
+
+@pytest.fixture()
+def base_url(ctx):
+    server, thread = start_test_server(context=ctx)
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture()
+def get(base_url):
+    """Return a function that GETs a path from the server and decodes the JSON."""
+
+    def get(path, headers=None):
+        req = urllib.request.Request(base_url + path, headers=headers or {})
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+
+    return get
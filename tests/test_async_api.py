@@ -0,0 +1,178 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import api as cms_api
+from cms.async_api import start_async_server
+from cms.data import seed_users, sample_content
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def async_server():
+    server, thread = start_async_server()
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def _request(base_url, method, path, data=None, token=None):
+    url = base_url + path
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        data = json.dumps(data).encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode())
+
+
+def test_async_crud_and_public_listing(async_server, users):
+    base_url = f"http://localhost:{async_server.server_port}"
+    status, body = _request(base_url, "POST", "/test-token", {"username": "t"})
+    assert status == 200
+    token = body["token"]
+
+    content = sample_content(users).to_dict()
+    status, body = _request(base_url, "POST", "/content", content, token=token)
+    assert status == 201
+
+    status, body = _request(base_url, "GET", "/content")
+    assert status == 200 and body == []
+
+    data = {"timestamp": "2025-06-09T11:00:00", "user_uuid": users["admin"]["uuid"]}
+    status, _ = _request(base_url, "POST", f"/content/{content['uuid']}/approve", data, token=token)
+    assert status == 200
+
+    status, body = _request(base_url, "GET", "/content-types/html")
+    assert status == 200
+    assert [item["uuid"] for item in body] == [content["uuid"]]
+
+    status, body = _request(base_url, "GET", "/content/missing", token=token)
+    assert status == 404
+
+
+def test_async_keep_alive_reuses_connection(async_server):
+    conn = http.client.HTTPConnection("localhost", async_server.server_port)
+    for _ in range(3):
+        conn.request("GET", "/content-types")
+        resp = conn.getresponse()
+        assert resp.status == 200
+        assert "html" in json.loads(resp.read())
+    sock = conn.sock
+    conn.request("GET", "/content")
+    resp = conn.getresponse()
+    resp.read()
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_async_many_idle_connections(async_server):
+    idle = [
+        socket.create_connection(("localhost", async_server.server_port))
+        for _ in range(200)
+    ]
+    try:
+        status, body = _request(
+            f"http://localhost:{async_server.server_port}", "GET", "/content-types"
+        )
+        assert status == 200
+    finally:
+        for sock in idle:
+            sock.close()
+
+
+def test_async_unsupported_method(async_server):
+    conn = http.client.HTTPConnection("localhost", async_server.server_port)
+    conn.request("PATCH", "/content")
+    resp = conn.getresponse()
+    assert resp.status == 501
+    conn.close()
+
+
+def test_async_slow_request_does_not_stall_others(async_server):
+    handler_class = async_server.handler_class
+    release = threading.Event()
+    list_types = handler_class._list_content_types
+
+    def slow(self):
+        release.wait(5)
+        list_types(self)
+
+    handler_class._list_content_types = slow
+    base_url = f"http://localhost:{async_server.server_port}"
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(_request, base_url, "GET", "/content-types")
+        try:
+            started = time.monotonic()
+            assert _request(base_url, "GET", "/categories") == (200, [])
+            assert time.monotonic() - started < 2
+            assert not pending.done()
+        finally:
+            release.set()
+        assert pending.result()[0] == 200
+
+
+def test_async_streams_listing_in_chunks(async_server, users, monkeypatch):
+    monkeypatch.setattr(cms_api, "STREAM_CHUNK_SIZE", 1024)
+    base_url = f"http://localhost:{async_server.server_port}"
+    status, body = _request(base_url, "POST", "/test-token", {"username": "t"})
+    token = body["token"]
+    for _ in range(5):
+        content = sample_content(users).to_dict()
+        content["html_content"] = "<p>" + "x" * 1000 + "</p>"
+        assert _request(base_url, "POST", "/content", content, token=token)[0] == 201
+    conn = http.client.HTTPConnection("localhost", async_server.server_port)
+    conn.request("GET", "/content", headers={"Authorization": f"Bearer {token}"})
+    resp = conn.getresponse()
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    assert len(json.loads(resp.read())) == 5
+    conn.close()
+
+
+def test_async_incomplete_body_times_out():
+    server, thread = start_async_server(idle_timeout=0.3)
+    sock = socket.create_connection(("localhost", server.server_port), timeout=5)
+    try:
+        sock.sendall(b"POST /test-token HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}")
+        started = time.monotonic()
+        assert sock.recv(1024) == b""
+        assert time.monotonic() - started < 2
+    finally:
+        sock.close()
+        server.shutdown()
+        thread.join()
+
+
+def test_async_malformed_headers_answered_with_400(async_server):
+    sock = socket.create_connection(("localhost", async_server.server_port), timeout=5)
+    headers = b"".join(b"X-H%d: v\r\n" % i for i in range(200))
+    sock.sendall(b"GET /content-types HTTP/1.1\r\n" + headers + b"\r\n")
+    received = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        received += chunk
+    sock.close()
+    assert received.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in received
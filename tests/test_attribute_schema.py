@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import schema
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.schema import AttributeField, extract_attributes, register_attribute_schema
+from cms.services import ContentService
+from cms.types import ContentType
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def service(users):
+    service = ContentService(DbContext())
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return service
+
+
+def test_carry_forward_follows_item_type():
+    previous = {"title": "Old", "start": "a", "end": "b", "all_day": True, "html_content": "<p/>"}
+    item = {"type": ContentType.EVENT_SCHEDULE.value, "title": "New", "end": "c", "phone": "555"}
+    attrs = extract_attributes(item, previous)
+    assert attrs == {"title": "New", "start": "a", "end": "c", "all_day": True, "phone": "555"}
+    # title stays on the item, everything else moves into the revision
+    assert item == {"type": ContentType.EVENT_SCHEDULE.value, "title": "New"}
+
+
+def test_updates_keep_type_attributes(service):
+    for item in list(service.ctx.contents.values()):
+        before = service.get(item["uuid"])["revisions"][-1]["attributes"]
+        after = service.update(item["uuid"], {"title": "Renamed"})["revisions"][-1]["attributes"]
+        assert after == dict(before, title="Renamed")
+
+
+def test_wrong_attribute_type_is_rejected(service):
+    event = next(i for i in service.ctx.contents.values() if i["type"] == ContentType.EVENT_SCHEDULE.value)
+    count = len(event["revisions"])
+    with pytest.raises(ValueError, match="all_day must be bool"):
+        service.update(event["uuid"], {"all_day": "yes"})
+    assert len(service.ctx.contents[event["uuid"]]["revisions"]) == count
+    with pytest.raises(ValueError, match="title must be str"):
+        service.create({"type": "html", "title": 5})
+
+
+def test_registered_schema_is_used(service):
+    original = schema.ATTRIBUTE_SCHEMAS[ContentType.HTML]
+    register_attribute_schema(ContentType.HTML, original + (AttributeField("summary", str),))
+    try:
+        html = next(i for i in service.ctx.contents.values() if i["type"] == ContentType.HTML.value)
+        service.update(html["uuid"], {"summary": "Short"})
+        updated = service.update(html["uuid"], {"title": "Again"})
+        assert updated["revisions"][-1]["attributes"]["summary"] == "Short"
+    finally:
+        register_attribute_schema(ContentType.HTML, original)
@@ -0,0 +1,116 @@
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.services import CategoryService, ContentService
+from cms.sqlite_context import SQLiteDbContext
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+# uuid -> (created_at, categories, published)
+ITEMS = {
+    "a": ("2025-06-01T00:00:00", ["news", "events"], True),
+    "b": ("2025-06-02T00:00:00", ["news"], False),
+    "c": ("2025-06-03T00:00:00", ["news", "news"], True),
+    "d": ("2025-06-04T00:00:00", ["events"], True),
+    "e": ("2025-06-05T00:00:00", [], True),
+}
+
+
+def _populate(ctx, users):
+    ctx.tokens["token-editor"] = "editor"
+    categories = CategoryService(ctx)
+    categories.create_category({"uuid": "news", "name": "News"})
+    categories.create_category({"uuid": "events", "name": "Events"})
+    service = ContentService(ctx)
+    for uuid, (created_at, cats, published) in ITEMS.items():
+        service.create({
+            "uuid": uuid,
+            "type": "html",
+            "title": uuid.upper(),
+            "categories": cats,
+            "created_by": users["editor"]["uuid"],
+            "created_at": created_at,
+            "timestamps": created_at,
+        })
+        if published:
+            service.approve(uuid, {"user_uuid": users["admin"]["uuid"], "timestamp": created_at})
+    return service
+
+
+def _uuids(service, category, authenticated=True, limit=10, after=None):
+    items, next_key = service.page_category(category, authenticated, limit, after)
+    return [item["uuid"] for item in items], next_key
+
+
+def test_members_in_created_order(ctx):
+    service = ContentService(ctx)
+    assert _uuids(service, "news")[0] == ["a", "b", "c"]
+    assert _uuids(service, "news", authenticated=False)[0] == ["a", "c"]
+    assert _uuids(service, "events")[0] == ["a", "d"]
+    first, next_key = _uuids(service, "news", limit=2)
+    assert first == ["a", "b"]
+    assert _uuids(service, "news", limit=2, after=next_key) == (["c"], None)
+    assert ctx.category_index.count("news") == 3
+
+
+def test_index_follows_updates(ctx):
+    service = ContentService(ctx)
+    service.update("a", {"categories": ["events"]})
+    service.update("e", {"categories": ["news"]})
+    assert _uuids(service, "news")[0] == ["b", "c", "e"]
+    assert _uuids(service, "events")[0] == ["a", "d"]
+    service.update("c", {"categories": []})
+    assert _uuids(service, "news")[0] == ["b", "e"]
+
+
+def test_missing_and_archived_categories(ctx):
+    service = ContentService(ctx)
+    assert service.page_category("sports", True, 10) is None
+    CategoryService(ctx).archive_category("events")
+    assert service.page_category("events", True, 10) is None
+    assert _uuids(service, "news")[0] == ["a", "b", "c"]
+
+
+def test_sqlite_context_lists_category(tmp_path, users):
+    ctx = SQLiteDbContext(str(tmp_path / "cms.db"))
+    _populate(ctx, users)
+    ctx.close()
+    reopened = SQLiteDbContext(str(tmp_path / "cms.db"))
+    try:
+        assert _uuids(ContentService(reopened), "news")[0] == ["a", "b", "c"]
+    finally:
+        reopened.close()
+
+
+def test_category_content_endpoint(get):
+    page = get("/categories/news/content?limit=1&fields=uuid&revisions=none")
+    assert page["items"] == [{"uuid": "a"}]
+    rest = get(f"/categories/news/content?fields=uuid&cursor={page['next_cursor']}")
+    assert rest == {"items": [{"uuid": "c"}], "next_cursor": None}
+    found = get("/categories/news/content", AUTH)["items"]
+    assert [item["uuid"] for item in found] == ["a", "b", "c"]
+    assert found[1]["is_published"] is False
+
+
+@pytest.mark.parametrize("path,status", [
+    ("/categories/sports/content", 404),
+    ("/categories/news/content?cursor=bogus", 400),
+])
+def test_category_content_endpoint_errors(get, path, status):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        get(path)
+    assert err.value.code == status
+
+
+def test_etag_does_not_hide_missing_category(base_url, get):
+    with urllib.request.urlopen(base_url + "/categories/news/content") as resp:
+        etag = resp.headers["ETag"]
+    with pytest.raises(urllib.error.HTTPError) as err:
+        get("/categories/sports/content", {"If-None-Match": etag})
+    assert err.value.code == 404
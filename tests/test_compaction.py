@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import compaction
+from cms.compaction import RetentionPolicy, RevisionCompactor, compact_revisions
+from cms.data import seed_users, sample_content
+from cms.db_context import DbContext
+from cms.journal import JournaledDbContext
+from cms.services import ContentService
+
+NOW = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _edited(service, users, edits=40):
+    item = sample_content(users).to_dict()
+    del item["revisions"]
+    item["html_content"] = "<p>body</p>" * 100
+    item = service.create(item)
+    for i in range(edits):
+        day = datetime(2025, 5, 1) + timedelta(days=i)
+        html = item["revisions"][-1]["attributes"]["html_content"] + f"<p>{i}</p>"
+        item = service.update(item["uuid"], {"html_content": html})
+        # stamp the new revision with a known date
+        stored = service.ctx.contents[item["uuid"]]
+        stored["revisions"][-1]["last_updated"] = day.isoformat()
+    return service.get(item["uuid"])
+
+
+def test_keep_last_never_drops_pinned(users):
+    service = ContentService(DbContext())
+    item = _edited(service, users, edits=10)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    service.approve(item["uuid"], admin)
+    published = service.get(item["uuid"])["published_revision"]
+    for i in range(20):
+        service.update(item["uuid"], {"title": f"Later {i}"})
+    before = service.get(item["uuid"])
+
+    stats = compact_revisions(service.ctx, RetentionPolicy(keep_last=5))
+    after = service.get(item["uuid"])
+
+    assert stats.items_compacted == 1
+    assert stats.revisions_removed == len(before["revisions"]) - 6
+    assert stats.bytes_reclaimed > 0
+    assert [rev["uuid"] for rev in after["revisions"]] == [published] + [rev["uuid"] for rev in before["revisions"][-5:]]
+    assert after["revisions"] == [rev for rev in before["revisions"] if rev["uuid"] in {r["uuid"] for r in after["revisions"]}]
+    assert after["published_revision"] == published
+    assert "delta" not in service.ctx.contents[item["uuid"]]["revisions"][0]
+
+    # a second pass finds nothing to do
+    assert compact_revisions(service.ctx, RetentionPolicy(keep_last=5)).items_compacted == 0
+
+
+def test_max_age_keeps_recent_revisions(users):
+    service = ContentService(DbContext())
+    item = _edited(service, users)
+    policy = RetentionPolicy(max_age=timedelta(days=40), now=lambda: NOW)
+    compact_revisions(service.ctx, policy)
+    kept = service.get(item["uuid"])["revisions"]
+    cutoff = (NOW - timedelta(days=40)).replace(tzinfo=None).isoformat()
+    assert kept[-1]["uuid"] == item["revisions"][-1]["uuid"]
+    assert all(rev["last_updated"] >= cutoff for rev in kept if rev["uuid"] != item["review_revision"])
+    assert len(kept) < len(item["revisions"])
+
+    # keep_last and max_age together keep the union
+    both = RetentionPolicy(keep_last=len(kept) + 3, max_age=timedelta(days=1), now=lambda: NOW)
+    compact_revisions(service.ctx, both)
+    assert len(service.get(item["uuid"])["revisions"]) == len(kept)
+
+
+def test_compaction_is_journaled(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path))
+    service = ContentService(ctx)
+    item = _edited(service, users, edits=8)
+    compact_revisions(ctx, RetentionPolicy(keep_last=2))
+    expected = service.get(item["uuid"])["revisions"]
+    ctx.close()
+
+    reopened = JournaledDbContext(str(tmp_path))
+    assert ContentService(reopened).get(item["uuid"])["revisions"] == expected
+    reopened.close()
+
+
+def test_background_compactor(users):
+    service = ContentService(DbContext())
+    item = _edited(service, users, edits=6)
+    compactor = RevisionCompactor(service.ctx, RetentionPolicy(keep_last=1), interval=0.01)
+    compactor.start()
+    try:
+        deadline = time.monotonic() + 5
+        while compactor.total_stats.items_compacted == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        compactor.stop()
+    assert compactor.total_stats.revisions_removed == 6
+    assert len(service.get(item["uuid"])["revisions"]) == 1
+
+
+def test_background_compactor_survives_a_failed_pass(users, monkeypatch, caplog):
+    service = ContentService(DbContext())
+    item = _edited(service, users, edits=6)
+    passes = []
+
+    def flaky(ctx, policy):
+        passes.append(policy)
+        if len(passes) == 1:
+            raise RuntimeError("disk full")
+        return compact_revisions(ctx, policy)
+
+    monkeypatch.setattr(compaction, "compact_revisions", flaky)
+    compactor = RevisionCompactor(service.ctx, RetentionPolicy(keep_last=1), interval=0.01)
+    compactor.start()
+    try:
+        deadline = time.monotonic() + 5
+        while compactor.total_stats.items_compacted == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        compactor.stop()
+    assert compactor.failed_passes == 1
+    assert "revision compaction pass failed" in caplog.text
+    assert len(service.get(item["uuid"])["revisions"]) == 1
+
+
+def test_policy_requires_a_rule():
+    with pytest.raises(ValueError):
+        RetentionPolicy()
+    with pytest.raises(ValueError):
+        RetentionPolicy(keep_last=0)
@@ -0,0 +1,137 @@
+import gzip
+import http.client
+import json
+import os
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import api as cms_api
+from cms.api import SimpleCRUDHandler, _negotiate_encoding, start_test_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, sample_content
+from cms.projection import FULL_VIEW
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+
+@pytest.fixture()
+def server():
+    server, thread = start_test_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture()
+def created(server):
+    users = seed_users()
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    api.create_token("editor")
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    items = []
+    for i in range(10):
+        content = sample_content(users).to_dict()
+        del content["revisions"]
+        content["html_content"] = "<p>Lorem ipsum dolor sit amet.</p>" * 200 + str(i)
+        item = api.create_content(content)
+        items.append(api.post(f"/content/{item['uuid']}/approve", admin))
+    api.close()
+    return items
+
+
+def _get(server, path, headers=None):
+    conn = http.client.HTTPConnection("localhost", server.server_port)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_negotiation():
+    assert _negotiate_encoding("gzip, deflate") == "gzip"
+    assert _negotiate_encoding("gzip;q=0, deflate") == "deflate"
+    assert _negotiate_encoding("deflate;q=0.5") == "deflate"
+    assert _negotiate_encoding("*") == "gzip"
+    assert _negotiate_encoding("identity") is None
+    assert _negotiate_encoding("br, *;q=0") is None
+    assert _negotiate_encoding(None) is None
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("deflate", zlib.decompress)])
+def test_item_is_compressed(server, created, encoding, decompress):
+    path = f"/content/{created[0]['uuid']}"
+    plain_resp, plain = _get(server, path, AUTH)
+    assert plain_resp.getheader("Content-Encoding") is None
+
+    resp, body = _get(server, path, dict(AUTH, **{"Accept-Encoding": encoding}))
+    assert resp.getheader("Content-Encoding") == encoding
+    assert resp.getheader("Vary") == "Accept-Encoding"
+    assert len(body) * 5 < len(plain)
+    assert decompress(body) == plain
+
+    # each representation has its own tag; either revalidates
+    etag = resp.getheader("ETag")
+    assert etag == plain_resp.getheader("ETag")[:-1] + f'-{encoding}"'
+    for tag in (etag, plain_resp.getheader("ETag")):
+        resp, _ = _get(server, path, dict(AUTH, **{"Accept-Encoding": encoding, "If-None-Match": tag}))
+        assert resp.status == 304
+
+
+def test_small_or_disabled_responses_stay_plain(server, created, monkeypatch):
+    resp, body = _get(server, "/categories", {"Accept-Encoding": "gzip"})
+    assert resp.getheader("Content-Encoding") is None and body == b"[]"
+    # a short listing is sent whole, so the threshold applies to it too
+    resp, body = _get(server, "/content-types/pdf", dict(AUTH, **{"Accept-Encoding": "gzip"}))
+    assert resp.getheader("Content-Encoding") is None and body == b"[]"
+    assert resp.getheader("Content-Length") == "2"
+
+    monkeypatch.setattr(SimpleCRUDHandler, "compress_min_size", None)
+    resp, _ = _get(server, f"/content/{created[0]['uuid']}", dict(AUTH, **{"Accept-Encoding": "gzip"}))
+    assert resp.getheader("Content-Encoding") is None
+
+
+def test_streamed_listing_is_compressed(server, created, monkeypatch):
+    monkeypatch.setattr(cms_api, "STREAM_CHUNK_SIZE", 1024)
+    _, plain = _get(server, "/content-types/html", AUTH)
+    resp, body = _get(server, "/content-types/html", dict(AUTH, **{"Accept-Encoding": "gzip"}))
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    assert resp.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(body) == plain
+
+
+def test_cached_listing_reuses_compressed_bytes(server, created):
+    cache = server.RequestHandlerClass.context.published_cache
+    resp, first = _get(server, "/content", {"Accept-Encoding": "gzip"})
+    assert resp.getheader("Content-Encoding") == "gzip"
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    hits = cache.hits
+    _, second = _get(server, "/content", {"Accept-Encoding": "gzip"})
+    assert second == first
+    assert cache.hits == hits + 1
+    # the compressed chunks are kept, not compressed again per request
+    chunks = cache.get(None, (None, FULL_VIEW, "gzip"))
+    assert isinstance(chunks, tuple) and b"".join(chunks) == first
+    assert {item["uuid"] for item in json.loads(gzip.decompress(first))} == {i["uuid"] for i in created}
+
+
+def test_client_decodes_transparently(server, created, monkeypatch):
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    encodings = []
+    send = api._send
+
+    def recording_send(*args):
+        resp, raw = send(*args)
+        encodings.append(resp.getheader("Content-Encoding"))
+        return resp, raw
+
+    monkeypatch.setattr(api, "_send", recording_send)
+    listed = api.get("/content")
+    assert encodings == ["gzip"]
+    assert {item["uuid"] for item in listed} == {item["uuid"] for item in created}
+    api.close()
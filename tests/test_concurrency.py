@@ -0,0 +1,137 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import PooledHTTPServer, start_test_server
+from cms.data import seed_users, sample_content
+
+
+def _request(base_url, method, path, data=None, token=None):
+    url = base_url + path
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        data = json.dumps(data).encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode())
+
+
+def test_pooled_server_is_default():
+    server, thread = start_test_server()
+    try:
+        assert isinstance(server, PooledHTTPServer)
+        assert server.max_in_flight >= server.max_workers
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_unknown_concurrency_mode_rejected():
+    with pytest.raises(ValueError):
+        start_test_server(concurrency="forking")
+
+
+@pytest.mark.parametrize("mode", ["threaded", "pooled"])
+def test_slow_client_does_not_block_others(mode):
+    server, thread = start_test_server(concurrency=mode, max_workers=2)
+    base_url = f"http://localhost:{server.server_port}"
+    # open a connection and send only half a request line
+    slow = socket.create_connection(("localhost", server.server_port))
+    slow.sendall(b"GET /content-ty")
+    try:
+        status, body = _request(base_url, "GET", "/content-types")
+        assert status == 200
+        assert "html" in body
+    finally:
+        slow.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_idle_connections_do_not_hold_workers():
+    server, thread = start_test_server(max_workers=2)
+    base_url = f"http://localhost:{server.server_port}"
+    idle = [http.client.HTTPConnection("localhost", server.server_port) for _ in range(2)]
+    try:
+        for conn in idle:
+            conn.request("GET", "/content-types")
+            assert conn.getresponse().read()
+        started = time.monotonic()
+        status, body = _request(base_url, "GET", "/content-types")
+        assert status == 200
+        assert time.monotonic() - started < 2
+        # parked connections are picked up again on their next request
+        for conn in idle:
+            sock = conn.sock
+            conn.request("GET", "/content-types")
+            resp = conn.getresponse()
+            assert resp.status == 200 and resp.read()
+            assert conn.sock is sock
+    finally:
+        for conn in idle:
+            conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_parked_connection_closed_after_idle_timeout():
+    server, thread = start_test_server(max_workers=1, idle_timeout=0.2)
+    conn = socket.create_connection(("localhost", server.server_port), timeout=5)
+    try:
+        conn.sendall(b"GET /content-types HTTP/1.1\r\nHost: x\r\n\r\n")
+        data = b""
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        assert data.startswith(b"HTTP/1.1 200")
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_concurrent_creates_are_all_stored():
+    server, thread = start_test_server(max_workers=4)
+    base_url = f"http://localhost:{server.server_port}"
+    users = seed_users()
+    status, body = _request(base_url, "POST", "/test-token", {"username": "t"})
+    assert status == 200
+    token = body["token"]
+
+    def create(_):
+        content = sample_content(users).to_dict()
+        status, body = _request(base_url, "POST", "/content", content, token=token)
+        assert status == 201
+        return body["uuid"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = set(pool.map(create, range(40)))
+
+    status, body = _request(base_url, "GET", "/content", token=token)
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    assert status == 200
+    assert {item["uuid"] for item in body} == created
+    assert len(created) == 40
@@ -0,0 +1,114 @@
+import http.client
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, seed_example_contents
+from cms.types import ContentType
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+
+@pytest.fixture()
+def server():
+    server, thread = start_test_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture()
+def api(server):
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    api.create_token("editor")
+    users = seed_users()
+    for item in seed_example_contents(users):
+        api.create_content(item.to_dict())
+    yield api
+    api.close()
+
+
+def _get(server, path, headers=None):
+    conn = http.client.HTTPConnection("localhost", server.server_port)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp.status, resp.getheader("ETag"), body
+
+
+def _revalidate(server, path, etag, headers=None):
+    return _get(server, path, dict(headers or {}, **{"If-None-Match": etag}))
+
+
+def test_item_etag(server, api):
+    uuid = next(iter(server.RequestHandlerClass.store))
+    status, etag, _ = _get(server, f"/content/{uuid}", AUTH)
+    assert status == 200 and etag.startswith('"')
+
+    status, again, body = _revalidate(server, f"/content/{uuid}", etag, AUTH)
+    assert (status, again, body) == (304, etag, b"")
+    assert _revalidate(server, f"/content/{uuid}", f'W/{etag}, "other"', AUTH)[0] == 304
+
+    api.put(f"/content/{uuid}", {"title": "Changed"})
+    status, changed, body = _revalidate(server, f"/content/{uuid}", etag, AUTH)
+    assert status == 200 and changed != etag
+    assert json.loads(body)["title"] == "Changed"
+
+    assert _revalidate(server, "/content/missing", etag, AUTH)[0] == 404
+
+
+def test_listing_etags(server, api):
+    store = server.RequestHandlerClass.store
+    pdf = next(uuid for uuid, item in store.items() if item["type"] == ContentType.PDF.value)
+
+    _, public, _ = _get(server, "/content")
+    _, private, _ = _get(server, "/content", AUTH)
+    _, html, _ = _get(server, "/content-types/html", AUTH)
+    _, cats, _ = _get(server, "/categories")
+    assert public != private
+    assert _revalidate(server, "/content", private)[0] == 200
+    assert _revalidate(server, "/content", public)[0] == 304
+    assert _revalidate(server, "/categories", cats)[0] == 304
+
+    api.put(f"/content/{pdf}", {"title": "New pdf title"})
+    assert _revalidate(server, "/content-types/html", html, AUTH)[0] == 304
+    assert _revalidate(server, "/content", private, AUTH)[0] == 200
+    assert _revalidate(server, "/content-types/pdf?limit=1", html, AUTH)[0] == 200
+
+    api.post("/categories", {"name": "News"})
+    status, _, body = _revalidate(server, "/categories", cats)
+    assert status == 200 and [c["name"] for c in json.loads(body)] == ["News"]
+
+
+def test_client_reuses_cached_responses(server, api, monkeypatch):
+    statuses = []
+    send = api._send
+
+    def recording_send(*args):
+        resp, raw = send(*args)
+        statuses.append(resp.status)
+        return resp, raw
+
+    monkeypatch.setattr(api, "_send", recording_send)
+    first = api.get("/content")
+    uuid = first[0]["uuid"]
+    first[0]["title"] = "mutated by caller"
+    assert api.get("/content") != first
+    assert statuses == [200, 304]
+
+    api.put(f"/content/{uuid}", {"title": "Renamed"})
+    assert "Renamed" in [item["title"] for item in api.get("/content")]
+    assert statuses[-1] == 200
+
+    # responses are cached per token
+    api.logout()
+    assert api.get("/content") == []
+    assert statuses[-1] == 200
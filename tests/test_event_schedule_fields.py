@@ -76,3 +76,25 @@ def test_event_schedule_revisions_include_fields(api_server, auth_token, users):
         assert "start" in attrs
         assert "end" in attrs
         assert "all_day" in attrs
+
+
+def test_event_schedule_field_types_validated(api_server, auth_token, users):
+    content = {
+        "title": "Event Schedule",
+        "type": ContentType.EVENT_SCHEDULE.value,
+        "start": "2025-06-10T09:00:00",
+        "all_day": "yes",
+        "created_by": users["editor"]["uuid"],
+        "created_at": "2025-06-09T12:00:00",
+        "timestamps": "2025-06-09T12:00:00",
+    }
+    status, body = _request(api_server, "POST", "/content", content, token=auth_token)
+    assert status == 400
+    assert "all_day" in body["error"]
+
+    content["all_day"] = True
+    status, body = _request(api_server, "POST", "/content", content, token=auth_token)
+    assert status == 201
+    status, body = _request(api_server, "PUT", f"/content/{body['uuid']}", {"start": 9}, token=auth_token)
+    assert status == 400
+    assert "start" in body["error"]
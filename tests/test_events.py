@@ -0,0 +1,143 @@
+import os
+import random
+import sys
+import urllib.error
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.events import EventIndex, event_span
+from cms.services import ContentService
+from cms.sqlite_context import SQLiteDbContext
+from cms.types import ContentType
+
+EVENTS = {
+    "breakfast": ("2025-06-09T08:00:00", "2025-06-09T09:00:00", False),
+    "meeting": ("2025-06-09T10:00:00", "2025-06-09T12:00:00", False),
+    "fair": ("2025-06-10", "2025-06-12", True),
+    "launch": ("2025-06-15T18:00:00+02:00", None, False),
+}
+
+
+def _populate(ctx, users):
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    for uuid, (start, end, all_day) in EVENTS.items():
+        service.create({
+            "uuid": uuid,
+            "type": ContentType.EVENT_SCHEDULE.value,
+            "title": uuid.title(),
+            "start": start,
+            "end": end,
+            "all_day": all_day,
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.update(uuid, {"title": uuid.title()})
+        service.approve(uuid, admin)
+    return service
+
+
+def _uuids(service, start=None, end=None):
+    parse = lambda value: value and datetime.fromisoformat(value)
+    return [item["uuid"] for item in service.events(parse(start), parse(end))]
+
+
+def test_event_span():
+    assert event_span({"start": "2025-06-10", "end": "2025-06-11", "all_day": True}) == (
+        datetime(2025, 6, 10), datetime(2025, 6, 11, 23, 59, 59, 999999)
+    )
+    assert event_span({"start": "2025-06-15T18:00:00+02:00"}) == (datetime(2025, 6, 15, 16), datetime(2025, 6, 15, 16))
+    assert event_span({"start": "soon"}) is None
+
+
+def test_overlap_queries(ctx):
+    service = ContentService(ctx)
+    assert _uuids(service) == ["breakfast", "meeting", "fair", "launch"]
+    assert _uuids(service, "2025-06-09T09:00:00", "2025-06-09T10:00:00") == ["breakfast", "meeting"]
+    assert _uuids(service, "2025-06-09T09:30:00", "2025-06-09T09:45:00") == []
+    assert _uuids(service, "2025-06-11T23:00:00", "2025-06-15T16:00:00") == ["fair", "launch"]
+    assert _uuids(service, start="2025-06-12T12:00:00") == ["fair", "launch"]
+    assert _uuids(service, end="2025-06-09T08:00:00") == ["breakfast"]
+
+
+def test_only_published_revisions_count(ctx, users):
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T12:00:00"}
+    service.update("meeting", {"start": "2025-07-01T10:00:00", "end": "2025-07-01T11:00:00"})
+    assert _uuids(service, "2025-07-01T00:00:00") == []
+    service.approve("meeting", admin)
+    assert _uuids(service, "2025-07-01T00:00:00") == ["meeting"]
+    service.archive("meeting")
+    assert _uuids(service, "2025-07-01T00:00:00") == []
+
+
+def _event(uuid, start, end):
+    attributes = {"start": start.isoformat(), "end": end.isoformat()}
+    return {
+        "uuid": uuid,
+        "type": ContentType.EVENT_SCHEDULE.value,
+        "published_revision": "r",
+        "revisions": [{"uuid": "r", "attributes": attributes}],
+    }
+
+
+def test_tree_matches_scan():
+    rng = random.Random(3)
+    index = EventIndex(lambda item, rev: 0 if rev else None, ContentType.EVENT_SCHEDULE.value)
+    base = datetime(2025, 1, 1)
+    spans = {}
+
+    def place(uuid):
+        start = base + timedelta(hours=rng.randrange(2000), microseconds=rng.randrange(2))
+        spans[uuid] = (start, start + timedelta(hours=rng.choice([0, 1, 5, 100, 3000])), uuid)
+        index.update(_event(uuid, *spans[uuid][:2]))
+
+    def check():
+        for _ in range(100):
+            low = base + timedelta(hours=rng.randrange(-100, 2100))
+            high = low + timedelta(hours=rng.randrange(50))
+            expected = sorted(span for span in spans.values() if span[0] <= high and span[1] >= low)
+            assert index.overlapping(low, high) == [uuid for _, _, uuid in expected]
+        assert index.overlapping() == [uuid for _, _, uuid in sorted(spans.values())]
+
+    for i in range(300):
+        place(f"e{i:03d}")
+    check()
+    # moved and unpublished events leave the tree without a rebuild
+    for uuid in rng.sample(sorted(spans), 100):
+        place(uuid)
+    for uuid in rng.sample(sorted(spans), 100):
+        del spans[uuid]
+        index.update({"uuid": uuid, "type": ContentType.EVENT_SCHEDULE.value, "revisions": []})
+    check()
+    for uuid in list(spans):
+        del spans[uuid]
+        index.update({"uuid": uuid, "type": ContentType.EVENT_SCHEDULE.value, "revisions": []})
+    assert index.overlapping() == [] and index._counts == {} and index._nodes == {}
+
+
+def test_sqlite_context_lists_events(tmp_path, users):
+    ctx = SQLiteDbContext(str(tmp_path / "cms.db"))
+    _populate(ctx, users)
+    ctx.close()
+    reopened = SQLiteDbContext(str(tmp_path / "cms.db"))
+    try:
+        assert _uuids(ContentService(reopened), "2025-06-10T00:00:00", "2025-06-10T01:00:00") == ["fair"]
+    finally:
+        reopened.close()
+
+
+def test_events_endpoint(get):
+    found = get("/events?from=2025-06-09&to=2025-06-10&fields=uuid&revisions=none")
+    assert found == [{"uuid": "breakfast"}, {"uuid": "meeting"}, {"uuid": "fair"}]
+    assert [item["uuid"] for item in get("/events?from=2025-06-13")] == ["launch"]
+
+
+@pytest.mark.parametrize("query", ["?from=tomorrow", "?from=2025-06-10&to=2025-06-09", "?revisions=some"])
+def test_events_endpoint_rejects_bad_bounds(get, query):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        get("/events" + query)
+    assert err.value.code == 400
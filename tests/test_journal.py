@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, seed_example_contents, sample_content
+from cms.journal import JOURNAL_FILE, PREVIOUS_JOURNAL_FILE, SNAPSHOT_FILE, JournaledDbContext
+from cms.services import CategoryService, ContentService, TokenService
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _populate(ctx, users):
+    content = ContentService(ctx)
+    for item in seed_example_contents(users):
+        content.create(item.to_dict())
+    uuids = list(ctx.contents)
+    content.update(uuids[0], {"title": "Edited"})
+    content.request_approval(uuids[1], {"user_uuid": users["editor"]["uuid"], "timestamp": "2025-06-09T10:00:00"})
+    content.approve(uuids[2], {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"})
+    content.archive(uuids[3])
+    categories = CategoryService(ctx)
+    cat = categories.create_category({"name": "News", "display_priority": 1})
+    categories.update_category(cat["uuid"], {"name": "Updates"})
+    TokenService(ctx).create_token("editor")
+
+
+def _state(ctx):
+    service = ContentService(ctx)
+    return (
+        ctx.contents,
+        dict(ctx.categories),
+        dict(ctx.tokens),
+        [item["uuid"] for item in service.list_by_type("html", False)],
+        [item["uuid"] for item in service.pending_approvals()],
+    )
+
+
+@pytest.mark.parametrize("policy", ["always", "interval", "never"])
+def test_state_survives_restart(tmp_path, users, policy):
+    ctx = JournaledDbContext(str(tmp_path), fsync=policy)
+    _populate(ctx, users)
+    before = _state(ctx)
+    ctx.close()
+
+    reopened = JournaledDbContext(str(tmp_path), fsync=policy)
+    assert _state(reopened) == before
+    reopened.close()
+
+
+def test_snapshot_compacts_journal(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path), snapshot_every=5)
+    _populate(ctx, users)
+    ctx.snapshot()
+    assert os.path.exists(tmp_path / SNAPSHOT_FILE)
+    assert not os.path.exists(tmp_path / PREVIOUS_JOURNAL_FILE)
+    assert os.path.getsize(tmp_path / JOURNAL_FILE) == 0
+
+    # mutations after the snapshot land in the journal tail
+    ContentService(ctx).update(next(iter(ctx.contents)), {"title": "After snapshot"})
+    before = _state(ctx)
+    ctx.close()
+
+    reopened = JournaledDbContext(str(tmp_path))
+    assert _state(reopened) == before
+    reopened.close()
+
+
+def test_edits_journal_only_what_changed(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path), snapshot_every=None)
+    service = ContentService(ctx)
+    uuid = service.create(sample_content(users).to_dict())["uuid"]
+    for i in range(3):
+        service.update(uuid, {"title": f"Edit {i}"})
+    service.approve(uuid, {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"})
+    before = _state(ctx)
+    ctx.close()
+
+    with open(tmp_path / JOURNAL_FILE, encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert [kind for _, kind, _, _ in records] == ["content"] + ["content_patch"] * 4
+    edit = records[1][3]
+    assert edit["at"] == 1 and len(edit["revisions"]) == 1
+    assert edit["set"]["title"] == "Edit 0" and "revisions" not in edit["set"]
+    approval = records[-1][3]
+    assert approval["revisions"] == [] and "published_revision" in approval["set"]
+
+    reopened = JournaledDbContext(str(tmp_path))
+    assert _state(reopened) == before
+    reopened.close()
+
+
+def test_torn_record_and_leftover_segment_are_recovered(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path), snapshot_every=None)
+    service = ContentService(ctx)
+    first = service.create(sample_content(users).to_dict())
+    ctx.close()
+    # pretend a crash happened after rotation: the records sit in the
+    # previous segment and the new one ends in a half-written line
+    os.replace(tmp_path / JOURNAL_FILE, tmp_path / PREVIOUS_JOURNAL_FILE)
+    with open(tmp_path / JOURNAL_FILE, "wb") as fh:
+        fh.write(b'[99,"content","x",{"uu')
+
+    ctx = JournaledDbContext(str(tmp_path), snapshot_every=None)
+    assert list(ctx.contents) == [first["uuid"]]
+    assert not os.path.exists(tmp_path / PREVIOUS_JOURNAL_FILE)
+    second = ContentService(ctx).create(sample_content(users).to_dict())
+    ctx.close()
+
+    ctx = JournaledDbContext(str(tmp_path))
+    assert set(ctx.contents) == {first["uuid"], second["uuid"]}
+    ctx.close()
+
+
+def test_concurrent_writers_all_durable(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path), fsync="always")
+    service = ContentService(ctx)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = set(pool.map(lambda _: service.create(sample_content(users).to_dict())["uuid"], range(40)))
+    assert ctx._durable_seq == ctx._seq
+    ctx.close()
+
+    reopened = JournaledDbContext(str(tmp_path))
+    assert set(reopened.contents) == created
+    reopened.close()
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        JournaledDbContext(str(tmp_path), fsync="sometimes")
@@ -0,0 +1,148 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import time
+import urllib.error
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.async_api import start_async_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, sample_content
+
+
+@pytest.fixture()
+def server():
+    server, thread = start_test_server(idle_timeout=0.5)
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    resp = conn.getresponse()
+    data = resp.read()
+    assert resp.getheader("Content-Length") == str(len(data))
+    return resp.status, json.loads(data)
+
+
+def test_connection_reused_across_success_and_error_responses(server):
+    conn = http.client.HTTPConnection("localhost", server.server_port)
+    status, body = _get(conn, "GET", "/content-types")
+    assert status == 200
+    sock = conn.sock
+
+    # unauthorized POST leaves its body unread by the route
+    payload = json.dumps({"title": "x", "type": "html"}).encode()
+    status, body = _get(conn, "POST", "/content", payload, {"Content-Type": "application/json"})
+    assert status == 401
+
+    status, body = _get(conn, "GET", "/content/missing")
+    assert status == 401
+    status, body = _get(conn, "GET", "/nowhere")
+    assert status == 404
+
+    status, body = _get(conn, "POST", "/test-token", json.dumps({"username": "t"}).encode())
+    assert status == 200 and body["token"] == "token-t"
+    assert conn.sock is sock
+    conn.close()
+
+
+@pytest.fixture(params=["threaded", "async"])
+def any_server(request):
+    if request.param == "threaded":
+        server, thread = start_test_server()
+        yield server
+        server.shutdown()
+        server.server_close()
+    else:
+        server, thread = start_async_server()
+        yield server
+        server.shutdown()
+    thread.join()
+
+
+@pytest.mark.parametrize("payload,error", [
+    (b"{not json", "invalid JSON body"),
+    (b"\xff\xfe", "invalid JSON body"),
+    (b"[1, 2]", "JSON body must be an object"),
+])
+def test_malformed_body_answered_with_400(any_server, payload, error):
+    conn = http.client.HTTPConnection("localhost", any_server.server_port)
+    status, body = _get(conn, "POST", "/test-token", payload, {"Content-Type": "application/json"})
+    assert (status, body) == (400, {"error": error})
+    sock = conn.sock
+    status, body = _get(conn, "POST", "/test-token", json.dumps({"username": "t"}).encode())
+    assert status == 200 and conn.sock is sock
+    conn.close()
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length_answered_with_400(any_server, length):
+    sock = socket.create_connection(("localhost", any_server.server_port))
+    sock.settimeout(5)
+    sock.sendall(b"POST /test-token HTTP/1.1\r\nHost: localhost\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    received = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        received += chunk
+    sock.close()
+    head, body = received.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 400")
+    assert b"Content-Length: %d" % len(body) in head
+    assert json.loads(body) == {"error": "invalid Content-Length"}
+
+
+def test_pipelined_requests_answered_in_order(server):
+    sock = socket.create_connection(("localhost", server.server_port))
+    request = b"GET /content-types HTTP/1.1\r\nHost: localhost\r\n\r\n"
+    closing = b"GET /nowhere HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n"
+    sock.sendall(request + closing)
+    received = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        received += chunk
+    sock.close()
+    assert received.count(b"HTTP/1.1 ") == 2
+    first, second = received.split(b"HTTP/1.1 ")[1:]
+    assert first.startswith(b"200") and second.startswith(b"404")
+
+
+def test_idle_connection_is_closed(server):
+    sock = socket.create_connection(("localhost", server.server_port))
+    sock.settimeout(5)
+    start = time.monotonic()
+    assert sock.recv(1) == b""
+    assert time.monotonic() - start < 4
+    sock.close()
+
+
+def test_api_client_keeps_connection_open(server):
+    users = seed_users()
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    api.create_token("editor")
+    sock = api._conn.sock
+    for _ in range(3):
+        api.create_content(sample_content(users).to_dict())
+    assert api._conn.sock is sock
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        api.get_content("missing")
+    assert exc_info.value.code == 404
+    assert json.loads(exc_info.value.read()) == {"error": "not found"}
+
+    # the server drops the idle connection; the client reconnects
+    time.sleep(1)
+    assert len(api.list_content_by_type("html")) == 3
+    api.close()
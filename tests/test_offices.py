@@ -0,0 +1,124 @@
+import os
+import sys
+import urllib.error
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.client_api import ApiClient
+from cms.offices import normalize_phone, normalize_postal_code
+from cms.services import ContentService
+from cms.sqlite_context import SQLiteDbContext
+from cms.types import ContentType
+
+OFFICES = {
+    "tokyo": ("100-0001", "03-1234-5678", "Tokyo@Example.com"),
+    "chiyoda": ("100-0005", "03-1111-2222", "chiyoda@example.com"),
+    "osaka": ("530-0001", "06-1234-5678", "osaka@example.com"),
+    "sapporo": ("060-0001", "011-123-4567", "info@example.com"),
+    "nagoya": ("450-0002", "052-123-4567", "info@example.com"),
+}
+
+
+def _populate(ctx, users):
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    for uuid, (postal_code, phone, email) in OFFICES.items():
+        service.create({
+            "uuid": uuid,
+            "type": ContentType.OFFICE_ADDRESS.value,
+            "title": uuid.title(),
+            "postal_code": postal_code,
+            "address": f"{uuid.title()} 1-1",
+            "phone": phone,
+            "email": email,
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.update(uuid, {"title": uuid.title()})
+        service.approve(uuid, admin)
+    return service
+
+
+def _uuids(service, limit=10, after=None, **criteria):
+    items, next_key = service.lookup_offices(criteria, limit, after)
+    return [item["uuid"] for item in items], next_key
+
+
+def test_normalization():
+    assert normalize_postal_code(" 100-0001 ") == "1000001"
+    assert normalize_postal_code("sw1a 1aa") == "SW1A1AA"
+    assert normalize_phone("+81 (3) 1234-5678") == "+81312345678"
+    assert normalize_phone(None) == ""
+
+
+def test_postal_code_prefix(ctx):
+    service = ContentService(ctx)
+    assert _uuids(service, postal_code="100")[0] == ["tokyo", "chiyoda"]
+    assert _uuids(service, postal_code="100-0005")[0] == ["chiyoda"]
+    assert _uuids(service, postal_code="0")[0] == ["sapporo"]
+    assert _uuids(service, postal_code="9")[0] == []
+    first, next_key = _uuids(service, limit=2, postal_code="")
+    assert first == ["sapporo", "tokyo"]
+    rest, _ = _uuids(service, limit=2, after=next_key, postal_code="")
+    assert rest == ["chiyoda", "nagoya"]
+
+
+def test_exact_phone_and_email(ctx):
+    service = ContentService(ctx)
+    assert _uuids(service, phone="0312345678")[0] == ["tokyo"]
+    assert _uuids(service, email=" tokyo@example.COM")[0] == ["tokyo"]
+    assert _uuids(service, email="info@example.com")[0] == ["sapporo", "nagoya"]
+    assert _uuids(service, email="info@example.com", postal_code="45")[0] == ["nagoya"]
+    assert _uuids(service, email="info@example.com", phone="0312345678")[0] == []
+    # exact, not prefix
+    assert _uuids(service, phone="03")[0] == []
+
+
+def test_index_follows_published_revision(ctx, users):
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T12:00:00"}
+    service.update("osaka", {"postal_code": "541-0041", "phone": "06-9999-0000"})
+    assert _uuids(service, postal_code="530")[0] == ["osaka"]
+    service.approve("osaka", admin)
+    assert _uuids(service, postal_code="530")[0] == []
+    assert _uuids(service, postal_code="541")[0] == ["osaka"]
+    assert _uuids(service, phone="06-1234-5678")[0] == []
+    assert _uuids(service, phone="0699990000")[0] == ["osaka"]
+    service.archive("osaka")
+    assert _uuids(service, postal_code="541")[0] == []
+    assert _uuids(service, phone="0699990000")[0] == []
+
+
+def test_sqlite_context_looks_up(tmp_path, users):
+    ctx = SQLiteDbContext(str(tmp_path / "cms.db"))
+    _populate(ctx, users)
+    ctx.close()
+    reopened = SQLiteDbContext(str(tmp_path / "cms.db"))
+    try:
+        assert _uuids(ContentService(reopened), postal_code="100")[0] == ["tokyo", "chiyoda"]
+    finally:
+        reopened.close()
+
+
+def test_offices_endpoint(base_url, get):
+    page = get("/offices?postal_code=100&limit=1&fields=uuid&revisions=none")
+    assert page["items"] == [{"uuid": "tokyo"}]
+    rest = get(f"/offices?postal_code=100&limit=1&fields=uuid&cursor={page['next_cursor']}")
+    assert rest == {"items": [{"uuid": "chiyoda"}], "next_cursor": None}
+
+    api = ApiClient(base_url)
+    try:
+        found = api.lookup_offices(phone="06-1234-5678")
+        assert [item["uuid"] for item in found] == ["osaka"]
+        assert found[0]["revisions"][0]["attributes"]["address"] == "Osaka 1-1"
+    finally:
+        api.close()
+
+
+@pytest.mark.parametrize("query", ["", "?postal_code=", "?phone=1&limit=x"])
+def test_offices_endpoint_rejects_bad_queries(get, query):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        get("/offices" + query)
+    assert err.value.code == 400
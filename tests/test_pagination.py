@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, sample_content
+from cms.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def api(users):
+    server, thread = start_test_server()
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    api.create_token("editor")
+    yield api
+    api.close()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _request(base_url, method, path, data=None, token=None):
+    url = base_url + path
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        data = json.dumps(data).encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode())
+
+
+def _create(api, users, count, created_at="2025-06-08T12:00:00"):
+    created = []
+    for _ in range(count):
+        content = sample_content(users).to_dict()
+        content["created_at"] = created_at
+        created.append(api.create_content(content))
+    return created
+
+
+def test_pages_follow_created_at_then_uuid(api, users):
+    _create(api, users, 4, "2025-06-09T00:00:00")
+    _create(api, users, 3, "2025-06-08T00:00:00")
+    expected = sorted(
+        (item["created_at"], item["uuid"]) for item in api.get("/content")
+    )
+
+    status, page = _request(api.base_url, "GET", "/content?limit=3", token=api.token)
+    assert status == 200
+    assert [(i["created_at"], i["uuid"]) for i in page["items"]] == expected[:3]
+    assert decode_cursor(page["next_cursor"]) == expected[2]
+
+    seen = [item["uuid"] for item in api.iter_content(page_size=3)]
+    assert seen == [uuid for _, uuid in expected]
+
+
+def test_type_listing_pages_and_public_view(api, users):
+    created = _create(api, users, 5)
+    admin = users["admin"]["uuid"]
+    for item in created[:3]:
+        api.approve_content(item["uuid"], "2025-06-09T11:00:00", admin)
+
+    drafts_included = list(api.iter_content_by_type("html", page_size=2))
+    assert len(drafts_included) == 5
+
+    api.logout()
+    public = list(api.iter_content_by_type("html", page_size=2))
+    assert {i["uuid"] for i in public} == {i["uuid"] for i in created[:3]}
+    assert all(i["is_published"] for i in public)
+
+
+def test_last_page_has_no_cursor(api, users):
+    _create(api, users, 2)
+    page = api.get("/content?limit=2")
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is None
+    page = api.get(f"/content?cursor={encode_cursor(('2025-06-08T12:00:00', 'zzz'))}")
+    assert page == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=abc", "cursor=%25%25", "cursor=W10"])
+def test_invalid_page_parameters(api, query):
+    status, body = _request(api.base_url, "GET", f"/content?{query}")
+    assert status == 400
+    assert "error" in body
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.services import ContentService
+from cms.workflow import pending_approvals
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def service(users):
+    service = ContentService(DbContext())
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return service
+
+
+def _request(service, uuid, user, ts):
+    return service.request_approval(uuid, {"user_uuid": user["uuid"], "timestamp": ts})
+
+
+def test_pending_ordered_by_request_time(service, users):
+    uuids = list(service.ctx.contents)
+    _request(service, uuids[0], users["editor"], "2025-06-09T12:00:00")
+    _request(service, uuids[1], users["editor"], "2025-06-09T09:00:00")
+    _request(service, uuids[2], users["editor"], "2025-06-09T10:30:00")
+
+    pending = service.pending_approvals()
+    assert [item["uuid"] for item in pending] == [uuids[1], uuids[2], uuids[0]]
+    assert all(item["review_requested"] for item in pending)
+
+    service.approve(uuids[2], {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"})
+    assert [item["uuid"] for item in service.pending_approvals()] == [uuids[1], uuids[0]]
+
+    # a repeated request moves the item to its new position in the queue
+    _request(service, uuids[1], users["editor"], "2025-06-09T13:00:00")
+    assert [item["uuid"] for item in service.pending_approvals()] == [uuids[0], uuids[1]]
+
+
+def test_pending_index_matches_scan(service, users):
+    ctx = service.ctx
+    for i, uuid in enumerate(list(ctx.contents)):
+        _request(service, uuid, users["editor"], f"2025-06-09T{10 + i:02d}:00:00")
+        if i % 3 == 0:
+            service.approve(uuid, {"user_uuid": users["admin"]["uuid"], "timestamp": "t"})
+        if i % 4 == 0:
+            service.archive(uuid)
+    indexed = {item["uuid"] for item in service.pending_approvals()}
+    scanned = {item["uuid"] for item in pending_approvals(ctx.contents.values())}
+    assert indexed == scanned
+    assert len(ctx.pending_index) == len(scanned)
+
+
+def test_nested_metadata_requests_are_indexed(users):
+    service = ContentService(DbContext())
+    item = {
+        "uuid": "nested",
+        "title": "Nested",
+        "type": "html",
+        "metadata": {
+            "created_by": users["editor"]["uuid"],
+            "created_at": "2025-06-08T12:00:00",
+            "timestamps": "2025-06-08T12:00:00",
+        },
+    }
+    service.create(item)
+    _request(service, "nested", users["editor"], "2025-06-09T10:00:00")
+    assert [i["uuid"] for i in service.pending_approvals()] == ["nested"]
+    service.approve("nested", {"user_uuid": users["admin"]["uuid"], "timestamp": "t"})
+    assert service.pending_approvals() == []
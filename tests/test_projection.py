@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.projection import FULL_VIEW, ItemView, view_params
+from cms.services import ContentService
+from cms.types import ContentType
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def ctx(users):
+    ctx = DbContext()
+    ctx.tokens["token-editor"] = "editor"
+    service = ContentService(ctx)
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return ctx
+
+
+@pytest.fixture()
+def server(ctx):
+    server, thread = start_test_server(context=ctx)
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _request(server, path, headers=None):
+    req = urllib.request.Request(f"http://localhost:{server.server_port}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def _edited(ctx, users):
+    service = ContentService(ctx)
+    uuid = service.list_by_type(ContentType.HTML.value, True)[0]["uuid"]
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    service.approve(uuid, admin)
+    service.update(uuid, {"title": "Second"})
+    service.update(uuid, {"title": "Third"})
+    return service, uuid
+
+
+def test_view_params():
+    assert view_params({}) is FULL_VIEW
+    view = view_params({"fields": ["uuid,title", " type "], "revisions": ["none"]})
+    assert view == ItemView(frozenset({"uuid", "title", "type"}), "none")
+    with pytest.raises(ValueError):
+        view_params({"revisions": ["some"]})
+
+
+def test_service_views(ctx, users):
+    service, uuid = _edited(ctx, users)
+    item = ctx.contents[uuid]
+    full = service.get(uuid)
+    assert len(full["revisions"]) == len(item["revisions"]) == 3
+
+    slim = service.get(uuid, ItemView(frozenset({"uuid", "title"}), "none"))
+    assert slim == {"uuid": uuid, "title": "Third"}
+
+    latest = service.get(uuid, ItemView(revisions="latest"))
+    assert latest["revisions"] == [full["revisions"][-1]]
+    assert latest["is_published"] is True
+
+    published = service.get(uuid, ItemView(frozenset({"revisions"}), "published"))
+    assert set(published) == {"revisions"}
+    assert [r["uuid"] for r in published["revisions"]] == [item["published_revision"]]
+    assert published["revisions"][0] in full["revisions"]
+
+    # the stored item is never touched
+    assert "delta" in item["revisions"][-1]
+    assert "is_published" not in item
+
+
+def test_published_revision_of_unpublished_item(ctx):
+    service = ContentService(ctx)
+    item = service.list_all(True, ItemView(revisions="published"))[0]
+    assert item["revisions"] == []
+
+
+def test_list_and_detail_endpoints(server, ctx, users):
+    _, uuid = _edited(ctx, users)
+
+    status, items = _request(server, "/content?fields=uuid,title&revisions=none", AUTH)
+    assert status == 200
+    assert all(set(item) == {"uuid", "title"} for item in items)
+    assert len(items) == len(ctx.contents)
+
+    status, page = _request(server, "/content-types/html?limit=2&fields=uuid&fields=is_published", AUTH)
+    assert status == 200
+    assert all(set(item) == {"uuid", "is_published"} for item in page["items"])
+
+    status, item = _request(server, f"/content/{uuid}?revisions=latest", AUTH)
+    assert status == 200
+    assert len(item["revisions"]) == 1 and item["revisions"][0]["attributes"]["title"] == "Third"
+
+    status, pending = _request(server, "/pending-approvals?fields=uuid", AUTH)
+    assert status == 200
+    assert all(set(item) == {"uuid"} for item in pending)
+
+    status, body = _request(server, f"/content/{uuid}?revisions=bogus", AUTH)
+    assert status == 400 and "revisions" in body["error"]
+    assert _request(server, "/content?revisions=bogus")[0] == 400
+
+
+def test_public_listing_cached_per_view(server, ctx, users):
+    _edited(ctx, users)
+    cache = ctx.published_cache
+
+    _, full = _request(server, "/content")
+    _, slim = _request(server, "/content?fields=title&revisions=none")
+    assert len(full) == len(slim) == 1
+    assert slim == [{"title": "Third"}]
+    assert len(full[0]["revisions"]) == 3
+
+    assert _request(server, "/content?fields=title&revisions=none")[1] == slim
+    assert cache.hits == 1
+
+
+def test_client_lists_titles_only(server, ctx, users):
+    _, uuid = _edited(ctx, users)
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    items = api.list_content_by_type(ContentType.HTML.value, fields=("uuid", "title"))
+    api.close()
+    assert items == [{"uuid": uuid, "title": "Third"}]
@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import api as cms_api
+from cms.api import start_test_server
+from cms.cache import PublishedViewCache
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.services import ContentService
+from cms.types import ContentType
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def ctx(users):
+    ctx = DbContext()
+    service = ContentService(ctx)
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return ctx
+
+
+@pytest.fixture()
+def base_url(ctx):
+    server, thread = start_test_server(context=ctx)
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(base_url, path):
+    with urllib.request.urlopen(base_url + path) as resp:
+        return json.loads(resp.read())
+
+
+def _titles(items):
+    return sorted(item["title"] for item in items)
+
+
+def test_public_listing_served_from_cache(base_url, ctx, users):
+    cache = ctx.published_cache
+    service = ContentService(ctx)
+    html = [i["uuid"] for i in service.list_by_type(ContentType.HTML.value, True)]
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+
+    assert _get(base_url, "/content") == []
+    assert _get(base_url, "/content") == []
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # approving makes the item public and drops the cached listing
+    service.approve(html[0], admin)
+    assert [i["uuid"] for i in _get(base_url, "/content")] == [html[0]]
+
+    # edits to unpublished items never reach the public listing
+    hits = cache.hits
+    service.update(html[1], {"title": "Draft edit"})
+    _get(base_url, "/content")
+    assert cache.hits == hits + 1
+
+    service.update(html[0], {"title": "Live edit"})
+    assert _titles(_get(base_url, "/content")) == ["Live edit"]
+
+    service.archive(html[0])
+    assert _get(base_url, "/content") == []
+
+
+def test_invalidation_is_per_type(base_url, ctx, users):
+    cache = ctx.published_cache
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    pdf = service.list_by_type(ContentType.PDF.value, True)[0]["uuid"]
+    html = service.list_by_type(ContentType.HTML.value, True)[0]["uuid"]
+    service.approve(pdf, admin)
+
+    assert len(_get(base_url, "/content-types/pdf")) == 1
+    assert _get(base_url, "/content-types/html") == []
+    assert _get(base_url, "/content?limit=1")["next_cursor"] is None
+
+    service.approve(html, admin)
+    misses = cache.misses
+    assert len(_get(base_url, "/content-types/pdf")) == 1
+    assert cache.misses == misses
+    assert [i["uuid"] for i in _get(base_url, "/content-types/html")] == [html]
+    assert len(_get(base_url, "/content?limit=1")["next_cursor"] or "") > 0
+    assert cache.misses == misses + 2
+
+
+def test_authenticated_listing_bypasses_cache(base_url, ctx):
+    cache = ctx.published_cache
+    req = urllib.request.Request(base_url + "/content")
+    ctx.tokens["token-editor"] = "editor"
+    req.add_header("Authorization", "Bearer token-editor")
+    with urllib.request.urlopen(req) as resp:
+        assert len(json.loads(resp.read())) == len(ctx.contents)
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_whole_public_listing_is_streamed_from_cache(base_url, ctx, users, monkeypatch):
+    monkeypatch.setattr(cms_api, "STREAM_CHUNK_SIZE", 1024)
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    for item in service.list_all(True):
+        service.approve(item["uuid"], admin)
+    cache = ctx.published_cache
+    bodies = []
+    for _ in range(2):
+        with urllib.request.urlopen(base_url + "/content") as resp:
+            assert resp.getheader("Transfer-Encoding") == "chunked"
+            bodies.append(resp.read())
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert bodies[0] == bodies[1]
+    assert {item["uuid"] for item in json.loads(bodies[0])} == set(ctx.contents)
+    # the entry holds the encoded items themselves, not a joined copy
+    (elements,) = cache._entries[None].values()
+    assert elements[0] is ctx.rendered_items.get(json.loads(bodies[0])[0]["uuid"])
+
+
+def test_stale_response_is_not_stored():
+    cache = PublishedViewCache()
+    generation = cache.generation("html")
+    cache.update({"uuid": "a", "type": "html", "published_revision": "r"})
+    cache.put("html", None, generation, b"[]")
+    assert cache.get("html", None) is None
+    cache.put("html", None, cache.generation("html"), b"[1]")
+    assert cache.get("html", None) == b"[1]"
+    # a change to another type leaves the entry in place
+    cache.update({"uuid": "b", "type": "pdf", "published_revision": "r"})
+    assert cache.get("html", None) == b"[1]"
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = PublishedViewCache(max_bytes=10)
+    cache.put("html", "a", cache.generation("html"), (b"1234", b"56"))
+    cache.put("pdf", "b", cache.generation("pdf"), b"1234")
+    assert cache.size == 10
+    # a response that does not fit is sent without being kept
+    cache.put("html", "c", cache.generation("html"), b"1")
+    assert cache.get("html", "c") is None
+    # replacing an entry only counts the difference
+    cache.put("html", "a", cache.generation("html"), b"12")
+    assert cache.size == 6
+    cache.update({"uuid": "x", "type": "html", "published_revision": "r"})
+    assert cache.size == 4
@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.journal import JournaledDbContext
+from cms import models
+from cms.models import AttributeRecord, CategoryRecord, ContentRecord, DeltaRecord, RevisionRecord, json_default
+from cms.services import CategoryService, ContentService
+from cms.types import ContentType
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _service(ctx, users):
+    service = ContentService(ctx)
+    for item in seed_example_contents(users):
+        service.create(json.loads(json.dumps(item.to_dict())))
+    return service
+
+
+def test_record_behaves_like_dict():
+    data = {"uuid": "u", "title": "T", "metadata": {"created_by": "x"}, "edited_by": None}
+    record = ContentRecord(data)
+    assert record == data and len(record) == 4
+    assert record["title"] == "T" and record.get("approved_at", 1) == 1
+    assert "edited_by" in record and "approved_at" not in record
+    with pytest.raises(KeyError):
+        record["approved_at"]
+
+    copy = record.copy()
+    copy["title"] = "Changed"
+    del copy["metadata"]
+    assert record["title"] == "T" and "metadata" in record
+    assert copy == {"uuid": "u", "title": "Changed", "edited_by": None}
+    assert record.setdefault("categories", []) == [] and record["categories"] == []
+    assert not hasattr(record, "__dict__")
+
+
+def test_attribute_records_share_classes():
+    first = AttributeRecord.from_dict({"title": "A", "html_content": "<p>a</p>"})
+    second = AttributeRecord.from_dict({"title": "B", "html_content": "<p>b</p>"})
+    odd = AttributeRecord.from_dict({"title": "C", "not-a-name": 1, "items": 2})
+    assert type(first) is type(second) and type(first) is not type(odd)
+    assert list(first.items()) == [("title", "A"), ("html_content", "<p>a</p>")]
+    assert len(odd) == 3 and odd["items"] == 2
+    assert dict(odd.items()) == {"title": "C", "not-a-name": 1, "items": 2}
+    del odd["title"]
+    assert list(odd) == ["not-a-name", "items"] and list(odd.values()) == [1, 2]
+
+
+def test_attribute_record_classes_are_capped(monkeypatch):
+    AttributeRecord.from_dict({"title": "A", "html_content": "<p>a</p>"})
+    monkeypatch.setattr(models, "MAX_RECORD_CLASSES", len(AttributeRecord._classes))
+    # key sequences seen before the cap keep their classes
+    known = AttributeRecord.from_dict({"title": "B", "html_content": "<p>b</p>"})
+    assert type(known) is not AttributeRecord
+    novel = AttributeRecord.from_dict({"title": "B", "never_seen_key": 1})
+    assert type(novel) is AttributeRecord
+    assert dict(novel) == {"title": "B", "never_seen_key": 1}
+    assert len(AttributeRecord._classes) == models.MAX_RECORD_CLASSES
+
+
+def test_store_holds_records(users):
+    ctx = DbContext()
+    service = _service(ctx, users)
+    uuid = next(iter(ctx.contents))
+    service.update(uuid, {"title": "Edited"})
+
+    stored = ctx.contents[uuid]
+    assert isinstance(stored, ContentRecord)
+    assert stored["type"] is ContentType(stored["type"])
+    assert all(isinstance(rev, RevisionRecord) for rev in stored["revisions"])
+    assert isinstance(stored["revisions"][-1]["delta"], DeltaRecord)
+    assert isinstance(stored["revisions"][-1]["delta"]["set"], AttributeRecord)
+    assert isinstance(stored["revisions"][0]["attributes"], AttributeRecord)
+    # derived flags are recomputed on read, never stored
+    assert "review_requested" not in stored
+
+    # separately decoded bodies end up sharing key and user strings
+    first, second = list(ctx.contents.values())[:2]
+    assert first["created_by"] is second["created_by"]
+    first_keys = list(first["revisions"][0]["attributes"])
+    second_keys = list(second["revisions"][0]["attributes"])
+    assert first_keys[0] is second_keys[0] == "title"
+
+    body = service.get(uuid)
+    assert type(body) is dict and body["title"] == "Edited"
+    assert all(type(rev) is dict for rev in body["revisions"])
+    assert json.loads(json.dumps(stored, default=json_default))["type"] == stored["type"].value
+
+    category = CategoryService(ctx).create_category({"name": "News"})
+    assert isinstance(ctx.categories[category["uuid"]], CategoryRecord)
+
+
+def test_journal_recovers_records(tmp_path, users):
+    ctx = JournaledDbContext(str(tmp_path))
+    service = _service(ctx, users)
+    service.update(next(iter(ctx.contents)), {"title": "Edited"})
+    CategoryService(ctx).create_category({"name": "News"})
+    ctx.snapshot()
+    service.update(next(iter(ctx.contents)), {"title": "Again"})
+    expected = {uuid: item.to_dict() for uuid, item in ctx.contents.items()}
+    ctx.close()
+
+    reopened = JournaledDbContext(str(tmp_path))
+    try:
+        assert all(isinstance(item, ContentRecord) for item in reopened.contents.values())
+        assert all(isinstance(cat, CategoryRecord) for cat in reopened.categories.values())
+        assert reopened.contents == expected
+    finally:
+        reopened.close()
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.cache import RenderedItemCache
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.projection import ItemView
+from cms.services import ContentService
+from cms.sqlite_context import SQLiteDbContext
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def ctx(users):
+    ctx = DbContext()
+    ctx.tokens["token-editor"] = "editor"
+    service = ContentService(ctx)
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return ctx
+
+
+@pytest.fixture()
+def base_url(ctx):
+    server, thread = start_test_server(context=ctx)
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(base_url, path):
+    req = urllib.request.Request(base_url + path, headers=AUTH)
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def test_encoded_items_match_flagged_items(ctx):
+    service = ContentService(ctx)
+    expected, next_key = service.page(None, True, 5)
+    encoded, encoded_key = service.page_encoded(None, True, 5)
+    assert encoded_key == next_key
+    assert [json.loads(body) for body in encoded] == json.loads(json.dumps(expected))
+    view = ItemView(frozenset({"uuid"}), "none")
+    assert [json.loads(b) for b in service.page_encoded(None, True, 5, view=view)[0]] == [
+        {"uuid": item["uuid"]} for item in expected
+    ]
+
+
+def test_items_encoded_once_per_change(ctx, users):
+    cache = ctx.rendered_items
+    service = ContentService(ctx)
+    first = list(service.stream_encoded(None, True))
+    assert (cache.hits, cache.misses) == (0, len(ctx.contents))
+    again = list(service.stream_encoded(None, True))
+    assert cache.hits == len(ctx.contents)
+    # the cached encodings themselves are handed out, not copies
+    assert all(a is b for a, b in zip(first, again))
+
+    uuid = next(iter(ctx.contents))
+    service.request_approval(uuid, {"user_uuid": users["editor"]["uuid"], "timestamp": "2025-06-09T10:00:00"})
+    listed = {item["uuid"]: item for item in map(json.loads, service.stream_encoded(None, True))}
+    assert listed[uuid]["review_requested"] is True
+    assert cache.misses == len(ctx.contents) + 1
+    assert [json.loads(b)["uuid"] for b in service.pending_approvals_encoded()] == [uuid]
+
+
+def test_listing_endpoints_use_rendered_items(base_url, ctx):
+    cache = ctx.rendered_items
+    listed = _get(base_url, "/content")
+    paged = _get(base_url, "/content?limit=3")
+    assert paged["items"] == listed[:3] and paged["next_cursor"]
+    assert _get(base_url, "/content-types/html") == [i for i in listed if i["type"] == "html"]
+    assert cache.hits == 3 + 2
+    assert all("is_published" in item and "review_requested" in item for item in listed)
+
+
+def test_size_limits():
+    cache = RenderedItemCache(max_bytes=10, max_item_bytes=6)
+    cache.put("a", b"1234567")
+    assert cache.get("a") is None
+    cache.put("a", b"123456")
+    cache.put("b", b"12345")
+    assert cache.get("b") is None and cache.size == 6
+    cache.update({"uuid": "a"})
+    assert cache.size == 0 and cache.get("a") is None
+
+
+def test_sqlite_context_encodes_without_cache(users):
+    ctx = SQLiteDbContext()
+    service = ContentService(ctx)
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    assert ctx.rendered_items is None
+    encoded, _ = service.page_encoded(None, True, 3)
+    assert [json.loads(b) for b in encoded] == json.loads(json.dumps(service.page(None, True, 3)[0]))
+    ctx.close()
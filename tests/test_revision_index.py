@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.compaction import RetentionPolicy, compact_revisions
+from cms.data import seed_users, sample_content
+from cms.db_context import DbContext
+from cms.services import ContentService
+from cms.sqlite_context import SQLiteDbContext
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _history(service, users, edits=50):
+    item = service.create(sample_content(users).to_dict())
+    for i in range(edits):
+        item = service.update(item["uuid"], {"html_content": f"<p>Edit {i}</p>"})
+    return item
+
+
+@pytest.mark.parametrize("make_ctx", [DbContext, SQLiteDbContext])
+def test_every_revision_resolves(users, make_ctx):
+    service = ContentService(make_ctx())
+    item = _history(service, users)
+    for rev in item["revisions"]:
+        assert service.get_revision(item["uuid"], rev["uuid"]) == rev
+    assert service.get_revision(item["uuid"], "missing") is None
+    assert service.get_revision("missing", item["revisions"][0]["uuid"]) is None
+
+
+def test_index_follows_history_rewrites(users):
+    service = ContentService(DbContext())
+    item = _history(service, users, edits=10)
+    ctx = service.ctx
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    service.approve(item["uuid"], admin)
+    published = item["review_revision"]
+    for i in range(5):
+        service.update(item["uuid"], {"title": f"Later {i}"})
+
+    compact_revisions(ctx, RetentionPolicy(keep_last=2))
+    stored = ctx.contents[item["uuid"]]
+    assert ctx.revision_position(stored, published) == 0
+    assert ctx.revision_position(stored, item["revisions"][3]["uuid"]) is None
+
+    # a client replacing the history re-indexes the item
+    reversed_history = list(reversed(service.get(item["uuid"])["revisions"]))
+    updated = service.update(item["uuid"], {"revisions": reversed_history})
+    stored = ctx.contents[item["uuid"]]
+    for position, rev in enumerate(updated["revisions"]):
+        assert ctx.revision_index.position(stored, rev["uuid"]) == position
+        assert ctx.revision_index._positions[rev["uuid"]] == (item["uuid"], position)
+
@@ -0,0 +1,90 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, sample_content
+from cms.db_context import DbContext
+from cms.models import json_default
+from cms.revisions import (
+    KEYFRAME_INTERVAL,
+    attributes_at,
+    decode_revisions,
+    encode_revisions,
+)
+from cms.services import ContentService
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _edit(html, rng):
+    pos = rng.randrange(len(html))
+    return html[:pos] + f"<b>{rng.random()}</b>" + html[pos + rng.randrange(20):]
+
+
+def _html_item(users):
+    item = sample_content(users).to_dict()
+    del item["revisions"]
+    item["html_content"] = "".join(f"<p>Paragraph {i} of the page body.</p>" for i in range(300))
+    return item
+
+
+def test_round_trip_and_random_access():
+    rng = random.Random(1)
+    html = "<p>start</p>" * 50
+    revisions = []
+    for i in range(100):
+        html = _edit(html, rng)
+        attrs = {"title": f"T{i // 7}", "html_content": html}
+        if i % 10 == 3:
+            attrs["extra"] = i
+        revisions.append({"uuid": str(i), "last_updated": "t", "attributes": attrs})
+
+    encoded = encode_revisions(revisions)
+    assert decode_revisions(encoded) == revisions
+    assert encode_revisions(encoded) == encoded
+    for index in (0, 1, KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL, 77, -1):
+        assert attributes_at(encoded, index) == revisions[index]["attributes"]
+    keyframes = [i for i, rev in enumerate(encoded) if "delta" not in rev]
+    assert keyframes == list(range(0, 100, KEYFRAME_INTERVAL))
+
+
+def test_edited_html_is_stored_as_deltas(users):
+    rng = random.Random(2)
+    service = ContentService(DbContext())
+    item = service.create(_html_item(users))
+    html = item["revisions"][0]["attributes"]["html_content"]
+    submitted = [html]
+    for _ in range(200):
+        html = _edit(html, rng)
+        submitted.append(html)
+        service.update(item["uuid"], {"html_content": html})
+
+    body = service.get(item["uuid"])
+    assert [rev["attributes"]["html_content"] for rev in body["revisions"]] == submitted
+    assert body["review_revision"] == body["revisions"][-1]["uuid"]
+
+    stored = len(json.dumps(service.ctx.contents[item["uuid"]]["revisions"], default=json_default))
+    full = len(json.dumps(body["revisions"]))
+    assert stored * 10 < full
+
+
+def test_echoed_revisions_are_kept(users):
+    service = ContentService(DbContext())
+    item = service.create(_html_item(users))
+    for i in range(3):
+        item = service.update(item["uuid"], {"html_content": item["revisions"][-1]["attributes"]["html_content"] + str(i)})
+
+    # a client PUTs the item back with every revision it was given
+    echoed = service.update(item["uuid"], {"title": "Renamed", "revisions": item["revisions"]})
+    assert echoed["revisions"][:4] == item["revisions"]
+    assert echoed["revisions"][-1]["attributes"]["title"] == "Renamed"
+    assert echoed["revisions"][-1]["attributes"]["html_content"].endswith("2")
+    assert "delta" in service.ctx.contents[item["uuid"]]["revisions"][1]
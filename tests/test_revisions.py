@@ -65,3 +65,21 @@ def test_revision_history(api_server, users, auth_token):
     assert body["review_revision"] == body["revisions"][-1]["uuid"]
 
     assert len(body["revisions"]) == 4
+
+
+def test_get_single_revision(api_server, users, auth_token):
+    content = sample_content(users).to_dict()
+    status, body = _request(api_server, "POST", "/content", content, token=auth_token)
+    uuid = body["uuid"]
+    for i in range(3):
+        status, body = _request(api_server, "PUT", f"/content/{uuid}", {"title": f"Update {i}"}, token=auth_token)
+
+    for rev in body["revisions"]:
+        status, fetched = _request(api_server, "GET", f"/content/{uuid}/revisions/{rev['uuid']}", token=auth_token)
+        assert status == 200
+        assert fetched == rev
+
+    status, _ = _request(api_server, "GET", f"/content/{uuid}/revisions/missing", token=auth_token)
+    assert status == 404
+    status, _ = _request(api_server, "GET", f"/content/{uuid}/revisions/{body['revisions'][0]['uuid']}")
+    assert status == 401
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import SimpleCRUDHandler
+from cms.routing import Router
+
+
+@pytest.fixture()
+def router():
+    return SimpleCRUDHandler.routes
+
+
+@pytest.mark.parametrize(
+    "method,path,name,params",
+    [
+        ("GET", "/content", "content.list", {}),
+        ("POST", "/content", "content.create", {}),
+        ("GET", "/content/abc", "content.get", {"uuid": "abc"}),
+        ("PUT", "/content/abc", "content.update", {"uuid": "abc"}),
+        ("DELETE", "/content/abc", "content.archive", {"uuid": "abc"}),
+        ("POST", "/content/abc/approve", "content.approve", {"uuid": "abc"}),
+        ("POST", "/content/abc/start-draft", "content.start_draft", {"uuid": "abc"}),
+        ("GET", "/content-types", "content_types.list", {}),
+        ("GET", "/content-types/event%20schedule", "content_types.items", {"type": "event schedule"}),
+        ("GET", "/categories/c1", "categories.get", {"uuid": "c1"}),
+        ("POST", "/test-token", "test_token", {}),
+    ],
+)
+def test_routes_resolve(router, method, path, name, params):
+    route, matched = router.match(method, path)
+    assert route.name == name
+    assert matched == params
+
+
+@pytest.mark.parametrize(
+    "method,path",
+    [
+        ("GET", "/nowhere"),
+        ("GET", "/content/"),
+        ("GET", "/content/abc/approve"),
+        ("DELETE", "/content"),
+        ("GET", "content"),
+    ],
+)
+def test_unmatched_paths(router, method, path):
+    assert router.match(method, path) is None
+
+
+def test_literal_segments_win_over_placeholders():
+    router = Router([
+        ("GET", "/items/<uuid>", "items.get", "_get"),
+        ("GET", "/items/latest", "items.latest", "_latest"),
+    ])
+    assert router.match("GET", "/items/latest")[0].name == "items.latest"
+    assert router.match("GET", "/items/x")[0].name == "items.get"
+
+
+def test_conflicting_and_duplicate_routes_rejected():
+    router = Router([("GET", "/items/<uuid>", "items.get", "_get")])
+    with pytest.raises(ValueError):
+        router.add("GET", "/items/<uuid>", "again", "_get")
+    with pytest.raises(ValueError):
+        router.add("PUT", "/items/<type>", "items.put", "_put")
+    with pytest.raises(ValueError):
+        router.add("GET", "/items/<bogus>", "items.bogus", "_bogus")
+
+
+def test_route_names_are_unique(router):
+    assert len(router.names) == len(set(router.names))
+    for route_name in router.names:
+        assert route_name
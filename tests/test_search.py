@@ -0,0 +1,148 @@
+import os
+import sys
+import urllib.error
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.db_context import DbContext
+from cms.search import _Postings, strip_tags, tokenize
+from cms.services import ContentService
+from cms.sqlite_context import SQLiteDbContext
+
+AUTH = {"Authorization": "Bearer token-editor"}
+
+
+def _populate(ctx, users):
+    ctx.tokens["token-editor"] = "editor"
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"}
+    pages = {
+        "harbour": ("Harbour opening", "<p>The harbour opens at dawn.</p>"),
+        "market": ("Market day", "<p>Fish from the harbour, harbour boats, harbour nets.</p>"),
+        "library": ("Library hours", "<p>Closed for the <b>harbour</b> festival.</p>"),
+        "draft": ("Unreleased harbour plan", "<p>Secret.</p>"),
+    }
+    for uuid, (title, body) in pages.items():
+        service.create({
+            "uuid": uuid,
+            "type": "html",
+            "title": title,
+            "html_content": body,
+            "created_by": users["editor"]["uuid"],
+            "timestamps": "2025-06-08T12:00:00",
+        })
+        service.update(uuid, {"title": title})
+        if uuid != "draft":
+            service.approve(uuid, admin)
+    return service
+
+
+def _uuids(service, query, authenticated=False, limit=10, after=None):
+    items, next_key = service.search(query, authenticated, limit, after)
+    return [item["uuid"] for item in items], next_key
+
+
+def test_tokenize_strips_markup():
+    markup = "<p>Caf&eacute; <b>Open</b></p><script>var hidden = 1;</script><style>p {}</style>"
+    assert tokenize(strip_tags(markup)) == ["café", "open"]
+
+
+def test_drafts_only_match_when_authenticated(ctx):
+    service = ContentService(ctx)
+    assert _uuids(service, "secret")[0] == []
+    assert _uuids(service, "secret", authenticated=True)[0] == ["draft"]
+    # every word has to match
+    assert _uuids(service, "harbour festival")[0] == ["library"]
+    assert _uuids(service, "harbour nowhere")[0] == []
+
+
+def test_new_items_match_when_authenticated(ctx, users):
+    service = ContentService(ctx)
+    service.create({
+        "uuid": "notice",
+        "type": "html",
+        "title": "Ferry notice",
+        "html_content": "<p>Timetable changes.</p>",
+        "created_by": users["editor"]["uuid"],
+        "timestamps": "2025-06-10T12:00:00",
+    })
+    assert _uuids(service, "timetable", authenticated=True)[0] == ["notice"]
+    assert _uuids(service, "timetable")[0] == []
+
+
+def test_ranking_prefers_title_and_frequency(ctx):
+    service = ContentService(ctx)
+    found, next_key = _uuids(service, "Harbour")
+    assert found == ["harbour", "market", "library"]
+    assert next_key is None
+    first, next_key = _uuids(service, "harbour", limit=2)
+    assert first == ["harbour", "market"]
+    rest, last_key = _uuids(service, "harbour", limit=2, after=next_key)
+    assert rest == ["library"] and last_key is None
+
+
+def test_index_follows_edits_and_archive(ctx, users):
+    service = ContentService(ctx)
+    admin = {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T12:00:00"}
+    service.update("library", {"html_content": "<p>Open every day.</p>"})
+    # the published text is still what anonymous callers see
+    assert _uuids(service, "festival")[0] == ["library"]
+    assert _uuids(service, "every", authenticated=True)[0] == ["library"]
+    assert _uuids(service, "every")[0] == []
+    service.approve("library", admin)
+    assert _uuids(service, "festival")[0] == []
+    assert _uuids(service, "every")[0] == ["library"]
+
+    service.archive("market")
+    assert _uuids(service, "boats", authenticated=True)[0] == []
+
+
+def test_ranked_results_are_kept_until_the_index_changes(users, monkeypatch):
+    ctx = DbContext()
+    service = _populate(ctx, users)
+    scored = []
+    scores = _Postings.scores
+    monkeypatch.setattr(_Postings, "scores", lambda self, terms: scored.append(terms) or scores(self, terms))
+    first, next_key = _uuids(service, "harbour", limit=2)
+    rest, _ = _uuids(service, "Harbour", limit=2, after=next_key)
+    assert first + rest == ["harbour", "market", "library"]
+    assert len(scored) == 1
+    # a draft edit leaves the published text, and its ranking, alone
+    service.update("library", {"html_content": "<p>Open every day.</p>"})
+    assert _uuids(service, "harbour")[0] == first + rest
+    assert len(scored) == 1
+    service.approve("library", {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T12:00:00"})
+    assert _uuids(service, "harbour")[0] == first
+    assert len(scored) == 2
+
+
+def test_sqlite_context_searches(tmp_path, users):
+    ctx = SQLiteDbContext(str(tmp_path / "cms.db"))
+    _populate(ctx, users)
+    ctx.close()
+    reopened = SQLiteDbContext(str(tmp_path / "cms.db"))
+    try:
+        assert _uuids(ContentService(reopened), "harbour")[0] == ["harbour", "market", "library"]
+    finally:
+        reopened.close()
+
+
+def test_search_endpoint_pages(get):
+    page = get("/search?q=harbour&limit=2&fields=uuid&revisions=none")
+    assert page["items"] == [{"uuid": "harbour"}, {"uuid": "market"}]
+    rest = get(f"/search?q=harbour&limit=2&fields=uuid&cursor={page['next_cursor']}")
+    assert rest == {"items": [{"uuid": "library"}], "next_cursor": None}
+
+    found = get("/search?q=secret", AUTH)["items"]
+    assert [item["uuid"] for item in found] == ["draft"]
+    assert found[0]["title"] == "Unreleased harbour plan"
+    assert get("/search?q=secret")["items"] == []
+
+
+@pytest.mark.parametrize("query", ["", "?q=", "?q=harbour&cursor=bogus", "?q=harbour&limit=0"])
+def test_search_endpoint_rejects_bad_queries(get, query):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        get("/search" + query)
+    assert err.value.code == 400
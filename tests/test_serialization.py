@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, seed_example_contents, sample_content
+from cms.models import Category, Revision, json_default
+
+
+def _legacy_to_dict(item):
+    data = asdict(item)
+    data["type"] = item.type.value
+    data["review_requested"] = item.review_requested
+    return data
+
+
+def test_to_dict_matches_asdict():
+    users = seed_users()
+    items = seed_example_contents(users)
+    items[0].draft_requested_by = users["editor"]["uuid"]
+    items[1].categories = ["news"]
+    for item in items:
+        data = item.to_dict()
+        assert data == _legacy_to_dict(item)
+        assert list(data) == list(_legacy_to_dict(item))
+    category = Category(uuid="c", name="News", display_priority=2)
+    assert category.to_dict() == asdict(category)
+
+
+def test_to_dict_does_not_share_containers():
+    item = sample_content(seed_users())
+    item.categories = ["news"]
+    data = item.to_dict()
+    data["categories"].append("other")
+    data["revisions"][0]["attributes"]["title"] = "Changed"
+    assert item.categories == ["news"]
+    assert item.revisions[0].attributes["title"] == "Sample HTML Content"
+
+
+def test_models_encode_straight_to_json():
+    items = seed_example_contents(seed_users())
+    items[0].revisions.append(Revision(uuid="r2", last_updated="2025-06-09T10:00:00", attributes={"title": "B"}))
+    encoded = json.dumps(items, default=json_default)
+    assert json.loads(encoded) == [item.to_dict() for item in items]
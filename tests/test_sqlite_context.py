@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.api import start_test_server
+from cms.data import seed_users, seed_example_contents, sample_content
+from cms.db_context import DbContext
+from cms.services import CategoryService, ContentService, TokenService
+from cms.sqlite_context import SQLiteDbContext, _SQLiteMapping
+from cms.types import ContentType
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+def _request(base_url, method, path, data=None, token=None):
+    url = base_url + path
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if data is not None:
+        data = json.dumps(data).encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode())
+
+
+def _exercise(ctx, users, contents):
+    service = ContentService(ctx)
+    for item in contents:
+        service.create(item.to_dict())
+    uuids = [item.uuid for item in contents]
+    editor, admin = users["editor"]["uuid"], users["admin"]["uuid"]
+    for i, uuid in enumerate(uuids):
+        if i % 2 == 0:
+            service.request_approval(uuid, {"user_uuid": editor, "timestamp": f"2025-06-09T{20 - i:02d}:00:00"})
+        if i % 3 == 0:
+            service.approve(uuid, {"user_uuid": admin, "timestamp": "2025-06-09T21:00:00"})
+        if i % 4 == 1:
+            service.update(uuid, {"title": f"Edited {i}"})
+        if i % 5 == 4:
+            service.archive(uuid)
+    result = {
+        "all": service.list_all(True),
+        "public": service.list_all(False),
+        "pending": service.pending_approvals(),
+    }
+    for ct in ContentType:
+        result[ct.value] = service.list_by_type(ct.value, True)
+        result[ct.value + ":public"] = service.list_by_type(ct.value, False)
+    page, after = service.page(None, True, 3)
+    result["page2"] = service.page(None, True, 3, after)[0]
+    # revision UUIDs are random, so compare everything else
+    return {
+        name: [
+            (item["uuid"], item["title"], item["is_published"], item["review_requested"], len(item["revisions"]))
+            for item in items
+        ]
+        for name, items in result.items()
+    }
+
+
+def test_sqlite_matches_in_memory_context(users):
+    contents = seed_example_contents(users)
+    ctx = SQLiteDbContext()
+    assert _exercise(ctx, users, contents) == _exercise(DbContext(), users, contents)
+    ctx.close()
+
+
+def test_sqlite_persists_across_reopen(tmp_path, users):
+    path = str(tmp_path / "cms.db")
+    ctx = SQLiteDbContext(path)
+    content = ContentService(ctx).create(sample_content(users).to_dict())
+    category = CategoryService(ctx).create_category({"name": "News"})
+    CategoryService(ctx).archive_category(category["uuid"])
+    TokenService(ctx).create_token("editor")
+    ctx.close()
+
+    ctx = SQLiteDbContext(path)
+    assert ctx.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert ContentService(ctx).get(content["uuid"])["revisions"] == content["revisions"]
+    assert CategoryService(ctx).get_category(category["uuid"])["archived"] is True
+    assert TokenService(ctx).validate_token("token-editor")
+    assert len(ctx.contents) == 1 and list(ctx.tokens) == ["token-editor"]
+    ctx.close()
+
+
+def test_lookup_tables_are_not_rebuilt_on_open(tmp_path, users, monkeypatch):
+    path = str(tmp_path / "cms.db")
+    ctx = SQLiteDbContext(path)
+    item = sample_content(users).to_dict()
+    item["categories"] = ["news"]
+    ContentService(ctx).create(item)
+    ctx.close()
+
+    def no_scan(self):
+        raise AssertionError("stored rows read on open")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(_SQLiteMapping, "__iter__", no_scan)
+        ctx = SQLiteDbContext(path)
+    assert ctx.category_index.count("news") == 1
+    # a file written before the lookup tables existed is indexed once
+    ctx.connection.execute("DELETE FROM content_categories")
+    ctx.connection.execute("PRAGMA user_version = 0")
+    ctx.close()
+    ctx = SQLiteDbContext(path)
+    assert [found["uuid"] for found in ctx.page_category("news", 10)[0]] == [item["uuid"]]
+    ctx.close()
+
+
+def test_failed_index_update_rolls_back_save(users, monkeypatch):
+    ctx = SQLiteDbContext()
+    item = sample_content(users).to_dict()
+    item["categories"] = ["news"]
+    ContentService(ctx).create(item)
+    changed = ctx.contents[item["uuid"]]
+    changed["categories"] = ["sports"]
+
+    def broken(item):
+        raise RuntimeError("index failure")
+
+    monkeypatch.setattr(ctx.event_index, "update", broken)
+    with pytest.raises(RuntimeError):
+        ctx.save_content(changed)
+    assert ctx.contents[item["uuid"]]["categories"] == ["news"]
+    assert ctx.category_index.count("news") == 1
+    assert ctx.category_index.count("sports") == 0
+    assert not ctx.connection.in_transaction
+    ctx.close()
+
+
+def test_listing_queries_use_indexes():
+    ctx = SQLiteDbContext()
+    plan = ctx.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM content WHERE type = ? AND published = ? "
+        "ORDER BY created_at, uuid LIMIT 10",
+        ("html", 1),
+    ).fetchall()
+    assert "content_type_published" in str(plan)
+    plan = ctx.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM content WHERE pending = 1 ORDER BY draft_requested_at, uuid"
+    ).fetchall()
+    assert "content_pending" in str(plan)
+    plan = ctx.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT uuid FROM office_addresses WHERE postal_code >= ? AND postal_code < ? "
+        "ORDER BY postal_code, uuid",
+        ("100", "101"),
+    ).fetchall()
+    assert "office_addresses_postal_code" in str(plan)
+    ctx.close()
+
+
+def test_server_runs_on_sqlite_context(tmp_path, users):
+    ctx = SQLiteDbContext(str(tmp_path / "cms.db"))
+    server, thread = start_test_server(context=ctx)
+    base_url = f"http://localhost:{server.server_port}"
+    status, body = _request(base_url, "POST", "/test-token", {"username": "t"})
+    token = body["token"]
+    content = sample_content(users).to_dict()
+    status, body = _request(base_url, "POST", "/content", content, token=token)
+    assert status == 201
+    updated = body.copy()
+    updated["title"] = "Updated"
+    status, body = _request(base_url, "PUT", f"/content/{content['uuid']}", updated, token=token)
+    assert status == 200 and len(body["revisions"]) == 2
+    status, body = _request(base_url, "GET", "/content-types/html", token=token)
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    ctx.close()
+    assert status == 200
+    assert [item["title"] for item in body] == ["Updated"]
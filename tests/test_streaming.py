@@ -0,0 +1,72 @@
+import http.client
+import json
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms import api as cms_api
+from cms.api import start_test_server
+from cms.client_api import ApiClient
+from cms.data import seed_users, sample_content
+
+
+@pytest.fixture()
+def server():
+    server, thread = start_test_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture()
+def created(server):
+    users = seed_users()
+    api = ApiClient(f"http://localhost:{server.server_port}")
+    api.create_token("editor")
+    items = []
+    for i in range(30):
+        content = sample_content(users).to_dict()
+        content["html_content"] = f"<p>{'x' * 500} {i}</p>"
+        items.append(api.create_content(content))
+    api.close()
+    return items
+
+
+def test_listing_is_streamed_in_chunks(server, created, monkeypatch):
+    monkeypatch.setattr(cms_api, "STREAM_CHUNK_SIZE", 1024)
+    conn = http.client.HTTPConnection("localhost", server.server_port)
+    conn.request("GET", "/content-types/html", headers={"Authorization": "Bearer token-editor"})
+    resp = conn.getresponse()
+    assert resp.status == 200
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    assert resp.getheader("Content-Length") is None
+    body = json.loads(resp.read())
+    assert {item["uuid"] for item in body} == {item["uuid"] for item in created}
+    assert all("is_published" in item for item in body)
+
+    # the connection stays usable after a chunked response
+    conn.request("GET", "/content")
+    resp = conn.getresponse()
+    assert json.loads(resp.read()) == []
+    conn.close()
+
+
+def test_http10_clients_get_buffered_listing(server, created):
+    sock = socket.create_connection(("localhost", server.server_port))
+    sock.sendall(b"GET /content HTTP/1.0\r\nAuthorization: Bearer token-editor\r\n\r\n")
+    received = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        received += chunk
+    sock.close()
+    head, _, body = received.partition(b"\r\n\r\n")
+    assert b"Content-Length: %d" % len(body) in head
+    assert b"chunked" not in head
+    assert len(json.loads(body)) == len(created)
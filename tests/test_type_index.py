@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cms.data import seed_users, seed_example_contents
+from cms.db_context import DbContext
+from cms.indexes import ContentIndex
+from cms.services import ContentService
+from cms.types import ContentType
+
+
+@pytest.fixture()
+def users():
+    return seed_users()
+
+
+@pytest.fixture()
+def service(users):
+    service = ContentService(DbContext())
+    for item in seed_example_contents(users):
+        service.create(item.to_dict())
+    return service
+
+
+def _uuids(items):
+    return {item["uuid"] for item in items}
+
+
+def _scan(ctx, item_type, published_only):
+    return {
+        item["uuid"]
+        for item in ctx.contents.values()
+        if (item_type is None or item["type"] == item_type)
+        and (not published_only or item.get("published_revision"))
+    }
+
+
+def test_index_tracks_publish_and_archive(service, users):
+    ctx = service.ctx
+    html = [i["uuid"] for i in service.list_by_type(ContentType.HTML.value, True)]
+    assert len(html) == 2
+    assert service.list_by_type(ContentType.HTML.value, False) == []
+    assert ctx.type_index.count(ContentType.HTML.value, published=False) == 2
+
+    service.approve(html[0], {"user_uuid": users["admin"]["uuid"], "timestamp": "2025-06-09T11:00:00"})
+    assert _uuids(service.list_by_type(ContentType.HTML.value, False)) == {html[0]}
+    assert _uuids(service.list_all(False)) == {html[0]}
+    assert ctx.type_index.count(ContentType.HTML.value, published=True) == 1
+    assert ctx.type_index.count(ContentType.HTML.value, published=False) == 1
+
+    service.archive(html[0])
+    assert service.list_by_type(ContentType.HTML.value, False) == []
+    assert service.list_all(False) == []
+    assert ctx.type_index.count(ContentType.HTML.value) == 2
+
+
+def test_index_matches_full_scan_after_updates(service, users):
+    ctx = service.ctx
+    for i, item in enumerate(list(ctx.contents.values())):
+        if i % 2:
+            service.approve(item["uuid"], {"user_uuid": users["admin"]["uuid"], "timestamp": "t"})
+        if i % 3 == 0:
+            service.update(item["uuid"], {"title": f"Edited {i}"})
+    for ct in ContentType:
+        for published_only in (False, True):
+            listed = service.list_by_type(ct.value, not published_only)
+            assert _uuids(listed) == _scan(ctx, ct.value, published_only)
+    assert _uuids(service.list_all(False)) == _scan(ctx, None, True)
+    assert _uuids(service.list_all(True)) == _scan(ctx, None, False)
+
+
+def test_reindex_rebuilds_from_contents(service):
+    ctx = service.ctx
+    before = {ct.value: ctx.type_index.count(ct.value) for ct in ContentType}
+    ctx.type_index.clear()
+    assert ctx.type_index.count(ContentType.PDF.value) == 0
+    ctx.reindex()
+    assert {ct.value: ctx.type_index.count(ct.value) for ct in ContentType} == before
+
+
+def test_indexes_must_implement_update_and_clear():
+    class Partial(ContentIndex):
+        def update(self, item):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()